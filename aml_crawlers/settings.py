@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'crawler.tracing.TraceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -63,13 +64,19 @@ TEMPLATES = [
 WSGI_APPLICATION = 'aml_crawlers.wsgi.application'
 ASGI_APPLICATION = 'aml_crawlers.asgi.application'
 
+# Redis settings (shared connection pools, see crawler/redis_client.py)
+REDIS_HOST = os.getenv('REDIS_HOST', '127.0.0.1')
+REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+REDIS_DB = int(os.getenv('REDIS_DB', 0))
+REDIS_PASSWORD = os.getenv('REDIS_PASSWORD') or None
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+
 # Channel layer settings
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            "hosts": [(os.getenv('REDIS_HOST', '127.0.0.1'), 
-                      int(os.getenv('REDIS_PORT', 6379)))],
+            "hosts": [(REDIS_HOST, REDIS_PORT)],
         },
     },
 }
@@ -121,12 +128,26 @@ if not DEBUG:
     CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', '').split(',')
 
 # Celery Configuration
-CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}')
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'sweep-cache-generations': {
+        'task': 'crawler.tasks.sweep_cache',
+        'schedule': 60 * 60,  # hourly
+    },
+    'sweep-orphaned-uploads': {
+        'task': 'crawler.tasks.sweep_uploads',
+        'schedule': 60 * 60,  # hourly
+    },
+    'prefetch-popular-addresses': {
+        'task': 'crawler.tasks.prefetch_popular',
+        'schedule': 5 * 60,  # every 5 minutes
+    },
+}
 
 # Logging Configuration
 LOGGING = {
@@ -134,16 +155,22 @@ LOGGING = {
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} [{trace_id}] {message}',
             'style': '{',
         },
     },
+    'filters': {
+        'trace_id': {
+            '()': 'crawler.tracing.TraceIdFilter',
+        },
+    },
     'handlers': {
         'file': {
             'level': 'DEBUG',
             'class': 'logging.FileHandler',
             'filename': 'crawler.log',
             'formatter': 'verbose',
+            'filters': ['trace_id'],
         },
     },
     'loggers': {
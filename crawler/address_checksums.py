@@ -0,0 +1,138 @@
+"""
+地址校验和验证
+
+正则只检查字符集和长度，这里解码地址并验证校验和，格式正确但输错一位的地址
+在进入爬取之前就会被拒绝：
+
+- BTC legacy（1.../3...）、TRX（T...）：base58check（双 SHA-256 前 4 字节），并检查版本字节
+- BTC segwit（bc1...）：BIP-173 bech32（见证版本 0）/ BIP-350 bech32m（见证版本 1-16）
+- SOL：base58 解码后必须正好是 32 字节的公钥
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Optional, List, Tuple
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_BASE58_INDEX = {char: index for index, char in enumerate(BASE58_ALPHABET)}
+
+BECH32_CHARSET = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+_BECH32_INDEX = {char: index for index, char in enumerate(BECH32_CHARSET)}
+_BECH32_CONST = 1
+_BECH32M_CONST = 0x2bc830a3
+
+BTC_VERSIONS = (0x00, 0x05)  # P2PKH, P2SH
+TRX_VERSION = 0x41
+
+
+def base58_decode(value: str) -> Optional[bytes]:
+    """Decode base58 (Bitcoin alphabet); None on invalid characters"""
+    number = 0
+    for char in value:
+        digit = _BASE58_INDEX.get(char)
+        if digit is None:
+            return None
+        number = number * 58 + digit
+    body = number.to_bytes((number.bit_length() + 7) // 8, 'big')
+    # 每个前导 '1' 表示一个 0x00 字节
+    pad = len(value) - len(value.lstrip('1'))
+    return b'\x00' * pad + body
+
+
+def base58check_decode(value: str) -> Optional[bytes]:
+    """Payload (version byte included) of a base58check string, None if the checksum does not match"""
+    raw = base58_decode(value)
+    if raw is None or len(raw) < 5:
+        return None
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        return None
+    return payload
+
+
+def _bech32_polymod(values: List[int]) -> int:
+    generator = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+    checksum = 1
+    for value in values:
+        top = checksum >> 25
+        checksum = (checksum & 0x1ffffff) << 5 ^ value
+        for i in range(5):
+            checksum ^= generator[i] if (top >> i) & 1 else 0
+    return checksum
+
+
+def bech32_decode(value: str) -> Optional[Tuple[str, List[int], int]]:
+    """(hrp, data without checksum, checksum constant) of a bech32/bech32m string"""
+    if value.lower() != value and value.upper() != value:
+        return None  # 不允许混合大小写
+    value = value.lower()
+    pos = value.rfind('1')
+    if pos < 1 or pos + 7 > len(value) or len(value) > 90:
+        return None
+    hrp = value[:pos]
+    try:
+        data = [_BECH32_INDEX[char] for char in value[pos + 1:]]
+    except KeyError:
+        return None
+    expanded = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    const = _bech32_polymod(expanded + data)
+    if const not in (_BECH32_CONST, _BECH32M_CONST):
+        return None
+    return hrp, data[:-6], const
+
+
+def _convert_bits(data: List[int], from_bits: int, to_bits: int) -> Optional[List[int]]:
+    acc = bits = 0
+    result = []
+    max_value = (1 << to_bits) - 1
+    for value in data:
+        acc = (acc << from_bits) | value
+        bits += from_bits
+        while bits >= to_bits:
+            bits -= to_bits
+            result.append((acc >> bits) & max_value)
+    if bits >= from_bits or (acc << (to_bits - bits)) & max_value:
+        return None
+    return result
+
+
+def is_valid_segwit(value: str, hrp: str = 'bc') -> bool:
+    """BIP-173 / BIP-350 segwit address check"""
+    decoded = bech32_decode(value)
+    if decoded is None or decoded[0] != hrp or not decoded[1]:
+        return False
+    _, data, const = decoded
+    version = data[0]
+    program = _convert_bits(data[1:], 5, 8)
+    if version > 16 or program is None or not 2 <= len(program) <= 40:
+        return False
+    if version == 0:
+        return const == _BECH32_CONST and len(program) in (20, 32)
+    return const == _BECH32M_CONST
+
+
+@lru_cache(maxsize=65536)
+def is_valid_btc(value: str) -> bool:
+    if value[:3].lower() == 'bc1':
+        return is_valid_segwit(value)
+    payload = base58check_decode(value)
+    return payload is not None and len(payload) == 21 and payload[0] in BTC_VERSIONS
+
+
+@lru_cache(maxsize=65536)
+def is_valid_trx(value: str) -> bool:
+    payload = base58check_decode(value)
+    return payload is not None and len(payload) == 21 and payload[0] == TRX_VERSION
+
+
+@lru_cache(maxsize=65536)
+def is_valid_sol(value: str) -> bool:
+    raw = base58_decode(value)
+    return raw is not None and len(raw) == 32
+
+
+CHECKSUM_VALIDATORS = {
+    'BTC': is_valid_btc,
+    'TRX': is_valid_trx,
+    'SOL': is_valid_sol,
+}
@@ -0,0 +1,60 @@
+"""
+地址标识规范化
+
+同一个钱包在缓存键、热度统计、批量去重中必须得到同一个标识 ``(network, address)``：
+
+- 网络名统一为大写，``Solana`` 等别名映射到 ``SOL``，空值和 ``undefined`` 视为 ``ETH``
+- EVM 地址（ETH/BSC/MATIC）不区分大小写，统一为小写；EIP-55 校验和格式只用于展示
+- BTC bech32 地址（``bc1...``）不区分大小写（但不能混用），统一为小写
+- 其他 base58 地址（BTC legacy、TRX、SOL）区分大小写，原样保留
+"""
+
+from typing import NamedTuple, Optional
+
+DEFAULT_NETWORK = 'ETH'
+EVM_NETWORKS = ('ETH', 'BSC', 'MATIC')
+SUPPORTED_NETWORKS = EVM_NETWORKS + ('BTC', 'TRX', 'SOL')
+NETWORK_ALIASES = {
+    'SOLANA': 'SOL',
+    'POLYGON': 'MATIC',
+    'BNB': 'BSC',
+    'TRON': 'TRX',
+    'BITCOIN': 'BTC',
+    'ETHEREUM': 'ETH',
+}
+
+
+class AddressIdentity(NamedTuple):
+    network: str
+    address: str
+
+    @property
+    def key(self) -> str:
+        """'{network}:{address}' with a lowercase network, the form used inside Redis keys"""
+        return f"{self.network.lower()}:{self.address}"
+
+
+def normalize_network(network: Optional[str]) -> str:
+    """Canonical upper-case network name"""
+    network = (network or '').strip().upper()
+    if not network or network == 'UNDEFINED':
+        return DEFAULT_NETWORK
+    return NETWORK_ALIASES.get(network, network)
+
+
+def is_evm_address(address: str) -> bool:
+    return len(address) == 42 and address[:2].lower() == '0x'
+
+
+def canonical_address(address: str) -> str:
+    """Canonical form of an address; case is only folded where the format is case-insensitive"""
+    address = (address or '').strip()
+    if is_evm_address(address):
+        return address.lower()
+    if address[:3].lower() == 'bc1':
+        return address.lower()
+    return address
+
+
+def identity(address: str, network: Optional[str] = None) -> AddressIdentity:
+    return AddressIdentity(normalize_network(network), canonical_address(address))
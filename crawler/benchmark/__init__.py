@@ -0,0 +1,10 @@
+from .standin import StandinServer
+from .harness import ENGINES, run_benchmark, run_matrix
+from .snapshots import Snapshot, load_corpus, build_corpus
+from .extractors import IMPLEMENTATIONS, benchmark_corpus, check_corpus, compare_implementations
+
+__all__ = [
+    'StandinServer', 'ENGINES', 'run_benchmark', 'run_matrix',
+    'Snapshot', 'load_corpus', 'build_corpus',
+    'IMPLEMENTATIONS', 'benchmark_corpus', 'check_corpus', 'compare_implementations',
+]
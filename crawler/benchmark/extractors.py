@@ -0,0 +1,198 @@
+"""
+提取器微基准与一致性检查
+
+在快照语料库（snapshots.py）上离线运行 ``_extract_*`` 函数：
+
+- 计时：每个解析器（``PARSERS``）的解析耗时、每个实现每个字段的提取耗时（生产解析器 lxml），
+  以及 ``UndetectedScraper.extract_result`` 的端到端耗时；每页取 ``iterations`` 次的中位数，报告每页平均微秒数
+- ``check_corpus``：生产提取器的输出必须等于快照录制时的 ``expected``，每个实现在不同解析器下的输出必须一致；
+  任何不一致都是回归
+- ``compare_implementations``：UndetectedScraper、SeleniumScraper、MistTrackScraperService 共有字段的输出
+  与生产实现（undetected）比较，只报告差异，不算失败（各实现的选择器本来就不同）
+- ``compare_to_baseline``：与之前保存的报告比较，找出变慢超过容差的项
+"""
+
+import time
+import statistics
+from typing import Dict, Any, List, Callable, Iterable, Optional
+
+from bs4 import BeautifulSoup
+
+from .snapshots import Snapshot, normalize
+
+PARSERS = ('lxml', 'html.parser')
+PRODUCTION_PARSER = 'lxml'
+REFERENCE = 'undetected'
+SHARED_FIELDS = ('risk_score', 'risk_level', 'labels', 'related_addresses')
+MIN_REGRESSION_US = 5.0  # 小于该值的变慢视为计时噪声
+
+Extractor = Callable[[BeautifulSoup, Any], Any]  # (soup, nuxt state) -> field value
+
+
+def _undetected() -> Dict[str, Extractor]:
+    from ..scraper_undetected import UndetectedScraper
+    scraper = UndetectedScraper()
+    return {
+        'risk_score': lambda soup, state: scraper._extract_risk_score(soup),
+        'risk_level': lambda soup, state: scraper._extract_risk_level(soup, state),
+        'risk_type': lambda soup, state: scraper._extract_risk_type(soup, state),
+        'address_labels': lambda soup, state: scraper._extract_address_labels(soup),
+        'labels': lambda soup, state: scraper._extract_labels(soup),
+        'transactions': lambda soup, state: scraper._extract_transactions(soup),
+        'related_addresses': lambda soup, state: scraper._extract_related_addresses(soup),
+        'table_data': lambda soup, state: scraper._extract_table_data(soup),
+    }
+
+
+def _selenium() -> Dict[str, Extractor]:
+    from ..scraper_selenium import SeleniumScraper
+    scraper = SeleniumScraper.__new__(SeleniumScraper)  # 构造函数会启动浏览器，提取函数不需要
+    return {
+        'risk_score': lambda soup, state: scraper._extract_risk_score(soup),
+        'labels': lambda soup, state: scraper._extract_labels(soup),
+        'transactions': lambda soup, state: scraper._extract_transactions(soup),
+        'related_addresses': lambda soup, state: scraper._extract_related_addresses(soup),
+        'risk_analysis': lambda soup, state: scraper._extract_risk_analysis(soup),
+    }
+
+
+def _service() -> Dict[str, Extractor]:
+    from ..services.scraper_service import MistTrackScraperService
+    service = MistTrackScraperService.__new__(MistTrackScraperService)
+    return {
+        'risk_score': lambda soup, state: service._extract_risk_score(soup),
+        'risk_level': lambda soup, state: service._extract_risk_level(soup),
+        'labels': lambda soup, state: service._extract_labels(soup),
+        'transactions': lambda soup, state: service._extract_transactions(soup),
+        'related_addresses': lambda soup, state: service._extract_related_addresses(soup),
+    }
+
+
+# 实现名 -> 构造 {字段: 提取函数} 的函数
+IMPLEMENTATIONS: Dict[str, Callable[[], Dict[str, Extractor]]] = {
+    'undetected': _undetected,
+    'selenium': _selenium,
+    'service': _service,
+}
+
+
+def _median_us(function: Callable[[], Any], iterations: int) -> float:
+    function()  # 预热
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter_ns()
+        function()
+        samples.append(time.perf_counter_ns() - started)
+    return statistics.median(samples) / 1000
+
+
+def _mean(values: List[float]) -> float:
+    return round(sum(values) / len(values), 1) if values else 0.0
+
+
+def _extract_result(snapshot: Snapshot, parser: str = PRODUCTION_PARSER) -> Dict[str, Any]:
+    from ..scraper_undetected import UndetectedScraper
+    return UndetectedScraper().extract_result(snapshot.address, snapshot.html, snapshot.nuxt_state, parser)
+
+
+def benchmark_corpus(snapshots: List[Snapshot], implementations: Iterable[str] = tuple(IMPLEMENTATIONS),
+                     parsers: Iterable[str] = PARSERS, iterations: int = 20) -> Dict[str, Any]:
+    """Timings per parser, per implementation and field, and end to end (mean microseconds per page)"""
+    parse = {}
+    for parser in parsers:
+        parse[parser] = _mean([_median_us(lambda: BeautifulSoup(s.html, parser), iterations) for s in snapshots])
+
+    soups = [BeautifulSoup(s.html, PRODUCTION_PARSER) for s in snapshots]
+    fields = []
+    for name in implementations:
+        for field, extract in IMPLEMENTATIONS[name]().items():
+            timings = [_median_us(lambda: extract(soup, s.nuxt_state), iterations) for soup, s in zip(soups, snapshots)]
+            fields.append({"implementation": name, "field": field, "mean_us": _mean(timings)})
+
+    from ..scraper_undetected import UndetectedScraper
+    scraper = UndetectedScraper()
+    end_to_end = _mean([
+        _median_us(lambda: scraper.extract_result(s.address, s.html, s.nuxt_state), iterations) for s in snapshots
+    ])
+    return {
+        "snapshots": len(snapshots),
+        "iterations": iterations,
+        "parse_us": parse,
+        "fields": fields,
+        "extract_result_us": end_to_end,
+    }
+
+
+def check_corpus(snapshots: List[Snapshot], implementations: Iterable[str] = tuple(IMPLEMENTATIONS),
+                 parsers: Iterable[str] = PARSERS) -> List[str]:
+    """Regressions: production output differs from the recorded expected output, or differs between parsers"""
+    problems = []
+    for snapshot in snapshots:
+        if snapshot.expected is not None:
+            actual = normalize(_extract_result(snapshot))
+            for key in sorted(set(actual) | set(snapshot.expected)):
+                if actual.get(key) != snapshot.expected.get(key):
+                    problems.append(f"{snapshot.name}: {key} is {actual.get(key)!r}, "
+                                    f"recorded {snapshot.expected.get(key)!r}")
+
+    extractors = {name: IMPLEMENTATIONS[name]() for name in implementations}
+    parsers = list(parsers)
+    for snapshot in snapshots:
+        soups = {parser: BeautifulSoup(snapshot.html, parser) for parser in parsers}
+        for name, fields in extractors.items():
+            for field, extract in fields.items():
+                outputs = {parser: normalize(extract(soup, snapshot.nuxt_state)) for parser, soup in soups.items()}
+                reference = outputs[parsers[0]]
+                for parser, output in outputs.items():
+                    if output != reference:
+                        problems.append(f"{snapshot.name}: {name}.{field} is {output!r} with {parser}, "
+                                        f"{reference!r} with {parsers[0]}")
+    return problems
+
+
+def _comparable(value):
+    if value in (None, '', 'N/A', 'Unknown'):
+        return None
+    if isinstance(value, (int, float)):
+        return str(value)
+    return normalize(value)
+
+
+def compare_implementations(snapshots: List[Snapshot],
+                            implementations: Iterable[str] = tuple(IMPLEMENTATIONS)) -> Dict[str, List[str]]:
+    """'{implementation}.{field}' -> snapshots where the field differs from the reference implementation"""
+    extractors = {name: IMPLEMENTATIONS[name]() for name in set(implementations) | {REFERENCE}}
+    differences: Dict[str, List[str]] = {}
+    for snapshot in snapshots:
+        soup = BeautifulSoup(snapshot.html, PRODUCTION_PARSER)
+        reference = extractors[REFERENCE]
+        for name, fields in extractors.items():
+            if name == REFERENCE:
+                continue
+            for field in SHARED_FIELDS:
+                if field not in fields or field not in reference:
+                    continue
+                expected = _comparable(reference[field](soup, snapshot.nuxt_state))
+                if _comparable(fields[field](soup, snapshot.nuxt_state)) != expected:
+                    differences.setdefault(f"{name}.{field}", []).append(snapshot.name)
+    return differences
+
+
+def _timings(report: Dict[str, Any]) -> Dict[str, float]:
+    timings = {f"parse.{parser}": us for parser, us in report.get("parse_us", {}).items()}
+    timings.update({f"{row['implementation']}.{row['field']}": row["mean_us"] for row in report.get("fields", [])})
+    if report.get("extract_result_us") is not None:
+        timings["extract_result"] = report["extract_result_us"]
+    return timings
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                        tolerance: float = 0.25, min_us: Optional[float] = MIN_REGRESSION_US) -> List[str]:
+    """Timings more than tolerance (and min_us) slower than in the baseline report"""
+    current, previous = _timings(report), _timings(baseline)
+    slower = []
+    for name, us in current.items():
+        before = previous.get(name)
+        if before and us > before * (1 + tolerance) and us - before > (min_us or 0):
+            slower.append(f"{name}: {us}us, baseline {before}us (+{(us / before - 1) * 100:.0f}%)")
+    return slower
@@ -0,0 +1,245 @@
+"""
+爬虫吞吐量基准
+
+对每个引擎和池大小（并发的浏览器 / 会话数）爬取同一组地址，统计：
+
+- ``addresses_per_sec``：不含引擎启动时间的吞吐量（启动时间单独记为 ``startup_s``）
+- ``p50_ms`` / ``p95_ms``：单个地址的耗时
+- ``peak_rss_mb``：运行期间本进程及子进程（浏览器）内存的峰值，安装 psutil 时按进程树采样，
+  否则使用 getrusage 的峰值
+- ``succeeded`` / ``failed``：结果中含风险表格或风险等级的算成功
+
+地址由种子生成，配合本地替身服务器（standin.py）可以离线得到可复现的数据。
+需要浏览器的引擎在缺少浏览器或依赖时记录错误，不影响其他引擎。
+"""
+
+import json
+import time
+import hashlib
+import logging
+import resource
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+MEMORY_SAMPLE_INTERVAL = 0.2
+
+
+class Engine(NamedTuple):
+    """How to create, call and close one scraper instance"""
+    create: Callable[[str], Any]                 # base URL of the site -> instance
+    search: Callable[[Any, str, str], Dict]      # (instance, network, address) -> scraper result
+    close: Callable[[Any], None]
+
+
+class HttpEngine:
+    """Plain HTTP fetch + parse, no JavaScript: the lower bound for page cost (fails on lazy / challenge pages)"""
+
+    def __init__(self, base_url: str):
+        import requests
+        from ..config import HTTP_HEADERS
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.session.headers.update({**HTTP_HEADERS, 'Accept': 'text/html'})
+
+    def search_address(self, address: str) -> Dict[str, Any]:
+        from bs4 import BeautifulSoup
+        response = self.session.get(f"{self.base_url}/{address}", timeout=30)
+        if response.status_code != 200:
+            return {"error": f"HTTP {response.status_code}"}
+        soup = BeautifulSoup(response.text, 'lxml')
+        table_data = [
+            dict(zip(("Risk Type", "Address/Risk Label", "Volume(USD)/%"),
+                     (cell.get_text(strip=True) for cell in row.find_all('td'))))
+            for row in soup.select('table.el-table__body tr.el-table__row')
+        ]
+        level = soup.select_one('.risk-level')
+        return {"address": address, "risk_level": level.get_text(strip=True) if level else None,
+                "table_data": table_data}
+
+    def close(self):
+        self.session.close()
+
+
+def _undetected():
+    from ..scraper_undetected import UndetectedScraper
+
+    def create(site):
+        scraper = UndetectedScraper(base_url=f"{site}/aml_risks", max_browsers=1)
+        # 浏览器在第一次搜索时才启动，这里提前启动，计入 startup_s
+        scraper.browser_pool.return_browser(scraper.browser_pool.get_browser())
+        return scraper
+
+    def close(scraper):
+        scraper.close()
+
+    return Engine(
+        create=create,
+        search=lambda scraper, network, address: scraper.search_address(f"{network}/{address}"),
+        close=close,
+    )
+
+
+def _selenium():
+    from ..scraper_selenium import SeleniumScraper
+    return Engine(
+        create=lambda site: SeleniumScraper(base_url=f"{site}/aml_risks"),
+        search=lambda scraper, network, address: scraper.search_address(f"{network}/{address}"),
+        close=lambda scraper: scraper.driver.quit(),
+    )
+
+
+def _playwright():
+    from ..scraper_playwright import PlaywrightScraper
+
+    def close(scraper):
+        scraper.browser.close()
+        scraper.playwright.stop()
+        scraper.browser = scraper.playwright = None
+
+    return Engine(
+        create=lambda site: PlaywrightScraper(base_url=site),
+        search=lambda scraper, network, address: scraper.search_address(address, coin=network),
+        close=close,
+    )
+
+
+def _http():
+    return Engine(
+        create=lambda site: HttpEngine(f"{site}/aml_risks"),
+        search=lambda engine, network, address: engine.search_address(f"{network}/{address}"),
+        close=lambda engine: engine.close(),
+    )
+
+
+# 引擎名 -> 构造 Engine 的函数（延迟导入，缺少依赖时只影响该引擎）
+ENGINES: Dict[str, Callable[[], Engine]] = {
+    'http': _http,
+    'undetected': _undetected,
+    'selenium': _selenium,
+    'playwright': _playwright,
+}
+
+
+def benchmark_addresses(count: int, seed: int = 0) -> List[str]:
+    """Deterministic ETH-format addresses"""
+    return ['0x' + hashlib.sha256(f"bench:{seed}:{i}".encode()).hexdigest()[:40] for i in range(count)]
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def _rss_mb() -> float:
+    """Resident memory of this process and its children (browsers)"""
+    try:
+        import psutil
+        process = psutil.Process()
+        return sum(p.memory_info().rss for p in [process] + process.children(recursive=True)) / 2 ** 20
+    except ImportError:
+        # ru_maxrss 是峰值（Linux 下单位为 KB）
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return (own + children) / 1024
+    except Exception:
+        return 0.0
+
+
+class _MemorySampler(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = _rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(MEMORY_SAMPLE_INTERVAL):
+            self.peak = max(self.peak, _rss_mb())
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, _rss_mb())
+
+
+def _succeeded(result: Dict[str, Any]) -> bool:
+    if not isinstance(result, dict) or "error" in result:
+        return False
+    return bool(result.get("table_data")) or str(result.get("risk_level") or 'Unknown') not in ('Unknown', 'N/A')
+
+
+def run_benchmark(engine_name: str, site_url: str, addresses: List[str], pool_size: int,
+                  network: str = 'ETH') -> Dict[str, Any]:
+    """Crawl addresses with pool_size instances of an engine in parallel and return the measurements"""
+    report: Dict[str, Any] = {"engine": engine_name, "pool_size": pool_size, "addresses": len(addresses)}
+    instances = []
+    sampler = _MemorySampler()
+    sampler.start()
+    try:
+        engine = ENGINES[engine_name]()
+        started = time.perf_counter()
+        instances = [engine.create(site_url) for _ in range(pool_size)]
+        report["startup_s"] = round(time.perf_counter() - started, 3)
+
+        # 每个工作线程固定使用一个实例（浏览器不是线程安全的）
+        free = list(instances)
+        lock = threading.Lock()
+        local = threading.local()
+
+        def crawl(address):
+            if not hasattr(local, 'instance'):
+                with lock:
+                    local.instance = free.pop()
+            begin = time.perf_counter()
+            try:
+                result = engine.search(local.instance, network, address)
+            except Exception as e:
+                result = {"error": str(e)}
+            return time.perf_counter() - begin, _succeeded(result), result.get("error")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            outcomes = list(pool.map(crawl, addresses))
+        elapsed = time.perf_counter() - started
+
+        latencies = [seconds * 1000 for seconds, _, _ in outcomes]
+        succeeded = sum(1 for _, ok, _ in outcomes if ok)
+        errors = [error for _, _, error in outcomes if error]
+        report.update({
+            "succeeded": succeeded,
+            "failed": len(outcomes) - succeeded,
+            "elapsed_s": round(elapsed, 3),
+            "addresses_per_sec": round(len(outcomes) / elapsed, 2) if elapsed else None,
+            "p50_ms": round(_percentile(latencies, 0.5), 1) if latencies else None,
+            "p95_ms": round(_percentile(latencies, 0.95), 1) if latencies else None,
+        })
+        if errors:
+            report["first_error"] = str(errors[0])[:200]
+    except Exception as e:
+        logger.error(f"Benchmark of {engine_name} (pool {pool_size}) failed: {str(e)}")
+        report["error"] = str(e)
+    finally:
+        for instance in instances:
+            try:
+                engine.close(instance)
+            except Exception as e:
+                logger.error(f"Error closing {engine_name} instance: {str(e)}")
+        report["peak_rss_mb"] = round(sampler.stop(), 1)
+    return report
+
+
+def run_matrix(engines: List[str], pool_sizes: List[int], site_url: str, count: int = 50,
+               seed: int = 0, network: str = 'ETH') -> List[Dict[str, Any]]:
+    """run_benchmark for every engine and pool size on the same addresses"""
+    addresses = benchmark_addresses(count, seed)
+    reports = []
+    for engine_name in engines:
+        for pool_size in pool_sizes:
+            report = run_benchmark(engine_name, site_url, addresses, pool_size, network)
+            logger.info(f"Benchmark result: {json.dumps(report)}")
+            reports.append(report)
+    return reports
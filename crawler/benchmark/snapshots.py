@@ -0,0 +1,148 @@
+"""
+页面快照语料库
+
+每个快照是一对文件：``{name}.html``（浏览器渲染后的 page_source）和 ``{name}.json``
+（爬虫读取到的 Nuxt 状态、来源信息和录制时生产提取器的输出 ``expected``）。
+提取器基准（extractors.py）离线读取这些文件，不需要浏览器和网络。
+
+快照有两个来源：
+
+- ``build_corpus``：由替身服务器生成，覆盖已加载、无数据、加载中、验证页几种页面，
+  仓库中的 ``corpus/`` 就是这样生成的
+- ``record_page``：设置 ``SNAPSHOT_RECORD_DIR`` 后 UndetectedScraper 把每个爬取的真实页面保存到该目录，
+  用来把线上页面结构的变化补充进语料库
+"""
+
+import os
+import re
+import json
+import logging
+from datetime import datetime, timezone
+from typing import NamedTuple, Dict, Any, List, Optional
+
+from .standin import StandinServer, CHALLENGE_PAGE, CHALLENGE_TEXT, CLEARANCE_COOKIE, nuxt_state
+from .harness import benchmark_addresses
+
+logger = logging.getLogger(__name__)
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+VARIANTS = ('loaded', 'not_found', 'loading', 'challenge')
+
+
+class Snapshot(NamedTuple):
+    name: str
+    address: str            # as passed to search_address, e.g. "ETH/0x..."
+    html: str
+    nuxt_state: Any         # what the scraper's __NUXT__ query returned
+    expected: Optional[Dict[str, Any]]
+    meta: Dict[str, Any]
+
+
+def normalize(value):
+    """Comparable form of extractor output: lists of strings sorted (several extractors dedupe through a set)"""
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [normalize(item) for item in value]
+        if all(isinstance(item, str) for item in items):
+            return sorted(items)
+        return items
+    return value
+
+
+def risk_data_from_nuxt(nuxt: Dict[str, Any]):
+    """Same lookup order as the scraper's __NUXT__ query"""
+    state = (nuxt or {}).get('state')
+    if state is None:
+        return None
+    address = state.get('address')
+    return (address or {}).get('addressInfo') or address or state
+
+
+def _file_name(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+
+
+def save_snapshot(directory: str, name: str, address: str, html: str, nuxt_state, expected=None, **meta) -> str:
+    """Write one snapshot, returns its name"""
+    name = _file_name(name)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{name}.html"), 'w', encoding='utf-8') as f:
+        f.write(html)
+    with open(os.path.join(directory, f"{name}.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            "address": address,
+            "nuxt_state": nuxt_state,
+            "expected": normalize(expected) if expected is not None else None,
+            **meta,
+        }, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write('\n')
+    return name
+
+
+def load_corpus(directory: str = CORPUS_DIR) -> List[Snapshot]:
+    """All snapshots in a directory, sorted by name"""
+    snapshots = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith('.json'):
+            continue
+        name = file_name[:-len('.json')]
+        with open(os.path.join(directory, file_name), encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, f"{name}.html"), encoding='utf-8') as f:
+            html = f.read()
+        snapshots.append(Snapshot(
+            name=name,
+            address=meta.pop('address'),
+            html=html,
+            nuxt_state=meta.pop('nuxt_state', None),
+            expected=meta.pop('expected', None),
+            meta=meta,
+        ))
+    return snapshots
+
+
+def record_page(directory: str, address: str, url: str, html: str, risk_data, result: Dict[str, Any]):
+    """Save a crawled page as a snapshot (called by UndetectedScraper when SNAPSHOT_RECORD_DIR is set)"""
+    try:
+        save_snapshot(directory, f"live_{address}", address, html, risk_data, result, url=url, source='live',
+                      recorded_at=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+    except Exception as e:
+        logger.error(f"Error recording snapshot for {address}: {str(e)}")
+
+
+def _variant_page(server: StandinServer, variant: str, network: str, address: str):
+    """(html, nuxt object) of the page the scraper would see for a stand-in variant"""
+    if variant == 'challenge':
+        html = CHALLENGE_PAGE.format(text=CHALLENGE_TEXT, cookie=CLEARANCE_COOKIE, challenge_ms=server.challenge_ms)
+        return html, None
+    server.lazy_ms = 800 if variant == 'loading' else 0
+    server.not_found_rate = 1.0 if variant == 'not_found' else 0.0
+    html = server.render(network, address)
+    nuxt = {"state": {} if variant == 'loading' else nuxt_state(server.profile(network, address))}
+    return html, nuxt
+
+
+def build_corpus(directory: str = CORPUS_DIR, per_variant: int = 3, seed: int = 0,
+                 network: str = 'ETH') -> List[str]:
+    """Generate stand-in snapshots of every variant; expected output comes from the production extractor"""
+    from ..scraper_undetected import UndetectedScraper
+
+    scraper = UndetectedScraper()
+    server = StandinServer(seed=seed)
+    names = []
+    try:
+        addresses = benchmark_addresses(per_variant * len(VARIANTS), seed)
+        for i, variant in enumerate(VARIANTS):
+            for address in addresses[i * per_variant:(i + 1) * per_variant]:
+                html, nuxt = _variant_page(server, variant, network, address)
+                risk_data = risk_data_from_nuxt(nuxt)
+                search_address = f"{network}/{address}"
+                expected = scraper.extract_result(search_address, html, risk_data)
+                names.append(save_snapshot(
+                    directory, f"standin_{variant}_{address[:10]}", search_address, html, risk_data, expected,
+                    source='standin', variant=variant, seed=seed,
+                ))
+    finally:
+        server.server_close()
+    return names
@@ -0,0 +1,260 @@
+"""
+本地 MistTrack 替身服务器
+
+用标准库 http.server 提供与 misttrack.io 结构一致的页面，离线、可复现地测试和压测爬虫：
+
+- ``/aml_risks/{network}/{address}``（主站）和 ``/address/{coin}/{address}``（light 站）：
+  Nuxt 风格页面，``window.__NUXT__`` 状态和 ``el-table__body`` 风险表格与真实页面的结构相同
+- ``latency_ms`` / ``jitter_ms``：每个页面的服务端延迟
+- ``lazy_ms``：页面先显示 ``el-loading-mask``，延迟后由脚本请求 ``/api/aml_risks/...`` 填充表格和
+  ``__NUXT__`` 状态；相关地址在滚动到底部后才加载
+- ``challenge_rate``：没有 ``cf_clearance`` cookie 的请求按比例返回 Cloudflare 风格的验证页（503），
+  脚本在 ``challenge_ms`` 后写入 cookie 并刷新
+- ``not_found_rate``：按比例返回没有风险数据的地址页
+
+每个地址的数据、延迟抖动、是否验证 / 不存在都由 ``(seed, network, address)`` 的哈希决定，多次运行结果一致。
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+RISK_LEVELS = ('Low', 'Moderate', 'High', 'Severe')
+RISK_TYPES = ('Exchange', 'Mixer', 'Gambling', 'Phishing', 'Sanctioned Entity', 'DeFi')
+LABELS = ('Binance', 'Tornado.Cash', 'OKX', 'Unknown Phishing', 'OFAC SDN', 'Uniswap')
+CHALLENGE_TEXT = "Checking if the site connection is secure"
+CLEARANCE_COOKIE = "cf_clearance=standin"
+
+
+def _fraction(*parts) -> float:
+    """Deterministic value in [0, 1) for the given parts"""
+    digest = hashlib.sha256(':'.join(str(part) for part in parts).encode()).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
+def address_profile(network: str, address: str, seed: int = 0) -> dict:
+    """Risk data served for an address"""
+    def pick(options, salt):
+        return options[int(_fraction(seed, network, address, salt) * len(options))]
+
+    level_index = int(_fraction(seed, network, address, 'level') * len(RISK_LEVELS))
+    rows = []
+    for i in range(1 + int(_fraction(seed, network, address, 'rows') * 3)):
+        rows.append({
+            "Risk Type": pick(RISK_TYPES, f'type{i}'),
+            "Address/Risk Label": pick(LABELS, f'label{i}'),
+            "Volume(USD)/%": f"${int(_fraction(seed, network, address, f'volume{i}') * 1000000):,} / "
+                             f"{_fraction(seed, network, address, f'share{i}') * 100:.2f}%",
+        })
+    related = [
+        '0x' + hashlib.sha256(f"{seed}:{address}:related{i}".encode()).hexdigest()[:40] for i in range(3)
+    ]
+    return {
+        "address": address,
+        "network": network,
+        "riskLevel": RISK_LEVELS[level_index],
+        "riskScore": 20 + level_index * 25 + int(_fraction(seed, network, address, 'score') * 20),
+        "riskType": rows[0]["Risk Type"],
+        "rows": rows,
+        "related": related,
+    }
+
+
+def table_html(rows) -> str:
+    body = ''.join(
+        '<tr class="el-table__row">' + ''.join(
+            f'<td class="el-table_1_column_{i + 1}"><div class="cell">{escape(str(value))}</div></td>'
+            for i, value in enumerate((row["Risk Type"], row["Address/Risk Label"], row["Volume(USD)/%"]))
+        ) + '</tr>'
+        for row in rows
+    )
+    if not rows:
+        body = '<tr><td colspan="3"><div class="el-table__empty-text">No Data</div></td></tr>'
+    return f'<table class="el-table__body" cellspacing="0" cellpadding="0" border="0"><tbody>{body}</tbody></table>'
+
+
+def related_html(addresses) -> str:
+    return ''.join(
+        f'<a class="related-address" data-address="{a}" href="/aml_risks/ETH/{a}">{a}</a>' for a in addresses
+    )
+
+
+def nuxt_state(profile) -> dict:
+    if profile is None:
+        return {"address": None}
+    return {"address": {"addressInfo": {
+        "address": profile["address"],
+        "riskLevel": profile["riskLevel"],
+        "riskScore": profile["riskScore"],
+        "riskType": profile["riskType"],
+    }}}
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>MistTrack - AML Risks</title></head>
+<body>
+<div id="__nuxt"><div id="__layout"><div class="container aml-risks">
+  <div class="address-info">
+    <span class="address">{address}</span>
+    <div class="risk-score">{score}</div>
+    <div class="risk-level">{level}</div>
+  </div>
+  <div class="el-table risk-table">
+    <div class="el-table__header-wrapper"><table class="el-table__header"><thead><tr>
+      <th><div class="cell">Risk Type</div></th><th><div class="cell">Address/Risk Label</div></th>
+      <th><div class="cell">Volume(USD)/%</div></th>
+    </tr></thead></table></div>
+    <div class="el-table__body-wrapper">{body}</div>
+  </div>
+  <div class="related-addresses" style="margin-top:2000px">{related}</div>
+</div></div></div>
+<script>window.__NUXT__={state};</script>
+{script}
+</body></html>
+"""
+
+LAZY_SCRIPT = """<script>
+setTimeout(function () {{
+  fetch({api}).then(function (r) {{ return r.json(); }}).then(function (d) {{
+    window.__NUXT__.state = d.state;
+    document.querySelector('.el-table__body-wrapper').innerHTML = d.table_html;
+  }});
+}}, {lazy_ms});
+window.addEventListener('scroll', function () {{
+  fetch({api}).then(function (r) {{ return r.json(); }}).then(function (d) {{
+    document.querySelector('.related-addresses').innerHTML = d.related_html;
+  }});
+}}, {{once: true}});
+</script>"""
+
+CHALLENGE_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Just a moment...</title></head>
+<body><div id="cf-wrapper"><div class="cf-challenge">
+<h1>{text}</h1><p>misttrack.io needs to review the security of your connection before proceeding.</p>
+</div></div>
+<script>setTimeout(function () {{ document.cookie = '{cookie}; path=/'; location.reload(); }}, {challenge_ms});</script>
+</body></html>
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MistTrackStandin/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        parts = [part for part in urlsplit(self.path).path.split('/') if part]
+        server.count('requests')
+
+        if len(parts) == 4 and parts[:2] == ['api', 'aml_risks']:
+            profile = server.profile(parts[2], parts[3])
+            return self._send(200, json.dumps({
+                "state": nuxt_state(profile),
+                "table_html": table_html(profile["rows"] if profile else []),
+                "related_html": related_html(profile["related"] if profile else []),
+            }), 'application/json')
+
+        if len(parts) == 3 and parts[0] in ('aml_risks', 'address'):
+            network, address = parts[1].upper(), parts[2]
+        else:
+            return self._send(404, '<h1>404</h1>')
+
+        server.delay(network, address)
+        if CLEARANCE_COOKIE not in (self.headers.get('Cookie') or '') \
+                and _fraction(server.seed, network, address, 'challenge') < server.challenge_rate:
+            server.count('challenges')
+            return self._send(503, CHALLENGE_PAGE.format(
+                text=CHALLENGE_TEXT, cookie=CLEARANCE_COOKIE, challenge_ms=server.challenge_ms
+            ))
+
+        server.count('pages')
+        self._send(200, server.render(network, address))
+
+
+class StandinServer(ThreadingHTTPServer):
+    """MistTrack stand-in; start() serves in a background thread and returns the base URL"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0, jitter_ms: float = 0,
+                 lazy_ms: int = 0, challenge_rate: float = 0.0, challenge_ms: int = 500,
+                 not_found_rate: float = 0.0, seed: int = 0):
+        super().__init__((host, port), _Handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.lazy_ms = lazy_ms
+        self.challenge_rate = challenge_rate
+        self.challenge_ms = challenge_ms
+        self.not_found_rate = not_found_rate
+        self.seed = seed
+        self.stats = {'requests': 0, 'pages': 0, 'challenges': 0}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def delay(self, network: str, address: str):
+        seconds = (self.latency_ms + self.jitter_ms * _fraction(self.seed, network, address, 'jitter')) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def profile(self, network: str, address: str):
+        """Risk data for the address, None for addresses served as not found"""
+        if _fraction(self.seed, network, address, 'missing') < self.not_found_rate:
+            return None
+        return address_profile(network.upper(), address, self.seed)
+
+    def render(self, network: str, address: str) -> str:
+        profile = self.profile(network, address)
+        lazy = self.lazy_ms > 0
+        if lazy:
+            body, related, state = '<div class="el-loading-mask"><div class="el-loading-spinner"></div></div>', '', {}
+        else:
+            rows = profile["rows"] if profile else []
+            body, related, state = table_html(rows), related_html(profile["related"] if profile else []), nuxt_state(profile)
+        script = LAZY_SCRIPT.format(api=json.dumps(f"/api/aml_risks/{network}/{address}"), lazy_ms=self.lazy_ms) if lazy else ''
+        return PAGE_TEMPLATE.format(
+            address=escape(address),
+            score=profile["riskScore"] if profile and not lazy else '',
+            level=profile["riskLevel"] if profile and not lazy else '',
+            body=body,
+            related=related,
+            state=json.dumps({"state": state}).replace('</', '<\\/'),
+            script=script,
+        )
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.serve_forever, name='misttrack-standin', daemon=True)
+        self._thread.start()
+        logger.info(f"MistTrack stand-in listening on {self.base_url}")
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,55 @@
+"""
+浏览器占用统计（跨进程）
+
+每次爬取占用浏览器时在 Redis 有序集合中登记一个槽位（分数为开始时间），结束时移除。
+进程异常退出时未释放的槽位在 ``BROWSER_SLOT_TTL`` 秒后不再计入，
+后台预取据此只使用空闲的浏览器容量。
+"""
+
+import time
+import uuid
+import logging
+from typing import Optional
+
+from .config import BROWSER_POOL_CAPACITY, BROWSER_SLOTS_KEY, BROWSER_SLOT_TTL
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def acquire_slot() -> Optional[str]:
+    """Register a browser as busy; returns the slot token (None when Redis is unavailable)"""
+    token = uuid.uuid4().hex
+    try:
+        get_redis().zadd(BROWSER_SLOTS_KEY, {token: time.time()})
+        return token
+    except Exception as e:
+        logger.error(f"Error registering browser slot: {str(e)}")
+        return None
+
+
+def release_slot(token: Optional[str]):
+    if not token:
+        return
+    try:
+        get_redis().zrem(BROWSER_SLOTS_KEY, token)
+    except Exception as e:
+        logger.error(f"Error releasing browser slot: {str(e)}")
+
+
+def busy_slots() -> int:
+    """Browsers currently in use across all workers"""
+    client = get_redis()
+    pipe = client.pipeline()
+    pipe.zremrangebyscore(BROWSER_SLOTS_KEY, '-inf', time.time() - BROWSER_SLOT_TTL)
+    pipe.zcard(BROWSER_SLOTS_KEY)
+    return pipe.execute()[1]
+
+
+def free_slots(capacity: int = BROWSER_POOL_CAPACITY) -> int:
+    """Browsers available for background work; 0 when the load cannot be determined"""
+    try:
+        return max(capacity - busy_slots(), 0)
+    except Exception as e:
+        logger.error(f"Error reading browser slots: {str(e)}")
+        return 0
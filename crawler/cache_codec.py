@@ -0,0 +1,86 @@
+"""
+缓存值编码
+
+缓存值的第一个字节是格式头，读取时按格式头选择解码方式：
+
+- ``0x01`` msgpack
+- ``0x02`` msgpack + zstd
+- ``0x03`` JSON（未安装 msgpack 时使用）
+- ``0x04`` JSON + zlib（未安装 zstandard 时的压缩格式）
+- 其他（旧数据，以 ``{`` 开头）按纯 JSON 字符串读取
+
+超过 ``CACHE_COMPRESS_THRESHOLD`` 字节的值才会压缩。
+"""
+
+import json
+import zlib
+import logging
+import threading
+from typing import Any
+
+from .config import CACHE_COMPRESS_THRESHOLD
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_MSGPACK = 0x01
+FORMAT_MSGPACK_ZSTD = 0x02
+FORMAT_JSON = 0x03
+FORMAT_JSON_ZLIB = 0x04
+
+_local = threading.local()
+
+
+def _zstd_compressor():
+    # zstandard 的压缩/解压对象不能在线程间共享
+    if not hasattr(_local, 'compressor'):
+        _local.compressor = zstandard.ZstdCompressor(level=3)
+    return _local.compressor
+
+
+def _zstd_decompressor():
+    if not hasattr(_local, 'decompressor'):
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.decompressor
+
+
+def encode(value: Any) -> bytes:
+    """Encode a cache value with a format header"""
+    if msgpack is not None:
+        payload = msgpack.packb(value, use_bin_type=True)
+        if len(payload) < CACHE_COMPRESS_THRESHOLD:
+            return bytes([FORMAT_MSGPACK]) + payload
+        if zstandard is not None:
+            return bytes([FORMAT_MSGPACK_ZSTD]) + _zstd_compressor().compress(payload)
+        payload = json.dumps(value, ensure_ascii=False).encode('utf-8')
+    else:
+        payload = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        if len(payload) < CACHE_COMPRESS_THRESHOLD:
+            return bytes([FORMAT_JSON]) + payload
+    return bytes([FORMAT_JSON_ZLIB]) + zlib.compress(payload)
+
+
+def decode(data) -> Any:
+    """Decode a cache value written by encode() or a legacy JSON string"""
+    if isinstance(data, str):
+        return json.loads(data)
+
+    header, payload = data[0], data[1:]
+    if header == FORMAT_MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    if header == FORMAT_MSGPACK_ZSTD:
+        return msgpack.unpackb(_zstd_decompressor().decompress(payload), raw=False)
+    if header == FORMAT_JSON:
+        return json.loads(payload)
+    if header == FORMAT_JSON_ZLIB:
+        return json.loads(zlib.decompress(payload))
+    return json.loads(data)
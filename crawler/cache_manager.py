@@ -1,11 +1,132 @@
-import redis
 import json
+import time
+import uuid
 import logging
-from typing import Optional, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+from . import cache_codec
+from .redis_client import get_redis, get_async_redis
+from .address_identity import identity, normalize_network
+from .tracing import annotate
+from .config import (
+    LOCAL_CACHE_MAXSIZE,
+    LOCAL_CACHE_TTL,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_BULK_CHUNK_SIZE,
+    CACHE_TTL_DEFAULT,
+    CACHE_TTL_BY_RISK_LEVEL,
+    CACHE_TTL_BY_NETWORK,
+    CACHE_HARD_TTL_MULTIPLIER,
+    CACHE_REFRESH_LOCK_TTL,
+    NEGATIVE_CACHE_TTL_BY_REASON,
+    CACHE_KEY_PREFIX,
+    CACHE_GENERATION_KEY_PREFIX,
+    CACHE_GENERATION_REFRESH,
+    CACHE_SWEEP_BATCH_SIZE,
+)
 
 logger = logging.getLogger(__name__)
 
+class LocalTTLCache:
+    """Size-bounded, thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, maxsize: int = LOCAL_CACHE_MAXSIZE, ttl: int = LOCAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class CacheEntry:
+    """
+    A cached lookup outcome with its soft expiry (wall clock) time
+
+    Negative entries carry a reason code: failed lookups keep the error,
+    not-found lookups keep the (empty) result data.
+    """
+
+    __slots__ = ('data', 'soft_expires_at', 'reason', 'error')
+
+    def __init__(self, data: Optional[Dict[str, Any]], soft_expires_at: Optional[float] = None,
+                 reason: Optional[str] = None, error: Optional[str] = None):
+        self.data = data
+        self.soft_expires_at = soft_expires_at
+        self.reason = reason
+        self.error = error
+
+    @property
+    def is_stale(self) -> bool:
+        return self.soft_expires_at is not None and time.time() >= self.soft_expires_at
+
+    @property
+    def is_negative(self) -> bool:
+        return self.reason is not None
+
+    def to_result(self) -> Dict[str, Any]:
+        """The lookup result in the service's {"success": ...} format"""
+        if self.error is not None:
+            return {"success": False, "error": self.error, "reason": self.reason}
+        return {"success": True, "data": self.data}
+
+    def to_stored(self) -> Dict[str, Any]:
+        stored = {'data': self.data, 'soft_expires_at': self.soft_expires_at}
+        if self.reason is not None:
+            stored['reason'] = self.reason
+            stored['error'] = self.error
+        return stored
+
+    @classmethod
+    def from_stored(cls, value: Any) -> 'CacheEntry':
+        # 旧格式的条目直接存的是结果本身，视为未过期
+        if isinstance(value, dict) and 'soft_expires_at' in value and 'data' in value:
+            return cls(value['data'], value['soft_expires_at'], value.get('reason'), value.get('error'))
+        return cls(value)
+
 class CacheManager:
+    """
+    两级缓存：进程内 LRU/TTL 缓存在前，Redis 在后
+
+    进程内缓存返回的是共享对象，调用方应将其视为只读。
+    条目被刷新或清除时通过 Redis pub/sub 通知其他进程丢弃本地副本。
+
+    每个条目带软过期时间（按风险等级/网络配置），Redis 键的 TTL 为硬过期时间。
+    软过期后仍返回缓存值（CacheEntry.is_stale 为 True），由调用方触发后台刷新。
+
+    键带有代数（generation）命名空间 ``misttrack:g{全局代数}.{网络代数}:{network}:{address}``，
+    清空整个缓存或某个网络只需一次 INCR，旧代数的键自然过期或由 sweep_stale_generations 清理。
+    """
     _instance = None
 
     def __new__(cls):
@@ -15,38 +136,271 @@ class CacheManager:
 
     def __init__(self):
         if not hasattr(self, 'initialized'):
+            self.local_cache = LocalTTLCache()
+            self.instance_id = uuid.uuid4().hex
+            self._stats_lock = threading.Lock()
+            self.stats = {
+                'local_hits': 0,
+                'local_misses': 0,
+                'redis_hits': 0,
+                'redis_misses': 0,
+            }
+            self._invalidation_thread = None
+            self._generations = {}
+            self._generation_lock = threading.Lock()
             try:
-                self.redis_client = redis.Redis(
-                    host='localhost',
-                    port=6379,
-                    db=0,
-                    decode_responses=True
-                )
-                self.cache_ttl = 24 * 60 * 60  # 24 hours
+                # 缓存值是带格式头的二进制数据（见 cache_codec），不做自动解码
+                self.redis_client = get_redis(decode_responses=False)
+                self.cache_ttl = CACHE_TTL_DEFAULT
                 self.initialized = True
+                self._start_invalidation_listener()
             except Exception as e:
                 logger.error(f"Failed to initialize Redis: {str(e)}")
                 self.redis_client = None
 
+    def _start_invalidation_listener(self):
+        """Subscribe to invalidation messages from other processes"""
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CACHE_INVALIDATION_CHANNEL: self._handle_invalidation})
+            self._invalidation_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception as e:
+            # 订阅失败时关闭本地缓存，避免读到其他进程已刷新的旧数据
+            logger.error(f"Failed to subscribe to cache invalidation, local cache disabled: {str(e)}")
+            self.local_cache.maxsize = 0
+
+    def _handle_invalidation(self, message):
+        try:
+            payload = json.loads(message['data'])
+            if payload.get('origin') == self.instance_id:
+                return
+            keys = payload.get('keys', [])
+            if '*' in keys:
+                self.local_cache.clear()
+                self._reset_generations()
+                return
+            for key in keys:
+                self.local_cache.delete(key)
+        except Exception as e:
+            logger.error(f"Error handling cache invalidation: {str(e)}")
+
+    def _invalidation_message(self, keys) -> str:
+        return json.dumps({'origin': self.instance_id, 'keys': list(keys)})
+
+    def _publish_invalidation(self, *keys: str):
+        try:
+            self.redis_client.publish(CACHE_INVALIDATION_CHANNEL, self._invalidation_message(keys))
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {str(e)}")
+
+    async def _apublish_invalidation(self, *keys: str):
+        try:
+            await self.async_redis.publish(CACHE_INVALIDATION_CHANNEL, self._invalidation_message(keys))
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {str(e)}")
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per cache tier"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['local_size'] = len(self.local_cache)
+        return stats
+
+    @property
+    def async_redis(self):
+        """redis.asyncio client for the running event loop, None when Redis is unavailable"""
+        return get_async_redis(decode_responses=False) if self.redis_client else None
+
+    def _generation_keys(self, network: str) -> Tuple[str, str]:
+        return f"{CACHE_GENERATION_KEY_PREFIX}:global", f"{CACHE_GENERATION_KEY_PREFIX}:{normalize_network(network).lower()}"
+
+    def _reset_generations(self):
+        with self._generation_lock:
+            self._generations.clear()
+
+    def _cached_generation(self, network: str) -> Optional[str]:
+        with self._generation_lock:
+            cached = self._generations.get(normalize_network(network))
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        return None
+
+    def _set_generation(self, network: str, global_gen, network_gen) -> str:
+        generation = f"g{int(global_gen or 0)}.{int(network_gen or 0)}"
+        with self._generation_lock:
+            self._generations[normalize_network(network)] = (generation, time.monotonic() + CACHE_GENERATION_REFRESH)
+        return generation
+
+    def get_generation(self, network: str) -> str:
+        """Current key namespace for a network, cached in process for CACHE_GENERATION_REFRESH seconds"""
+        generation = self._cached_generation(network)
+        if generation:
+            return generation
+
+        global_gen = network_gen = None
+        if self.redis_client:
+            try:
+                global_gen, network_gen = self.redis_client.mget(*self._generation_keys(network))
+            except Exception as e:
+                logger.error(f"Error loading cache generation: {str(e)}")
+        return self._set_generation(network, global_gen, network_gen)
+
+    async def aget_generation(self, network: str) -> str:
+        """Async get_generation()"""
+        generation = self._cached_generation(network)
+        if generation:
+            return generation
+
+        global_gen = network_gen = None
+        if self.redis_client:
+            try:
+                global_gen, network_gen = await self.async_redis.mget(*self._generation_keys(network))
+            except Exception as e:
+                logger.error(f"Error loading cache generation: {str(e)}")
+        return self._set_generation(network, global_gen, network_gen)
+
+    @staticmethod
+    def _format_key(generation: str, address: str, network: str) -> str:
+        # 键由规范化的 (network, address) 组成，base58 地址保留大小写
+        return f"{CACHE_KEY_PREFIX}:{generation}:{identity(address, network).key}"
+
     def get_key(self, address: str, network: str) -> str:
         """Generate cache key for address and network combination"""
-        return f"misttrack:{network.lower()}:{address.lower()}"
+        return self._format_key(self.get_generation(network), address, network)
 
-    def get_cached_result(self, address: str, network: str) -> Optional[Dict[str, Any]]:
-        """Get cached result for an address"""
-        if not self.redis_client:
+    async def aget_key(self, address: str, network: str) -> str:
+        """Async get_key()"""
+        return self._format_key(await self.aget_generation(network), address, network)
+
+    def get_ttls(self, network: str, result: Dict[str, Any]) -> Tuple[int, int]:
+        """Soft and hard TTL for a result, by risk level first, then by network"""
+        risk_level = str(result.get('risk_level') or '').strip().lower() if isinstance(result, dict) else ''
+        soft_ttl = (
+            CACHE_TTL_BY_RISK_LEVEL.get(risk_level)
+            or CACHE_TTL_BY_NETWORK.get(normalize_network(network))
+            or self.cache_ttl
+        )
+        return soft_ttl, soft_ttl * CACHE_HARD_TTL_MULTIPLIER
+
+    def _load_entry(self, key: str, cached_data) -> CacheEntry:
+        entry = CacheEntry.from_stored(cache_codec.decode(cached_data))
+        self.local_cache.set(key, entry)
+        return entry
+
+    def _get_local_entry(self, key: str) -> Optional[CacheEntry]:
+        entry = self.local_cache.get(key)
+        self._count('local_hits' if entry is not None else 'local_misses')
+        if entry is not None:
+            annotate(cache='local')
+        return entry
+
+    def _get_redis_entry(self, key: str, address: str, network: str, cached_data) -> Optional[CacheEntry]:
+        if not cached_data:
+            self._count('redis_misses')
+            annotate(cache='miss')
             return None
+        self._count('redis_hits')
+        annotate(cache='redis')
+        logger.info(f"Cache hit for {address} on {network}")
+        return self._load_entry(key, cached_data)
+
+    def get_cached_entry(self, address: str, network: str) -> Optional[CacheEntry]:
+        """Get the cached entry (result plus freshness) for an address"""
+        key = self.get_key(address, network)
+        entry = self._get_local_entry(key)
+        if entry is not None or not self.redis_client:
+            return entry
 
         try:
-            key = self.get_key(address, network)
-            cached_data = self.redis_client.get(key)
-            if cached_data:
-                logger.info(f"Cache hit for {address} on {network}")
-                return json.loads(cached_data)
+            return self._get_redis_entry(key, address, network, self.redis_client.get(key))
+        except Exception as e:
+            logger.error(f"Error getting cached result: {str(e)}")
+        return None
+
+    async def aget_cached_entry(self, address: str, network: str) -> Optional[CacheEntry]:
+        """Async get_cached_entry(), does not block the event loop"""
+        key = await self.aget_key(address, network)
+        entry = self._get_local_entry(key)
+        if entry is not None or not self.redis_client:
+            return entry
+
+        try:
+            return self._get_redis_entry(key, address, network, await self.async_redis.get(key))
         except Exception as e:
             logger.error(f"Error getting cached result: {str(e)}")
         return None
 
+    def get_cached_result(self, address: str, network: str) -> Optional[Dict[str, Any]]:
+        """Get cached result for an address, stale or not"""
+        entry = self.get_cached_entry(address, network)
+        return entry.data if entry else None
+
+    def _split_local(self, addresses: List[str], generation: str, network: str) -> Tuple[Dict[str, CacheEntry], Dict[str, str]]:
+        """Resolve addresses from the local tier; returns (found, {key: address} still missing)"""
+        found = {}
+        missing = {}
+        for address in addresses:
+            key = self._format_key(generation, address, network)
+            entry = self._get_local_entry(key)
+            if entry is not None:
+                found[address] = entry
+            else:
+                missing[key] = address
+        return found, missing
+
+    def _load_chunk(self, found: Dict[str, CacheEntry], missing: Dict[str, str], chunk: List[str], values: list):
+        for key, cached_data in zip(chunk, values):
+            if not cached_data:
+                self._count('redis_misses')
+                continue
+            self._count('redis_hits')
+            found[missing[key]] = self._load_entry(key, cached_data)
+
+    def get_cached_entries(self, addresses: List[str], network: str) -> Dict[str, CacheEntry]:
+        """Resolve cached entries for many addresses, using one MGET per chunk for local misses"""
+        found, missing = self._split_local(addresses, self.get_generation(network), network)
+        if not missing or not self.redis_client:
+            return found
+
+        keys = list(missing)
+        try:
+            for i in range(0, len(keys), CACHE_BULK_CHUNK_SIZE):
+                chunk = keys[i:i + CACHE_BULK_CHUNK_SIZE]
+                self._load_chunk(found, missing, chunk, self.redis_client.mget(chunk))
+            logger.info(f"Bulk cache lookup on {network}: {len(found)}/{len(addresses)} hits")
+        except Exception as e:
+            logger.error(f"Error getting cached results: {str(e)}")
+        return found
+
+    async def aget_cached_entries(self, addresses: List[str], network: str) -> Dict[str, CacheEntry]:
+        """Async get_cached_entries()"""
+        found, missing = self._split_local(addresses, await self.aget_generation(network), network)
+        if not missing or not self.redis_client:
+            return found
+
+        keys = list(missing)
+        try:
+            client = self.async_redis
+            for i in range(0, len(keys), CACHE_BULK_CHUNK_SIZE):
+                chunk = keys[i:i + CACHE_BULK_CHUNK_SIZE]
+                self._load_chunk(found, missing, chunk, await client.mget(chunk))
+            logger.info(f"Bulk cache lookup on {network}: {len(found)}/{len(addresses)} hits")
+        except Exception as e:
+            logger.error(f"Error getting cached results: {str(e)}")
+        return found
+
+    def get_cached_results(self, addresses: List[str], network: str) -> Dict[str, Dict[str, Any]]:
+        """Resolve cached results for many addresses, stale or not"""
+        return {address: entry.data for address, entry in self.get_cached_entries(addresses, network).items()}
+
+    def _build_entry(self, network: str, result: Dict[str, Any]) -> Tuple[CacheEntry, int]:
+        soft_ttl, hard_ttl = self.get_ttls(network, result)
+        return CacheEntry(result, time.time() + soft_ttl), hard_ttl
+
     def cache_result(self, address: str, network: str, result: Dict[str, Any]):
         """Cache result for an address"""
         if not self.redis_client:
@@ -54,17 +408,183 @@ class CacheManager:
 
         try:
             key = self.get_key(address, network)
+            entry, hard_ttl = self._build_entry(network, result)
             self.redis_client.setex(
                 key,
-                self.cache_ttl,
-                json.dumps(result)
+                hard_ttl,
+                cache_codec.encode(entry.to_stored())
             )
+            self.local_cache.set(key, entry)
+            self._publish_invalidation(key)
             logger.info(f"Cached result for {address} on {network}")
         except Exception as e:
             logger.error(f"Error caching result: {str(e)}")
 
+    def _positive_items(self, results: Dict[str, Dict[str, Any]], generation: str, network: str) -> list:
+        return [(self._format_key(generation, address, network), *self._build_entry(network, result))
+                for address, result in results.items()]
+
+    @staticmethod
+    def _queue_positive(pipe, chunk: list):
+        for key, entry, hard_ttl in chunk:
+            pipe.setex(key, hard_ttl, cache_codec.encode(entry.to_stored()))
+
+    def _positive_written(self, chunk: list) -> List[str]:
+        for key, entry, _ in chunk:
+            self.local_cache.set(key, entry)
+        return [key for key, _, _ in chunk]
+
+    def _negative_items(self, results: Dict[str, Tuple[str, Dict[str, Any]]], generation: str, network: str) -> list:
+        items = []
+        for address, (reason, result) in results.items():
+            entry = CacheEntry(result.get("data"), None, reason, result.get("error"))
+            ttl = NEGATIVE_CACHE_TTL_BY_REASON.get(reason, min(NEGATIVE_CACHE_TTL_BY_REASON.values()))
+            items.append((self._format_key(generation, address, network), entry, ttl))
+        return items
+
+    @staticmethod
+    def _queue_negative(pipe, chunk: list):
+        for key, entry, ttl in chunk:
+            pipe.set(key, cache_codec.encode(entry.to_stored()), nx=True, ex=ttl)
+
+    def _negative_written(self, chunk: list, written: list):
+        for (key, entry, _), ok in zip(chunk, written):
+            if ok:
+                self.local_cache.set(key, entry)
+
+    def cache_results(self, results: Dict[str, Dict[str, Any]], network: str):
+        """Cache results for many addresses, written back in pipelined chunks"""
+        if not self.redis_client or not results:
+            return
+
+        items = self._positive_items(results, self.get_generation(network), network)
+        try:
+            for i in range(0, len(items), CACHE_BULK_CHUNK_SIZE):
+                chunk = items[i:i + CACHE_BULK_CHUNK_SIZE]
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_positive(pipe, chunk)
+                pipe.execute()
+                self._publish_invalidation(*self._positive_written(chunk))
+            logger.info(f"Cached {len(items)} results on {network}")
+        except Exception as e:
+            logger.error(f"Error caching results: {str(e)}")
+
+    async def acache_results(self, results: Dict[str, Dict[str, Any]], network: str):
+        """Async cache_results()"""
+        if not self.redis_client or not results:
+            return
+
+        items = self._positive_items(results, await self.aget_generation(network), network)
+        try:
+            client = self.async_redis
+            for i in range(0, len(items), CACHE_BULK_CHUNK_SIZE):
+                chunk = items[i:i + CACHE_BULK_CHUNK_SIZE]
+                async with client.pipeline(transaction=False) as pipe:
+                    self._queue_positive(pipe, chunk)
+                    await pipe.execute()
+                await self._apublish_invalidation(*self._positive_written(chunk))
+            logger.info(f"Cached {len(items)} results on {network}")
+        except Exception as e:
+            logger.error(f"Error caching results: {str(e)}")
+
+    def cache_negative_results(self, results: Dict[str, Tuple[str, Dict[str, Any]]], network: str):
+        """
+        Cache (reason, result) outcomes that should only live briefly, in pipelined chunks
+
+        Written with SET NX so a negative entry never replaces a real result.
+        """
+        if not self.redis_client or not results:
+            return
+
+        items = self._negative_items(results, self.get_generation(network), network)
+        try:
+            for i in range(0, len(items), CACHE_BULK_CHUNK_SIZE):
+                chunk = items[i:i + CACHE_BULK_CHUNK_SIZE]
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_negative(pipe, chunk)
+                self._negative_written(chunk, pipe.execute())
+            logger.info(f"Negative-cached {len(items)} results on {network}")
+        except Exception as e:
+            logger.error(f"Error caching negative results: {str(e)}")
+
+    async def acache_negative_results(self, results: Dict[str, Tuple[str, Dict[str, Any]]], network: str):
+        """Async cache_negative_results()"""
+        if not self.redis_client or not results:
+            return
+
+        items = self._negative_items(results, await self.aget_generation(network), network)
+        try:
+            client = self.async_redis
+            for i in range(0, len(items), CACHE_BULK_CHUNK_SIZE):
+                chunk = items[i:i + CACHE_BULK_CHUNK_SIZE]
+                async with client.pipeline(transaction=False) as pipe:
+                    self._queue_negative(pipe, chunk)
+                    self._negative_written(chunk, await pipe.execute())
+            logger.info(f"Negative-cached {len(items)} results on {network}")
+        except Exception as e:
+            logger.error(f"Error caching negative results: {str(e)}")
+
+    def acquire_refresh_lock(self, address: str, network: str) -> bool:
+        """Claim the background refresh of an entry; False if one is already running"""
+        if not self.redis_client:
+            return False
+        try:
+            return bool(self.redis_client.set(
+                f"misttrack_refresh:{self.get_key(address, network)}", 1,
+                nx=True, ex=CACHE_REFRESH_LOCK_TTL
+            ))
+        except Exception as e:
+            logger.error(f"Error acquiring refresh lock: {str(e)}")
+            return False
+
+    def _refresh_lock_keys(self, generation: str, addresses: List[str], network: str) -> List[str]:
+        return [f"misttrack_refresh:{self._format_key(generation, address, network)}" for address in addresses]
+
+    def acquire_refresh_locks(self, addresses: List[str], network: str) -> List[str]:
+        """Claim the background refresh of many entries in one pipeline; returns the addresses claimed"""
+        if not self.redis_client or not addresses:
+            return []
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in self._refresh_lock_keys(self.get_generation(network), addresses, network):
+                pipe.set(key, 1, nx=True, ex=CACHE_REFRESH_LOCK_TTL)
+            return [address for address, acquired in zip(addresses, pipe.execute()) if acquired]
+        except Exception as e:
+            logger.error(f"Error acquiring refresh locks: {str(e)}")
+            return []
+
+    async def aacquire_refresh_locks(self, addresses: List[str], network: str) -> List[str]:
+        """Async acquire_refresh_locks()"""
+        if not self.redis_client or not addresses:
+            return []
+        try:
+            keys = self._refresh_lock_keys(await self.aget_generation(network), addresses, network)
+            async with self.async_redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.set(key, 1, nx=True, ex=CACHE_REFRESH_LOCK_TTL)
+                replies = await pipe.execute()
+            return [address for address, acquired in zip(addresses, replies) if acquired]
+        except Exception as e:
+            logger.error(f"Error acquiring refresh locks: {str(e)}")
+            return []
+
+    def release_refresh_lock(self, address: str, network: str):
+        self.release_refresh_locks([address], network)
+
+    def release_refresh_locks(self, addresses: List[str], network: str):
+        if not self.redis_client or not addresses:
+            return
+        try:
+            self.redis_client.delete(*self._refresh_lock_keys(self.get_generation(network), addresses, network))
+        except Exception as e:
+            logger.error(f"Error releasing refresh locks: {str(e)}")
+
     def clear_cache(self, address: str = None, network: str = None):
-        """Clear cache for specific address or all addresses"""
+        """
+        Clear cache for a specific address, a whole network or all addresses
+
+        Network and full clears bump a generation counter (one INCR) instead of deleting keys.
+        """
         if not self.redis_client:
             return
 
@@ -72,12 +592,38 @@ class CacheManager:
             if address and network:
                 key = self.get_key(address, network)
                 self.redis_client.delete(key)
+                self.local_cache.delete(key)
+                self._publish_invalidation(key)
                 logger.info(f"Cleared cache for {address} on {network}")
-            else:
-                pattern = "misttrack:*"
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    self.redis_client.delete(*keys)
-                    logger.info("Cleared all cache")
+                return
+
+            global_key, network_key = self._generation_keys(network or '')
+            self.redis_client.incr(network_key if network else global_key)
+            self.local_cache.clear()
+            self._reset_generations()
+            self._publish_invalidation('*')
+            logger.info(f"Cleared cache for {network}" if network else "Cleared all cache")
         except Exception as e:
             logger.error(f"Error clearing cache: {str(e)}")
+
+    def sweep_stale_generations(self, batch_size: int = CACHE_SWEEP_BATCH_SIZE) -> int:
+        """Delete keys left behind by earlier generations using SCAN + UNLINK; returns the number removed"""
+        if not self.redis_client:
+            return 0
+
+        self._reset_generations()
+        removed = 0
+        stale = []
+        for key in self.redis_client.scan_iter(match=f"{CACHE_KEY_PREFIX}:*", count=batch_size):
+            parts = key.decode().split(':', 3)
+            # 没有代数段的旧格式键也一并清理
+            if len(parts) != 4 or parts[1] != self.get_generation(parts[2]):
+                stale.append(key)
+            if len(stale) >= batch_size:
+                removed += self.redis_client.unlink(*stale)
+                stale = []
+        if stale:
+            removed += self.redis_client.unlink(*stale)
+
+        logger.info(f"Swept {removed} stale cache keys")
+        return removed
@@ -0,0 +1,137 @@
+"""
+缓存快照（导出 / 导入）
+
+快照是 gzip 压缩的二进制文件：文件头 ``MAGIC``，之后每条记录为
+
+    >H 键长度 | 键 | >q 过期时间（毫秒时间戳，0 表示不过期）| >I 数据长度 | DUMP 数据
+
+只导出当前代数的 ``misttrack:*`` 条目，键中不保存代数；导入时写入目标 Redis 当前的代数，
+所以导入后无需调整代数计数。DUMP 数据与 Redis 版本相关，只能导入到相同或更新版本的 Redis。
+"""
+
+import gzip
+import time
+import struct
+import logging
+from typing import Iterator, Tuple, Dict, Any
+
+from .cache_manager import CacheManager
+from .config import CACHE_KEY_PREFIX, CACHE_SWEEP_BATCH_SIZE
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MISTTRACK-CACHE-SNAPSHOT\x01"
+_KEY_LEN = struct.Struct('>H')
+_RECORD_HEAD = struct.Struct('>qI')
+
+
+def _strip_generation(key: bytes, cache_manager: CacheManager):
+    """'misttrack:{gen}:{network}:{address}' -> 'network:address' for current-generation keys, else None"""
+    parts = key.decode().split(':', 3)
+    if len(parts) != 4 or parts[1] != cache_manager.get_generation(parts[2]):
+        return None
+    return f"{parts[2]}:{parts[3]}"
+
+
+def export_snapshot(path: str, batch_size: int = CACHE_SWEEP_BATCH_SIZE) -> Dict[str, Any]:
+    """Stream current cache entries with their expiry to a compressed file"""
+    client = get_redis(decode_responses=False)
+    cache_manager = CacheManager()
+    cache_manager._reset_generations()
+    stats = {'written': 0, 'skipped': 0}
+
+    def flush(batch, out):
+        pipe = client.pipeline(transaction=False)
+        for key, _ in batch:
+            pipe.pttl(key)
+            pipe.dump(key)
+        replies = pipe.execute()
+        now_ms = int(time.time() * 1000)
+        for (_, name), pttl, payload in zip(batch, replies[::2], replies[1::2]):
+            # 扫描之后已过期或被删除的键
+            if payload is None or pttl == -2:
+                stats['skipped'] += 1
+                continue
+            name = name.encode()
+            out.write(_KEY_LEN.pack(len(name)) + name)
+            out.write(_RECORD_HEAD.pack(now_ms + pttl if pttl > 0 else 0, len(payload)) + payload)
+            stats['written'] += 1
+
+    with gzip.open(path, 'wb') as out:
+        out.write(MAGIC)
+        batch = []
+        for key in client.scan_iter(match=f"{CACHE_KEY_PREFIX}:*", count=batch_size):
+            name = _strip_generation(key, cache_manager)
+            if name is None:
+                stats['skipped'] += 1
+                continue
+            batch.append((key, name))
+            if len(batch) >= batch_size:
+                flush(batch, out)
+                batch = []
+        if batch:
+            flush(batch, out)
+
+    logger.info(f"Exported {stats['written']} cache entries to {path}")
+    return stats
+
+
+def read_snapshot(path: str) -> Iterator[Tuple[str, int, bytes]]:
+    """Yield (network:address, expire_at_ms, dump payload) records"""
+    with gzip.open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a cache snapshot")
+        while True:
+            head = f.read(_KEY_LEN.size)
+            if not head:
+                return
+            name = f.read(_KEY_LEN.unpack(head)[0]).decode()
+            expire_at, size = _RECORD_HEAD.unpack(f.read(_RECORD_HEAD.size))
+            yield name, expire_at, f.read(size)
+
+
+def import_snapshot(path: str, replace: bool = False, batch_size: int = CACHE_SWEEP_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Load a snapshot into the current cache generation in pipelined batches
+
+    Entries that expired since the export are skipped; existing keys are kept unless replace=True.
+    """
+    client = get_redis(decode_responses=False)
+    cache_manager = CacheManager()
+    cache_manager._reset_generations()
+    stats = {'restored': 0, 'expired': 0, 'existing': 0, 'failed': 0}
+
+    def flush(batch):
+        pipe = client.pipeline(transaction=False)
+        now_ms = int(time.time() * 1000)
+        for key, expire_at, payload in batch:
+            pipe.restore(key, max(expire_at - now_ms, 1) if expire_at else 0, payload, replace=replace)
+        for reply in pipe.execute(raise_on_error=False):
+            if not isinstance(reply, Exception):
+                stats['restored'] += 1
+            elif 'BUSYKEY' in str(reply):
+                stats['existing'] += 1
+            else:
+                stats['failed'] += 1
+                logger.error(f"Error restoring cache entry: {str(reply)}")
+
+    batch = []
+    for name, expire_at, payload in read_snapshot(path):
+        if expire_at and expire_at <= time.time() * 1000:
+            stats['expired'] += 1
+            continue
+        network, address = name.split(':', 1)
+        batch.append((cache_manager.get_key(address, network), expire_at, payload))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    # 本进程和其他进程的本地缓存可能持有被替换的条目
+    if replace:
+        cache_manager.local_cache.clear()
+        cache_manager._publish_invalidation('*')
+    logger.info(f"Imported {stats['restored']} cache entries from {path}")
+    return stats
@@ -0,0 +1,391 @@
+"""
+分片上传（可续传）
+
+超过 ``MAX_FILE_SIZE`` 的地址文件按分片上传，单个文件最大 ``CHUNKED_UPLOAD_MAX_SIZE``：
+
+1. init：登记文件名、总大小和网络，返回 ``upload_id`` 和建议的分片大小
+2. part：按序号（从 0 开始）依次上传分片，边接收边以追加方式写入磁盘文件，
+   同时计算 SHA-256；客户端提供的校验和不一致时丢弃该分片
+3. complete：总字节数与 init 时登记的大小一致后标记完成
+
+会话状态保存在 Redis（``UPLOAD_KEY_PREFIX:{upload_id}``），每个分片的校验和按序号保存在列表中。
+断线后客户端查询会话状态，从 ``next_part`` 继续上传；重传已接收的分片（校验和相同）直接返回成功，
+写到一半中断的分片在下次写入前被截掉。
+会话被取消（aborted）或处理失败（failed，例如文件格式错误）后数据即被删除，之后的分片请求返回 410 和原因。
+
+读取端（UploadReader）只读取已确认的字节，数据不够时等待后续分片，因此可以在上传过程中就开始处理：
+CSV 边传边爬，Excel（zip 格式需要读取文件末尾的目录）等到上传完成后再读取。
+读取和写入需要访问同一个 ``UPLOAD_DIR``（同一台机器或共享存储）。
+"""
+
+import io
+import os
+import re
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterable
+
+from .config import (
+    UPLOAD_DIR,
+    ALLOWED_FILE_TYPES,
+    CHUNKED_UPLOAD_MAX_SIZE,
+    UPLOAD_PART_SIZE,
+    UPLOAD_MAX_PART_SIZE,
+    UPLOAD_KEY_PREFIX,
+    UPLOAD_SESSION_TTL,
+    UPLOAD_LOCK_TTL,
+    UPLOAD_POLL_INTERVAL,
+    UPLOAD_STALL_TIMEOUT,
+    UPLOAD_ORPHAN_GRACE,
+)
+from .address_identity import normalize_network
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+UPLOADING = 'uploading'
+COMPLETE = 'complete'
+ABORTED = 'aborted'
+FAILED = 'failed'
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(ValueError):
+    """The request does not fit the upload session"""
+
+
+class UploadConflict(UploadError):
+    """The part is out of order or the session is not accepting parts"""
+
+
+class UploadGone(UploadConflict):
+    """The session was aborted or its processing failed; its data has been removed"""
+
+
+class ChunkedUpload:
+    """A resumable upload session: state in Redis, data appended to a file under UPLOAD_DIR"""
+
+    def __init__(self, upload_id: str, state: Dict[str, str]):
+        self.upload_id = upload_id
+        self.key = f"{UPLOAD_KEY_PREFIX}:{upload_id}"
+        self.parts_key = f"{self.key}:parts"
+        self.lock_key = f"{self.key}:lock"
+        self.directory = os.path.join(UPLOAD_DIR, 'chunked', upload_id)
+        self.path = os.path.join(self.directory, 'data')
+        self.state = state
+
+    @classmethod
+    def create(cls, filename: str, size: int, network: Optional[str] = None,
+               part_size: Optional[int] = None, **extra) -> 'ChunkedUpload':
+        """Register a new upload; extra fields (e.g. task_id) are stored with the session"""
+        filename = os.path.basename(str(filename or '').strip())
+        if not filename.lower().endswith(ALLOWED_FILE_TYPES):
+            raise UploadError(f"Only {', '.join(ALLOWED_FILE_TYPES)} files are allowed")
+        if size <= 0:
+            raise UploadError("size must be a positive number of bytes")
+        if size > CHUNKED_UPLOAD_MAX_SIZE:
+            raise UploadError(f"File size exceeds {CHUNKED_UPLOAD_MAX_SIZE} bytes")
+        part_size = min(part_size or UPLOAD_PART_SIZE, UPLOAD_MAX_PART_SIZE)
+
+        upload = cls(uuid.uuid4().hex, {})
+        os.makedirs(upload.directory, exist_ok=True)
+        open(upload.path, 'wb').close()
+
+        upload.state = {
+            'filename': filename,
+            'size': str(size),
+            'network': normalize_network(network),
+            'part_size': str(part_size),
+            'received': '0',
+            'parts': '0',
+            'status': UPLOADING,
+            'created_at': str(time.time()),
+            **{name: str(value) for name, value in extra.items()},
+        }
+        pipe = get_redis().pipeline()
+        pipe.hset(upload.key, mapping=upload.state)
+        pipe.expire(upload.key, UPLOAD_SESSION_TTL)
+        pipe.execute()
+        logger.info(f"Started chunked upload {upload.upload_id} for {filename} ({size} bytes)")
+        return upload
+
+    @classmethod
+    def load(cls, upload_id: str) -> Optional['ChunkedUpload']:
+        """The session for upload_id, None when unknown or expired"""
+        if not _UPLOAD_ID.match(str(upload_id or '')):
+            return None
+        upload = cls(upload_id, {})
+        upload.state = get_redis().hgetall(upload.key)
+        return upload if upload.state else None
+
+    def refresh(self) -> Dict[str, str]:
+        self.state = get_redis().hgetall(self.key) or self.state
+        return self.state
+
+    @property
+    def size(self) -> int:
+        return int(self.state['size'])
+
+    @property
+    def received(self) -> int:
+        return int(self.state['received'])
+
+    @property
+    def parts(self) -> int:
+        return int(self.state['parts'])
+
+    @property
+    def status(self) -> str:
+        return self.state['status']
+
+    @property
+    def network(self) -> str:
+        return self.state['network']
+
+    def describe(self) -> Dict[str, Any]:
+        """Session status as returned to clients; resume from next_part"""
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.state['filename'],
+            "network": self.network,
+            "status": self.status,
+            "size": self.size,
+            "received": self.received,
+            "part_size": int(self.state['part_size']),
+            "next_part": self.parts,
+            "checksums": get_redis().lrange(self.parts_key, 0, -1),
+            "task_id": self.state.get('task_id'),
+            "error": self.state.get('error'),
+        }
+
+    def _check_active(self):
+        """Raise UploadGone once the session was aborted or failed"""
+        if self.status == ABORTED:
+            raise UploadGone("Upload was aborted")
+        if self.status == FAILED:
+            raise UploadGone(f"Upload failed: {self.state.get('error') or 'processing error'}")
+
+    @contextmanager
+    def _lock(self):
+        client = get_redis()
+        if not client.set(self.lock_key, 1, nx=True, ex=UPLOAD_LOCK_TTL):
+            raise UploadConflict("Another part of this upload is being written")
+        try:
+            yield
+        finally:
+            client.delete(self.lock_key)
+
+    def write_part(self, index: int, blocks: Iterable[bytes], checksum: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Append part ``index`` (streamed as blocks) and record its SHA-256
+
+        Parts must arrive in order; a part that was already received is acknowledged
+        again when its checksum matches, so a client can safely retry after a dropped response.
+        """
+        checksum = (checksum or '').strip().lower() or None
+        if checksum and not _SHA256.match(checksum):
+            raise UploadError("checksum must be a hex SHA-256 digest")
+
+        with self._lock():
+            self.refresh()
+            self._check_active()
+            if index < self.parts:
+                stored = get_redis().lindex(self.parts_key, index)
+                digest = checksum or _digest(blocks)
+                if digest != stored:
+                    raise UploadConflict(f"Part {index} was already received with a different checksum")
+                return self.describe()
+            if self.status != UPLOADING:
+                raise UploadConflict(f"Upload is {self.status}")
+            if index > self.parts:
+                raise UploadConflict(f"Expected part {self.parts}")
+
+            received = self.received
+            digest = hashlib.sha256()
+            written = 0
+            try:
+                f = open(self.path, 'ab')
+            except FileNotFoundError:
+                # 处理任务在本次请求检查状态之后失败并删除了数据
+                self.refresh()
+                self._check_active()
+                raise UploadGone("Upload data was removed")
+            with f:
+                # 丢弃上次写到一半中断的分片
+                if f.tell() != received:
+                    f.truncate(received)
+                try:
+                    for block in blocks:
+                        written += len(block)
+                        if written > UPLOAD_MAX_PART_SIZE or received + written > self.size:
+                            raise UploadError("Part exceeds the part size limit or the declared file size")
+                        digest.update(block)
+                        f.write(block)
+                    if not written:
+                        raise UploadError("Empty part")
+                    if checksum and digest.hexdigest() != checksum:
+                        raise UploadError(f"Checksum mismatch for part {index}")
+                    f.flush()
+                    os.fsync(f.fileno())
+                except Exception:
+                    f.truncate(received)
+                    raise
+
+            pipe = get_redis().pipeline()
+            pipe.rpush(self.parts_key, digest.hexdigest())
+            pipe.hset(self.key, mapping={'received': received + written, 'parts': index + 1})
+            pipe.expire(self.key, UPLOAD_SESSION_TTL)
+            pipe.expire(self.parts_key, UPLOAD_SESSION_TTL)
+            pipe.execute()
+            self.refresh()
+            return self.describe()
+
+    def complete(self) -> Dict[str, Any]:
+        """Mark the upload finished once all declared bytes are received"""
+        with self._lock():
+            self.refresh()
+            self._check_active()
+            if self.received != self.size:
+                raise UploadConflict(f"Received {self.received} of {self.size} bytes")
+            get_redis().hset(self.key, 'status', COMPLETE)
+            self.refresh()
+        logger.info(f"Completed chunked upload {self.upload_id} ({self.size} bytes, {self.parts} parts)")
+        return self.describe()
+
+    def abort(self):
+        """Stop the upload; a reader waiting for parts fails and the data is removed"""
+        get_redis().hset(self.key, 'status', ABORTED)
+        self.refresh()
+        self.discard_data()
+
+    def fail(self, reason: str):
+        """Record that processing failed so further parts are refused with the reason (call before discard_data)"""
+        if self.refresh().get('status') == ABORTED:
+            return
+        get_redis().hset(self.key, mapping={'status': FAILED, 'error': reason})
+        self.refresh()
+
+    def claim_start(self) -> bool:
+        """Mark processing as started; False if it was already started (by init or a repeated complete)"""
+        return bool(get_redis().hsetnx(self.key, 'started', 1))
+
+    def release_start(self):
+        get_redis().hdel(self.key, 'started')
+
+    def discard_data(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @classmethod
+    def sweep_orphaned_data(cls, grace: float = UPLOAD_ORPHAN_GRACE) -> int:
+        """Remove upload directories whose session expired; returns how many were removed"""
+        root = os.path.join(UPLOAD_DIR, 'chunked')
+        try:
+            names = [name for name in os.listdir(root) if _UPLOAD_ID.match(name)]
+        except FileNotFoundError:
+            return 0
+        if not names:
+            return 0
+
+        pipe = get_redis().pipeline(transaction=False)
+        for name in names:
+            pipe.exists(f"{UPLOAD_KEY_PREFIX}:{name}")
+        cutoff = time.time() - grace
+        removed = 0
+        for name, exists in zip(names, pipe.execute()):
+            upload = cls(name, {})
+            try:
+                # create() 先建目录再写会话，刚创建的目录跳过
+                if exists or os.path.getmtime(upload.directory) > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            upload.discard_data()
+            removed += 1
+        if removed:
+            logger.info(f"Removed data of {removed} expired chunked uploads")
+        return removed
+
+    def open_reader(self, poll_interval: float = UPLOAD_POLL_INTERVAL,
+                    stall_timeout: float = UPLOAD_STALL_TIMEOUT) -> io.BufferedReader:
+        """Binary file object over the uploaded data that waits for parts still being uploaded"""
+        return io.BufferedReader(UploadReader(self, poll_interval, stall_timeout))
+
+
+def _digest(blocks: Iterable[bytes]) -> str:
+    digest = hashlib.sha256()
+    for block in blocks:
+        digest.update(block)
+    return digest.hexdigest()
+
+
+class UploadReader(io.RawIOBase):
+    """Reads the committed bytes of an upload, blocking until more parts arrive or the upload completes"""
+
+    def __init__(self, upload: ChunkedUpload, poll_interval: float, stall_timeout: float):
+        super().__init__()
+        self.upload = upload
+        self.poll_interval = poll_interval
+        self.stall_timeout = stall_timeout
+        self._file = open(upload.path, 'rb')
+        self._pos = 0
+        self._last_progress = time.monotonic()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def _finished(self) -> bool:
+        return self.upload.status == COMPLETE
+
+    def _wait(self):
+        """Block until the committed size grows or the upload completes"""
+        received = self.upload.received
+        while True:
+            self.upload.refresh()
+            if self.upload.status in (ABORTED, FAILED):
+                raise UploadError(f"Upload was {self.upload.status}")
+            if self.upload.received > received or self._finished():
+                self._last_progress = time.monotonic()
+                return
+            if time.monotonic() - self._last_progress > self.stall_timeout:
+                raise UploadError(f"No data received for {self.stall_timeout} seconds")
+            time.sleep(self.poll_interval)
+
+    def readinto(self, buffer) -> int:
+        while True:
+            available = self.upload.received - self._pos
+            if available > 0:
+                self._file.seek(self._pos)
+                count = self._file.readinto(memoryview(buffer)[:min(len(buffer), available)])
+                self._pos += count
+                return count
+            if self._finished():
+                return 0
+            self._wait()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_END:
+            # 文件末尾只有上传完成后才确定
+            while not self._finished():
+                self._wait()
+            offset += self.upload.received
+        elif whence == io.SEEK_CUR:
+            offset += self._pos
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
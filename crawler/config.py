@@ -3,8 +3,9 @@
 import os
 from typing import Dict, Any
 
-# Base URLs
-MISTTRACK_BASE_URL = "https://misttrack.io/aml_risks"
+# Base URLs (override to point the scrapers at the local stand-in server, see crawler/benchmark)
+MISTTRACK_BASE_URL = os.getenv('MISTTRACK_BASE_URL', "https://misttrack.io/aml_risks")
+MISTTRACK_LIGHT_URL = os.getenv('MISTTRACK_LIGHT_URL', "https://light.misttrack.io")
 
 # HTTP Settings
 HTTP_HEADERS = {
@@ -27,9 +28,112 @@ SCRAPER_CONFIG: Dict[str, Any] = {
 UPLOAD_DIR = 'uploads'
 ALLOWED_FILE_TYPES = ('.csv', '.xls', '.xlsx')
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+INGEST_SNIFF_BYTES = 64 * 1024  # prefix used to detect encoding and delimiter
+INGEST_CHUNK_SIZE = 5000  # addresses per chunk handed to the crawl pipeline
+INGEST_ADDRESS_COLUMN = 'address'
+
+# Chunked Upload Settings
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024))  # 2GB
+UPLOAD_PART_SIZE = 8 * 1024 * 1024  # part size suggested to clients
+UPLOAD_MAX_PART_SIZE = 64 * 1024 * 1024
+UPLOAD_KEY_PREFIX = "crawler_upload"
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # unfinished uploads expire after 24 hours
+UPLOAD_LOCK_TTL = 5 * 60  # a part write holds the session lock at most this long
+UPLOAD_POLL_INTERVAL = 1.0  # seconds between checks for new parts while ingesting
+UPLOAD_STALL_TIMEOUT = 30 * 60  # ingestion gives up when no part arrives for this long
+UPLOAD_ORPHAN_GRACE = 60 * 60  # sweep_uploads keeps session-less upload directories younger than this
+
+# Dedupe Settings
+DEDUPE_EXACT_LIMIT = int(os.getenv('DEDUPE_EXACT_LIMIT', 200000))  # addresses per job kept in an exact set
+DEDUPE_BLOOM_CAPACITY = int(os.getenv('DEDUPE_BLOOM_CAPACITY', 10000000))  # Bloom filter sizing
+DEDUPE_BLOOM_ERROR_RATE = 0.001
+DEDUPE_SHARED = os.getenv('DEDUPE_SHARED', '').lower() in ('1', 'true', 'yes')  # share a Redis filter across jobs
+DEDUPE_SEEN_KEY = "misttrack_seen"
+DEDUPE_WINDOW = 6 * 60 * 60  # shared filter rotation; addresses count as seen for one to two windows
+
+# Redis Settings (defaults; Django settings take precedence, see redis_client.py)
+REDIS_HOST = os.getenv('REDIS_HOST', '127.0.0.1')
+REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+REDIS_DB = int(os.getenv('REDIS_DB', 0))
+REDIS_PASSWORD = os.getenv('REDIS_PASSWORD') or None
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))  # per pool
+REDIS_STREAM_MAX_CONNECTIONS = int(os.getenv('REDIS_STREAM_MAX_CONNECTIONS', 500))  # per event loop, one per open task socket
+REDIS_POOL_TIMEOUT = 5  # seconds to wait for a free pooled connection
+REDIS_SOCKET_TIMEOUT = 10  # seconds; must exceed TASK_EVENT_BLOCK_MS
+REDIS_CONNECT_TIMEOUT = 5  # seconds
+
+# Cache Settings
+LOCAL_CACHE_MAXSIZE = int(os.getenv('LOCAL_CACHE_MAXSIZE', 1000))  # entries kept in process
+LOCAL_CACHE_TTL = int(os.getenv('LOCAL_CACHE_TTL', 60))  # seconds
+CACHE_INVALIDATION_CHANNEL = "misttrack_invalidate"
+CACHE_BULK_CHUNK_SIZE = 500  # keys per MGET / pipeline round trip
+CACHE_COMPRESS_THRESHOLD = 512  # bytes; larger encoded values are compressed
+CACHE_KEY_PREFIX = "misttrack"
+CACHE_GENERATION_KEY_PREFIX = "misttrack_gen"  # misttrack_gen:global / misttrack_gen:<network>
+CACHE_GENERATION_REFRESH = 5  # seconds a process trusts its copy of the generations
+CACHE_SWEEP_BATCH_SIZE = 1000  # keys per SCAN / UNLINK round trip
+
+# Freshness (soft TTL) per risk level, then per network, in seconds.
+# After the soft TTL the cached value is still served and refreshed in the background;
+# entries are removed at soft TTL * CACHE_HARD_TTL_MULTIPLIER.
+CACHE_TTL_DEFAULT = 24 * 60 * 60  # 24 hours
+CACHE_TTL_BY_RISK_LEVEL: Dict[str, int] = {
+    'low': 7 * 24 * 60 * 60,
+    'moderate': 3 * 24 * 60 * 60,
+    'high': 12 * 60 * 60,
+    'severe': 6 * 60 * 60,
+}
+CACHE_TTL_BY_NETWORK: Dict[str, int] = {}
+CACHE_HARD_TTL_MULTIPLIER = 4
+CACHE_REFRESH_LOCK_TTL = 5 * 60  # seconds a background refresh is deduplicated for
+
+# Negative cache TTL per reason code, in seconds
+NEGATIVE_CACHE_TTL_BY_REASON: Dict[str, int] = {
+    'not_found': 6 * 60 * 60,  # MistTrack has no data for the address
+    'timeout': 10 * 60,
+    'scrape_failed': 10 * 60,
+}
+
+# Popularity / Prefetch Settings
+POPULARITY_KEY = "misttrack_popularity"  # sorted set of network:address by decayed lookup count
+POPULARITY_HALF_LIFE = 24 * 60 * 60  # seconds for a lookup's weight to halve
+POPULARITY_MAX_MEMBERS = 10000  # least popular members beyond this are trimmed
+PREFETCH_TOP_N = 100  # most popular addresses considered per run
+PREFETCH_LEAD_TIME = 60 * 60  # refresh entries whose soft TTL ends within this many seconds
+BROWSER_POOL_CAPACITY = int(os.getenv('BROWSER_POOL_CAPACITY', 3))  # browsers across all workers
+SCRAPER_EXECUTOR_WORKERS = int(os.getenv('SCRAPER_EXECUTOR_WORKERS', 8))  # threads running blocking scraper calls, per process
+REFRESH_PUBLISH_WORKERS = 2  # threads publishing background refresh tasks to the broker, per process
+BROWSER_SLOTS_KEY = "misttrack_browser_slots"  # sorted set of in-use browser slots
+BROWSER_SLOT_TTL = 5 * 60  # seconds after which an unreleased slot no longer counts as busy
 
 # WebSocket Settings
 WS_GROUP_PREFIX = "task_"
+WS_PROGRESS_INTERVAL = float(os.getenv('WS_PROGRESS_INTERVAL', 0.5))  # seconds between progress ticks
+
+# Task Result Settings
+TASK_KEY_PREFIX = "crawler_task"
+TASK_RESULT_TTL = 24 * 60 * 60  # 24 hours
+TASK_EVENT_LOG_MAXLEN = int(os.getenv('TASK_EVENT_LOG_MAXLEN', 10000))  # approximate cap per task stream
+TASK_EVENT_BLOCK_MS = 5000  # XREAD block timeout for consumers
+TASK_TAIL_IDLE_TIMEOUT = int(os.getenv('TASK_TAIL_IDLE_TIMEOUT', 30 * 60))  # close task sockets after this long without events
+EXPORT_PAGE_SIZE = 1000  # results read from Redis per page while exporting
+SNAPSHOT_RECORD_DIR = os.getenv('SNAPSHOT_RECORD_DIR')  # save every crawled page (HTML + Nuxt state) here for the extractor benchmark
+
+# Metrics Settings
+METRICS_KEY_PREFIX = "crawler_metrics"  # Redis hashes aggregating all processes
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 10))  # seconds between pushes to Redis
+METRICS_ROLE = os.getenv('METRICS_ROLE', 'web')  # role label; Celery workers set 'worker'
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)  # histogram bounds (seconds)
+METRICS_CELERY_QUEUES = [q for q in os.getenv('METRICS_CELERY_QUEUES', 'celery').split(',') if q]  # broker lists to report
+LOOKUP_TIMING = os.getenv('LOOKUP_TIMING', '').lower() in ('1', 'true', 'yes')  # attach _timing to every lookup result
+
+# Profiler Settings
+PROFILER_KEY_PREFIX = "crawler_profiler"  # Redis keys: sample rate flag and aggregated stacks
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0))  # fraction of lookups profiled when no Redis flag is set
+PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL', 0.01))  # seconds between stack samples of a profiled lookup
+PROFILER_MAX_DEPTH = int(os.getenv('PROFILER_MAX_DEPTH', 64))  # innermost frames kept per sample
+PROFILER_POLL_INTERVAL = float(os.getenv('PROFILER_POLL_INTERVAL', 2))  # seconds between reads of the Redis flag
+PROFILER_ADMIN_TOKEN = os.getenv('PROFILER_ADMIN_TOKEN')  # X-Admin-Token for /api/profiler/ (staff users are always allowed)
 
 # Logging Configuration
 LOGGING = {
@@ -37,16 +141,22 @@ LOGGING = {
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} [{trace_id}] {message}',
             'style': '{',
         },
     },
+    'filters': {
+        'trace_id': {
+            '()': 'crawler.tracing.TraceIdFilter',
+        },
+    },
     'handlers': {
         'file': {
             'level': 'DEBUG',
             'class': 'logging.FileHandler',
             'filename': 'crawler.log',
             'formatter': 'verbose',
+            'filters': ['trace_id'],
         },
     },
     'loggers': {
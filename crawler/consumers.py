@@ -1,22 +1,113 @@
 import json
+import time
+import asyncio
+import logging
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
+from .event_log import TaskEventLog, serialize_message
+from .progress import task_group_name, TaskResultStore
+from .metrics import timed
+from .config import TASK_TAIL_IDLE_TIMEOUT
+
+# ProgressReporter.finish 写入的最终状态
+FINISHED_STATUSES = ('completed', 'error')
+
+logger = logging.getLogger(__name__)
 
 class TaskProgressConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.task_id = self.scope['url_route']['kwargs']['task_id']
-        
+        self.group_name = task_group_name(self.task_id)
+        self.tail_task = None
+
         # Join group
         await self.channel_layer.group_add(
-            f"task_{self.task_id}",
+            self.group_name,
             self.channel_name
         )
-        
+
         await self.accept()
 
+        # 从事件日志中 since 之后的位置开始读取（默认从头），迟到的连接和重连都能拿到完整有序的历史
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            since = max(int(query.get('since', ['0'])[0]), 0)
+        except ValueError:
+            logger.warning(f"Invalid resume sequence for task {self.task_id}: {query.get('since')}")
+            since = 0
+
+        self.tail_task = asyncio.ensure_future(self._tail_events(since))
+
+    async def _forward(self, entries, since: int):
+        """Send entries to the client; returns (last seq, whether the summary was sent)"""
+        for seq, event, data in entries:
+            with timed('ws_send'):
+                await self.send(text_data=data)
+            since = seq
+            if event == 'summary':
+                return since, True
+        return since, False
+
+    async def _tail_events(self, since: int):
+        """
+        Forward events from the task's event log until the summary has been sent
+
+        没有新事件时检查任务状态，以下情况停止读取：
+        - 元数据已是最终状态但日志中没有 summary（例如写入 summary 失败）：按元数据补发 summary
+        - 事件流和元数据都已过期（之前存在过）：关闭连接
+        - 超过 TASK_TAIL_IDLE_TIMEOUT 秒没有新事件（例如任务进程被杀死）：关闭连接
+        """
+        event_log = TaskEventLog(self.task_id)
+        store = TaskResultStore(self.task_id)
+        seen = since > 0
+        last_event = time.monotonic()
+        while True:
+            try:
+                entries = await event_log.tail(since)
+                if entries:
+                    seen, last_event = True, time.monotonic()
+                    since, done = await self._forward(entries, since)
+                    if done:
+                        return
+                    continue
+
+                if time.monotonic() - last_event > TASK_TAIL_IDLE_TIMEOUT:
+                    logger.info(f"No events for task {self.task_id} in {TASK_TAIL_IDLE_TIMEOUT}s, closing")
+                    break
+
+                exists = await event_log.aexists()
+                meta = await store.aget_meta()
+                if exists or meta:
+                    seen = True
+                elif seen:
+                    logger.info(f"Events of task {self.task_id} expired, closing")
+                    break
+
+                if meta.get('status') in FINISHED_STATUSES:
+                    # finish() 先写 summary 再更新元数据，先读完剩余的事件
+                    since, done = await self._forward(await event_log.tail(since, block_ms=None), since)
+                    if not done:
+                        logger.warning(f"Task {self.task_id} finished without a summary event")
+                        with timed('ws_send'):
+                            await self.send(text_data=serialize_message({"event": "summary", **meta}))
+                    return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reading events for task {self.task_id}: {str(e)}")
+                await asyncio.sleep(1)
+                if time.monotonic() - last_event > TASK_TAIL_IDLE_TIMEOUT:
+                    break
+
+        await self.close()
+
     async def disconnect(self, close_code):
+        if self.tail_task:
+            self.tail_task.cancel()
+
         # Leave group
         await self.channel_layer.group_discard(
-            f"task_{self.task_id}",
+            self.group_name,
             self.channel_name
         )
 
@@ -26,17 +117,20 @@ class TaskProgressConsumer(AsyncWebsocketConsumer):
 
         # Send message to group
         await self.channel_layer.group_send(
-            f"task_{self.task_id}",
+            self.group_name,
             {
                 'type': 'task_progress',
-                'message': message
+                'text': serialize_message(message)
             }
         )
 
     async def task_progress(self, event):
-        message = event['message']
+        # 消息在发送端已序列化，直接转发
+        if 'text' in event:
+            with timed('ws_send'):
+                await self.send(text_data=event['text'])
+            return
 
-        # Send message to WebSocket
         await self.send(text_data=json.dumps({
-            'message': message
+            'message': event['message']
         }))
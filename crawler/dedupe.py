@@ -0,0 +1,135 @@
+"""
+批量输入去重
+
+上传的地址列表中重复行很多，重复的行都进入爬取就是重复的浏览器加载。
+process_stream 在爬取之前按地址标识（``identity(address, network).key``）去重：
+
+- 块内：精确去重，同一标识只爬取一次，结果复制给所有重复行
+- 跨块（整个任务）：不超过 ``DEDUPE_EXACT_LIMIT`` 个地址时用精确集合，超过后转为 Bloom 过滤器，内存固定
+- ``DEDUPE_SHARED=1``：使用 Redis 中的 Bloom 过滤器，所有任务共享，按 ``DEDUPE_WINDOW`` 轮换，
+  最近一到两个窗口内出现过的地址（包括其他任务中的）都视为已见过
+
+已见过的地址不直接爬取，而是等本块新地址爬取完成、结果写入缓存之后再走一次缓存路径，
+缓存仍未命中的才爬取。Bloom 过滤器的误判只会推迟爬取，不会丢失结果。
+"""
+
+import math
+import time
+import hashlib
+import logging
+from typing import List
+
+import numpy as np
+
+from .config import (
+    DEDUPE_EXACT_LIMIT,
+    DEDUPE_BLOOM_CAPACITY,
+    DEDUPE_BLOOM_ERROR_RATE,
+    DEDUPE_SHARED,
+    DEDUPE_SEEN_KEY,
+    DEDUPE_WINDOW,
+)
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def bloom_parameters(capacity: int, error_rate: float):
+    """(bits, hash count) for a Bloom filter holding capacity items at error_rate"""
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    return bits, max(round(bits / capacity * math.log(2)), 1)
+
+
+def _hash_pairs(keys: List[str]) -> np.ndarray:
+    """Two independent 64-bit hashes per key, shape (n, 2)"""
+    digests = b''.join(hashlib.blake2b(key.encode(), digest_size=16).digest() for key in keys)
+    return np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+
+
+class BloomFilter:
+    """In-memory Bloom filter over a numpy bit array (double hashing)"""
+
+    def __init__(self, capacity: int = DEDUPE_BLOOM_CAPACITY, error_rate: float = DEDUPE_BLOOM_ERROR_RATE):
+        self.size, self.hash_count = bloom_parameters(capacity, error_rate)
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self._steps = np.arange(self.hash_count, dtype=np.uint64)
+
+    def indexes(self, keys: List[str]) -> np.ndarray:
+        """Bit positions of each key, shape (n, hash_count)"""
+        pairs = _hash_pairs(keys)
+        return (pairs[:, :1] + self._steps * pairs[:, 1:]) % np.uint64(self.size)
+
+    def add_many(self, keys: List[str]) -> List[bool]:
+        """Add distinct keys; returns for each key whether it was new (not possibly seen before)"""
+        if not keys:
+            return []
+        positions = self.indexes(keys)
+        offsets = positions >> np.uint64(3)
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        seen = ((self.bits[offsets] & masks) != 0).all(axis=1)
+        np.bitwise_or.at(self.bits, offsets.ravel(), masks.ravel())
+        return (~seen).tolist()
+
+
+class RedisBloomFilter(BloomFilter):
+    """
+    Bloom filter in Redis strings shared by all jobs
+
+    One filter per ``window`` seconds (``{DEDUPE_SEEN_KEY}:{period}``); a key counts as seen
+    when it is in the current or the previous filter. Each key is tested and added with one BITFIELD.
+    """
+
+    def __init__(self, capacity: int = DEDUPE_BLOOM_CAPACITY, error_rate: float = DEDUPE_BLOOM_ERROR_RATE,
+                 window: int = DEDUPE_WINDOW):
+        self.size, self.hash_count = bloom_parameters(capacity, error_rate)
+        self._steps = np.arange(self.hash_count, dtype=np.uint64)
+        self.window = window
+
+    def _key(self, period: int) -> str:
+        return f"{DEDUPE_SEEN_KEY}:{period}"
+
+    def add_many(self, keys: List[str]) -> List[bool]:
+        if not keys:
+            return []
+        period = int(time.time() // self.window)
+        current, previous = self._key(period), self._key(period - 1)
+        pipe = get_redis().pipeline(transaction=False)
+        for row in self.indexes(keys).tolist():
+            pipe.execute_command('BITFIELD', current, *[arg for index in row for arg in ('SET', 'u1', index, 1)])
+            pipe.execute_command('BITFIELD', previous, *[arg for index in row for arg in ('GET', 'u1', index)])
+        pipe.expire(current, self.window * 2)
+        replies = pipe.execute()
+        return [not (all(now) or all(before)) for now, before in zip(replies[:-1:2], replies[1:-1:2])]
+
+
+class Deduper:
+    """
+    Seen-key tracking for one job
+
+    Exact while the job has seen at most exact_limit keys, then a Bloom filter; with shared=True
+    the Redis filter is used from the start so keys seen by other jobs count too.
+    """
+
+    def __init__(self, exact_limit: int = DEDUPE_EXACT_LIMIT, shared: bool = DEDUPE_SHARED):
+        self.exact_limit = exact_limit
+        self.members = set()
+        self.bloom = RedisBloomFilter() if shared else None
+
+    def add_many(self, keys: List[str]) -> List[bool]:
+        """Add distinct keys; returns for each key whether it is new to this job (or window)"""
+        if self.bloom is not None:
+            try:
+                return self.bloom.add_many(keys)
+            except Exception as e:
+                # 过滤器不可用时不去重，所有地址照常处理
+                logger.error(f"Error checking seen addresses: {str(e)}")
+                return [True] * len(keys)
+
+        fresh = [key not in self.members for key in keys]
+        self.members.update(keys)
+        if len(self.members) > self.exact_limit:
+            logger.info(f"Switching dedupe to a Bloom filter after {len(self.members)} addresses")
+            self.bloom = BloomFilter()
+            self.bloom.add_many(list(self.members))
+            self.members = set()
+        return fresh
@@ -0,0 +1,82 @@
+"""
+任务事件日志（Redis Streams）
+
+每个任务的所有事件都按顺序追加到 ``crawler_task:{task_id}:events`` 流中，
+流的条目 ID 固定为 ``0-{seq}``，``seq`` 通过 INCR 分配，因此客户端只需记住最后收到的
+``seq`` 即可从断点续读。流通过 ``MAXLEN ~`` 限制长度，并与任务结果一样设置过期时间。
+"""
+
+import json
+import logging
+from typing import Dict, Any, List, Tuple
+
+from .redis_client import get_redis, get_async_redis, get_stream_redis
+from .config import (
+    TASK_KEY_PREFIX,
+    TASK_RESULT_TTL,
+    TASK_EVENT_LOG_MAXLEN,
+    TASK_EVENT_BLOCK_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_message(message: Dict[str, Any]) -> str:
+    """Serialize a protocol message once so consumers can forward it as-is"""
+    return json.dumps({'message': message}, ensure_ascii=False)
+
+
+class TaskEventLog:
+    """Durable, ordered, size-capped event log for a single task"""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.stream_key = f"{TASK_KEY_PREFIX}:{task_id}:events"
+        self.seq_key = f"{TASK_KEY_PREFIX}:{task_id}:seq"
+
+    @staticmethod
+    def entry_id(seq: int) -> str:
+        return f"0-{seq}"
+
+    @staticmethod
+    def entry_seq(entry_id: str) -> int:
+        return int(entry_id.split('-', 1)[1])
+
+    def append(self, message: Dict[str, Any]) -> int:
+        """Allocate the next seq, stamp it on the message and append it to the stream"""
+        client = get_redis()
+        seq = client.incr(self.seq_key)
+        message['seq'] = seq
+
+        pipe = client.pipeline()
+        pipe.xadd(
+            self.stream_key,
+            {
+                'event': message.get('event', ''),
+                'data': serialize_message(message)
+            },
+            id=self.entry_id(seq),
+            maxlen=TASK_EVENT_LOG_MAXLEN,
+            approximate=True
+        )
+        pipe.expire(self.stream_key, TASK_RESULT_TTL)
+        pipe.expire(self.seq_key, TASK_RESULT_TTL)
+        pipe.execute()
+        return seq
+
+    async def aexists(self) -> bool:
+        return bool(await get_async_redis().exists(self.stream_key))
+
+    async def tail(self, since: int = 0, block_ms: int = TASK_EVENT_BLOCK_MS, count: int = 500) -> List[Tuple[int, str, str]]:
+        """Block until entries newer than since arrive (or block_ms passes) and return them"""
+        # 阻塞读取使用单独的连接池，大量打开的 WebSocket 不会耗尽普通命令的连接
+        response = await get_stream_redis().xread(
+            {self.stream_key: self.entry_id(since)},
+            count=count,
+            block=block_ms
+        )
+        entries = []
+        for _, stream_entries in response or []:
+            for entry_id, fields in stream_entries:
+                entries.append((self.entry_seq(entry_id), fields['event'], fields['data']))
+        return entries
@@ -0,0 +1,146 @@
+"""
+任务结果导出
+
+从 TaskResultStore 按页（``EXPORT_PAGE_SIZE`` 条）读取结果，边读边写，内存占用不随结果数增长：
+
+- csv：逐页生成文本，直接作为流式响应发送（带 UTF-8 BOM，Excel 打开不乱码）
+- xlsx：openpyxl write-only 模式逐行写入临时文件
+- parquet：pyarrow 写入，每页一个 row group（pyarrow 在 requirements 中；环境中没有时返回 400）
+
+导出开始时记下结果数，处理中的任务只导出此时已有的结果。
+"""
+
+import io
+import csv
+import codecs
+import logging
+from typing import Iterator, List, Dict, Any, Callable, BinaryIO
+
+from .config import EXPORT_PAGE_SIZE
+from .progress import TaskResultStore
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'xlsx', 'parquet')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class ExportError(ValueError):
+    """The export cannot be produced with the requested options"""
+
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ', '.join(_text(item) for item in value)
+    return str(value)
+
+
+def _result_field(name: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda item: _text(((item.get('data') or {}).get('result') or {}).get(name))
+
+
+def _data_field(name: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda item: _text((item.get('data') or {}).get(name))
+
+
+# 列名 -> 从结果条目中取值（第一列 index 单独处理）
+EXPORT_COLUMNS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    'address': _data_field('address'),
+    'status': lambda item: _text(item.get('status')),
+    'risk_level': _result_field('risk_level'),
+    'risk_score': _result_field('risk_score'),
+    'risk_type': _result_field('risk_type'),
+    'address_labels': _result_field('address_labels'),
+    'volume': _result_field('volume'),
+    'labels': _result_field('labels'),
+    'related_addresses': _result_field('related_addresses'),
+    'error': _data_field('error'),
+    'reason': _data_field('reason'),
+}
+DEFAULT_COLUMNS = (
+    'index', 'address', 'network', 'status', 'risk_level', 'risk_type', 'address_labels', 'volume', 'error'
+)
+
+
+def parse_columns(value: str = None) -> List[str]:
+    """Columns from a comma-separated list (default DEFAULT_COLUMNS)"""
+    if not value:
+        return list(DEFAULT_COLUMNS)
+    columns = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in columns if name not in EXPORT_COLUMNS and name not in ('index', 'network')]
+    if unknown or not columns:
+        choices = ', '.join(('index', 'network') + tuple(EXPORT_COLUMNS))
+        raise ExportError(f"Unknown columns: {', '.join(unknown) or value}; available: {choices}")
+    return list(dict.fromkeys(columns))
+
+
+def iter_pages(task_id: str, columns: List[str], page_size: int = EXPORT_PAGE_SIZE) -> Iterator[List[list]]:
+    """Yield pages of rows (index as int, everything else as text) for the selected columns"""
+    store = TaskResultStore(task_id)
+    network = _text(store.get_meta().get('network'))
+    total = store.count()
+    for start in range(0, total, page_size):
+        rows = []
+        for index, item in enumerate(store.get_results(start, min(start + page_size, total) - 1), start=start + 1):
+            row = []
+            for name in columns:
+                if name == 'index':
+                    row.append(index)
+                elif name == 'network':
+                    row.append(network)
+                else:
+                    row.append(EXPORT_COLUMNS[name](item))
+            rows.append(row)
+        yield rows
+
+
+def stream_csv(task_id: str, columns: List[str], page_size: int = EXPORT_PAGE_SIZE) -> Iterator[bytes]:
+    """CSV export as encoded blocks, one per page"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield codecs.BOM_UTF8 + buffer.getvalue().encode('utf-8')
+    for rows in iter_pages(task_id, columns, page_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(task_id: str, columns: List[str], file: BinaryIO, page_size: int = EXPORT_PAGE_SIZE):
+    """XLSX export written row by row in openpyxl write-only mode"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('results')
+    sheet.append(columns)
+    for rows in iter_pages(task_id, columns, page_size):
+        for row in rows:
+            sheet.append(row)
+    workbook.save(file)
+
+
+def write_parquet(task_id: str, columns: List[str], file: BinaryIO, page_size: int = EXPORT_PAGE_SIZE):
+    """Parquet export, one row group per page (requires pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires pyarrow, please export as CSV or XLSX")
+
+    schema = pa.schema([(name, pa.int64() if name == 'index' else pa.string()) for name in columns])
+    with pq.ParquetWriter(file, schema, compression='zstd') as writer:
+        for rows in iter_pages(task_id, columns, page_size):
+            writer.write_table(pa.Table.from_pylist([dict(zip(columns, row)) for row in rows], schema=schema))
+
+
+FILE_WRITERS = {
+    'xlsx': write_xlsx,
+    'parquet': write_parquet,
+}
@@ -0,0 +1,174 @@
+"""
+上传文件的流式读取
+
+文件类型按内容（而不是扩展名）判断：
+
+- CSV：只读取文件开头 ``INGEST_SNIFF_BYTES`` 字节来判断编码和分隔符，之后按块读取 ``address`` 列
+- .xlsx：openpyxl 只读模式逐行读取，内存占用不随工作簿大小增长
+- .xls：需要安装 xlrd，整表读取（格式本身最多 65536 行）
+
+地址每块最多 ``INGEST_CHUNK_SIZE`` 个，以生成器的形式交给爬取流水线：
+第一块解析完成即可开始爬取，整个文件只解析一次。
+"""
+
+import csv
+import codecs
+import logging
+from typing import Iterator, List, Tuple, BinaryIO
+
+import pandas as pd
+
+from .config import INGEST_SNIFF_BYTES, INGEST_CHUNK_SIZE, INGEST_ADDRESS_COLUMN
+
+logger = logging.getLogger(__name__)
+
+XLSX_MAGIC = b'PK\x03\x04'
+XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+EXCEL_HEADER_SCAN_ROWS = 20  # rows searched for the header in each sheet
+
+# gb18030 是 GBK / GB2312 的超集
+CANDIDATE_ENCODINGS = ('utf-8', 'gb18030', 'latin1')
+CANDIDATE_DELIMITERS = ',;\t|'
+
+
+class IngestionError(ValueError):
+    """The upload cannot be read as an address list"""
+
+
+def sniff_csv(head: bytes) -> Tuple[str, str]:
+    """Detect (encoding, delimiter) from the first bytes of a CSV file"""
+    if head.startswith(codecs.BOM_UTF8):
+        encoding, text = 'utf-8-sig', head[len(codecs.BOM_UTF8):].decode('utf-8', errors='ignore')
+    else:
+        encoding = text = None
+        for candidate in CANDIDATE_ENCODINGS:
+            try:
+                # final=False: 前缀末尾可能截断了一个多字节字符
+                text = codecs.getincrementaldecoder(candidate)().decode(head, final=False)
+                encoding = candidate
+                break
+            except UnicodeDecodeError:
+                continue
+
+    lines = text.splitlines()
+    sample = '\n'.join(lines[:-1] if len(lines) > 1 else lines)
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=CANDIDATE_DELIMITERS).delimiter
+    except csv.Error:
+        delimiter = ','
+    return encoding, delimiter
+
+
+def _address_column(name) -> bool:
+    return str(name).strip().lower() == INGEST_ADDRESS_COLUMN
+
+
+def _clean(column: pd.Series) -> List[str]:
+    values = column.dropna().astype(str).str.strip()
+    return values[values != ''].tolist()
+
+
+def iter_csv_address_chunks(file: BinaryIO, chunk_size: int = INGEST_CHUNK_SIZE) -> Iterator[List[str]]:
+    """Yield lists of addresses from the address column of a CSV file object, one chunk at a time"""
+    head = file.read(INGEST_SNIFF_BYTES)
+    file.seek(0)
+    encoding, delimiter = sniff_csv(head)
+    logger.info(f"Reading CSV upload as {encoding}, delimiter {delimiter!r}")
+
+    try:
+        reader = pd.read_csv(
+            file,
+            encoding=encoding,
+            # 地址都是 ASCII，其他列中个别无法解码的字节不影响读取
+            encoding_errors='replace',
+            sep=delimiter,
+            usecols=_address_column,
+            dtype=str,
+            chunksize=chunk_size,
+            skipinitialspace=True,
+        )
+        for chunk in reader:
+            if chunk.shape[1] == 0:
+                raise IngestionError(f"The CSV file must contain an '{INGEST_ADDRESS_COLUMN}' column")
+            addresses = _clean(chunk.iloc[:, 0])
+            if addresses:
+                yield addresses
+    except pd.errors.EmptyDataError:
+        return
+    except pd.errors.ParserError as e:
+        raise IngestionError(f"Unable to parse the CSV file: {str(e)}")
+
+
+def iter_xlsx_address_chunks(file: BinaryIO, chunk_size: int = INGEST_CHUNK_SIZE) -> Iterator[List[str]]:
+    """Yield address chunks from the first sheet with an address column, streaming rows in read-only mode"""
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise IngestionError(f"Unable to read the Excel file: {str(e)}")
+
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            column = None
+            for _, row in zip(range(EXCEL_HEADER_SCAN_ROWS), rows):
+                column = next((i for i, value in enumerate(row or ()) if _address_column(value)), None)
+                if column is not None:
+                    break
+            if column is None:
+                continue
+
+            chunk = []
+            for row in rows:
+                value = row[column] if row and column < len(row) else None
+                if value is None:
+                    continue
+                value = str(value).strip()
+                if value:
+                    chunk.append(value)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+            return
+        raise IngestionError(f"The Excel file must contain an '{INGEST_ADDRESS_COLUMN}' column")
+    finally:
+        workbook.close()
+
+
+def iter_xls_address_chunks(file: BinaryIO, chunk_size: int = INGEST_CHUNK_SIZE) -> Iterator[List[str]]:
+    """Yield address chunks from a legacy .xls workbook (requires xlrd)"""
+    try:
+        sheets = pd.read_excel(file, sheet_name=None, dtype=str, engine='xlrd')
+    except ImportError:
+        raise IngestionError("Legacy .xls files are not supported, please save the file as .xlsx or CSV")
+    except Exception as e:
+        raise IngestionError(f"Unable to read the Excel file: {str(e)}")
+
+    for frame in sheets.values():
+        columns = [name for name in frame.columns if _address_column(name)]
+        if columns:
+            addresses = _clean(frame[columns[0]])
+            for start in range(0, len(addresses), chunk_size):
+                yield addresses[start:start + chunk_size]
+            return
+    raise IngestionError(f"The Excel file must contain an '{INGEST_ADDRESS_COLUMN}' column")
+
+
+def iter_upload_address_chunks(file, chunk_size: int = INGEST_CHUNK_SIZE) -> Iterator[List[str]]:
+    """Yield address chunks from an uploaded file, choosing the reader from the file's magic bytes"""
+    magic = file.read(len(XLS_MAGIC))
+    file.seek(0)
+    if magic.startswith(XLSX_MAGIC):
+        return iter_xlsx_address_chunks(file, chunk_size)
+    if magic == XLS_MAGIC:
+        return iter_xls_address_chunks(file, chunk_size)
+    return iter_csv_address_chunks(file, chunk_size)
+
+
+def iter_addresses(chunks: Iterator[List[str]]) -> Iterator[str]:
+    """Flatten address chunks into single addresses"""
+    for chunk in chunks:
+        yield from chunk
@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crawler.benchmark.snapshots import CORPUS_DIR, build_corpus, load_corpus
+from crawler.benchmark.extractors import (
+    IMPLEMENTATIONS,
+    PARSERS,
+    benchmark_corpus,
+    check_corpus,
+    compare_implementations,
+    compare_to_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = "Check and time the page extractors on the offline snapshot corpus (no browser or network needed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=CORPUS_DIR, help='Snapshot directory')
+        parser.add_argument('--implementations', default=','.join(IMPLEMENTATIONS),
+                            help=f"Comma-separated: {', '.join(IMPLEMENTATIONS)}")
+        parser.add_argument('--parsers', default=','.join(PARSERS), help='Comma-separated BeautifulSoup parsers')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per page (median is used)')
+        parser.add_argument('--no-timing', action='store_true', help='Only run the consistency checks')
+        parser.add_argument('--baseline', help='Fail when slower than this earlier --json report')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown against the baseline')
+        parser.add_argument('--json', dest='json_path', help='Write the timing report to this JSON file')
+        parser.add_argument('--build', action='store_true',
+                            help='Regenerate the corpus from the stand-in server (expected output from the current extractor)')
+        parser.add_argument('--per-variant', type=int, default=3, help='Snapshots per page variant with --build')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['build']:
+            names = build_corpus(options['corpus'], options['per_variant'], options['seed'])
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(names)} snapshots to {options['corpus']}"))
+            return
+
+        implementations = [name.strip() for name in options['implementations'].split(',') if name.strip()]
+        unknown = [name for name in implementations if name not in IMPLEMENTATIONS]
+        if unknown:
+            raise CommandError(f"Unknown implementations: {', '.join(unknown)}")
+        parsers = [name.strip() for name in options['parsers'].split(',') if name.strip()]
+
+        snapshots = load_corpus(options['corpus'])
+        if not snapshots:
+            raise CommandError(f"No snapshots in {options['corpus']}")
+        self.stdout.write(f"{len(snapshots)} snapshots from {options['corpus']}")
+
+        problems = check_corpus(snapshots, implementations, parsers)
+        for name, snapshot_names in sorted(compare_implementations(snapshots, implementations).items()):
+            self.stdout.write(f"note: {name} differs from undetected on {len(snapshot_names)} snapshots")
+
+        if not options['no_timing']:
+            report = benchmark_corpus(snapshots, implementations, parsers, options['iterations'])
+            self.stdout.write('stage\tmean_us')
+            for parser, us in report['parse_us'].items():
+                self.stdout.write(f"parse.{parser}\t{us}")
+            for row in report['fields']:
+                self.stdout.write(f"{row['implementation']}.{row['field']}\t{row['mean_us']}")
+            self.stdout.write(f"extract_result\t{report['extract_result_us']}")
+
+            if options['json_path']:
+                with open(options['json_path'], 'w') as f:
+                    json.dump(report, f, indent=2)
+            if options['baseline']:
+                with open(options['baseline']) as f:
+                    problems += compare_to_baseline(report, json.load(f), options['tolerance'])
+
+        if problems:
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError(f"{len(problems)} extractor regressions")
+        self.stdout.write(self.style.SUCCESS("Extractors match the recorded snapshots"))
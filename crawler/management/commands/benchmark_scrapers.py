@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crawler.benchmark import ENGINES, StandinServer, run_matrix
+
+COLUMNS = ('engine', 'pool_size', 'addresses', 'succeeded', 'failed', 'startup_s', 'elapsed_s',
+           'addresses_per_sec', 'p50_ms', 'p95_ms', 'peak_rss_mb')
+
+
+class Command(BaseCommand):
+    help = "Measure scraper throughput, latency and memory per engine and pool size against the local stand-in"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engines', default='http,undetected',
+                            help=f"Comma-separated engines: {', '.join(ENGINES)}")
+        parser.add_argument('--pool-sizes', default='1,2,4', help='Comma-separated pool sizes')
+        parser.add_argument('--addresses', type=int, default=50, help='Addresses crawled per run')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for addresses and stand-in data')
+        parser.add_argument('--site-url', help='Benchmark an already running site instead of starting a stand-in')
+        parser.add_argument('--latency-ms', type=float, default=200)
+        parser.add_argument('--jitter-ms', type=float, default=100)
+        parser.add_argument('--lazy-ms', type=int, default=0)
+        parser.add_argument('--challenge-rate', type=float, default=0.0)
+        parser.add_argument('--not-found-rate', type=float, default=0.0)
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        engines = [name.strip() for name in options['engines'].split(',') if name.strip()]
+        unknown = [name for name in engines if name not in ENGINES]
+        if unknown:
+            raise CommandError(f"Unknown engines: {', '.join(unknown)}")
+        try:
+            pool_sizes = [int(size) for size in options['pool_sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--pool-sizes must be comma-separated integers")
+
+        server = None
+        site_url = options['site_url']
+        if not site_url:
+            server = StandinServer(
+                latency_ms=options['latency_ms'], jitter_ms=options['jitter_ms'], lazy_ms=options['lazy_ms'],
+                challenge_rate=options['challenge_rate'], not_found_rate=options['not_found_rate'],
+                seed=options['seed'],
+            )
+            site_url = server.start()
+
+        try:
+            reports = run_matrix(engines, pool_sizes, site_url, options['addresses'], options['seed'])
+        finally:
+            if server:
+                server.stop()
+
+        self.stdout.write('\t'.join(COLUMNS))
+        for report in reports:
+            if 'error' in report:
+                self.stdout.write(self.style.ERROR(f"{report['engine']}\t{report['pool_size']}\terror: {report['error']}"))
+                continue
+            self.stdout.write('\t'.join(str(report.get(column, '')) for column in COLUMNS))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({"options": {k: options[k] for k in ('engines', 'pool_sizes', 'addresses', 'seed',
+                                                                 'latency_ms', 'jitter_ms', 'lazy_ms',
+                                                                 'challenge_rate', 'not_found_rate')},
+                           "stand_in": server.stats if server else None,
+                           "results": reports}, f, indent=2)
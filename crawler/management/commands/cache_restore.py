@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from crawler.cache_snapshot import import_snapshot
+from crawler.config import CACHE_SWEEP_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Load a snapshot written by cache_snapshot into the current cache generation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file to read')
+        parser.add_argument('--replace', action='store_true',
+                            help='Overwrite entries that already exist in Redis')
+        parser.add_argument('--batch-size', type=int, default=CACHE_SWEEP_BATCH_SIZE,
+                            help='Entries per pipeline round trip')
+
+    def handle(self, *args, **options):
+        try:
+            stats = import_snapshot(options['path'], replace=options['replace'], batch_size=options['batch_size'])
+        except Exception as e:
+            raise CommandError(f"Restore failed: {str(e)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {stats['restored']} entries from {options['path']} "
+            f"({stats['expired']} expired, {stats['existing']} already present, {stats['failed']} failed)"
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from crawler.cache_snapshot import export_snapshot
+from crawler.config import CACHE_SWEEP_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Export the current MistTrack cache (values and TTLs) to a compressed snapshot file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file to write, e.g. cache.snapshot.gz')
+        parser.add_argument('--batch-size', type=int, default=CACHE_SWEEP_BATCH_SIZE,
+                            help='Keys per SCAN / pipeline round trip')
+
+    def handle(self, *args, **options):
+        try:
+            stats = export_snapshot(options['path'], batch_size=options['batch_size'])
+        except Exception as e:
+            raise CommandError(f"Snapshot failed: {str(e)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {stats['written']} entries to {options['path']} ({stats['skipped']} skipped)"
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from crawler.benchmark.standin import StandinServer
+
+
+class Command(BaseCommand):
+    help = "Serve a local MistTrack stand-in site (Nuxt-style pages) for offline scraper tests and benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=0, help='Server-side delay per page')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Extra per-address delay, up to this much')
+        parser.add_argument('--lazy-ms', type=int, default=0,
+                            help='Render the risk table from a script after this delay (0: in the HTML)')
+        parser.add_argument('--challenge-rate', type=float, default=0.0,
+                            help='Share of pages answered with a challenge until the clearance cookie is set')
+        parser.add_argument('--not-found-rate', type=float, default=0.0, help='Share of addresses without risk data')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        server = StandinServer(
+            options['host'], options['port'],
+            latency_ms=options['latency_ms'], jitter_ms=options['jitter_ms'], lazy_ms=options['lazy_ms'],
+            challenge_rate=options['challenge_rate'], not_found_rate=options['not_found_rate'], seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Serving MistTrack stand-in on {server.base_url} "
+            f"(set MISTTRACK_BASE_URL={server.base_url}/aml_risks to use it)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crawler import profiler
+
+
+class Command(BaseCommand):
+    help = "Profile lookups in all running web and worker processes for a while and write flamegraph (collapsed) stacks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=int, default=60, help='How long to profile')
+        parser.add_argument('--rate', type=float, default=1.0, help='Fraction of lookups to profile')
+        parser.add_argument('--output', help='Collapsed stacks file (default: stdout)')
+        parser.add_argument('--role', choices=['web', 'worker'], help='Only stacks from this role')
+        parser.add_argument('--keep', action='store_true', help='Keep stacks collected before this run')
+
+    def handle(self, *args, **options):
+        if not 0 < options['rate'] <= 1 or options['seconds'] <= 0:
+            raise CommandError("--rate must be in (0, 1] and --seconds positive")
+        try:
+            if not options['keep']:
+                profiler.reset_stacks()
+            profiler.start(options['rate'], options['seconds'])
+            self.stderr.write(f"Profiling {options['rate']:.0%} of lookups for {options['seconds']}s...")
+            try:
+                time.sleep(options['seconds'])
+            finally:
+                profiler.stop()
+            # 等各进程把最后一批采样推送到 Redis
+            time.sleep(profiler.METRICS_FLUSH_INTERVAL)
+            stacks = profiler.collapsed_stacks(options['role'])
+        except Exception as e:
+            raise CommandError(f"Profiling failed: {str(e)}")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(stacks)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {stacks.count(chr(10))} stacks to {options['output']}"))
+        else:
+            self.stdout.write(stacks, ending='')
@@ -0,0 +1,284 @@
+"""
+分阶段延迟指标（Prometheus 文本格式）
+
+查询流程中的每个阶段用 ``timed(stage)`` 计时，记入进程内的直方图 ``crawler_stage_seconds{role, stage}``：
+
+- ``browser_acquire``：从浏览器池取得浏览器（池空时包括启动浏览器）
+- ``navigation``：``driver.get`` 加载页面
+- ``wait_body`` / ``wait_loading_mask`` / ``wait_nuxt_state`` / ``wait_lazy_content``：各个就绪等待
+- ``page_source`` / ``read_state`` / ``extract``：读取页面源码、读取 Nuxt 状态、解析提取
+- ``scrape``：一次 search_address 的总耗时
+- ``executor_queue``：爬取任务提交到进程共享的爬虫线程池（``SCRAPER_EXECUTOR_WORKERS``）到开始执行的等待
+- ``cache_get`` / ``cache_set``：批量查询 / 写回缓存
+- ``event_publish`` / ``ws_send``：进度事件写入事件日志、WebSocket 发送
+
+进程内只累加，后台线程每 ``METRICS_FLUSH_INTERVAL`` 秒把增量 HINCRBY 到 Redis，
+Django 和所有 Celery worker 的数据因此汇总在一起，``GET /api/metrics/`` 一个抓取目标即可覆盖整个部署。
+计数是累计值，进程重启不会归零。
+
+仪表（gauge）在抓取时计算：浏览器池容量、使用中的浏览器（browser_slots）、Celery 队列长度（读取 CELERY_BROKER_URL）；
+各进程自己的仪表（打开的浏览器、线程池排队数）随增量一起推送，超过三个推送周期没有更新的进程不再计入。
+"""
+
+import os
+import json
+import time
+import atexit
+import socket
+import logging
+import threading
+from urllib.parse import urlparse
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional
+
+import redis
+
+from .config import (
+    METRICS_KEY_PREFIX,
+    METRICS_FLUSH_INTERVAL,
+    METRICS_ROLE,
+    METRICS_BUCKETS,
+    METRICS_CELERY_QUEUES,
+    BROWSER_POOL_CAPACITY,
+    REDIS_SOCKET_TIMEOUT,
+    REDIS_CONNECT_TIMEOUT,
+)
+from .redis_client import get_redis
+from .tracing import record_phase
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_KEY = f"{METRICS_KEY_PREFIX}:stage_seconds"
+GAUGE_KEY = f"{METRICS_KEY_PREFIX}:gauges"
+GAUGE_HELP = {
+    'browsers_open': "Browser instances currently running",
+    'executor_queue_depth': "Scrape calls submitted to a thread pool and not yet started",
+}
+
+
+def _le(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class StageMetrics:
+    """Per-process stage histograms and gauges, pushed to Redis in the background"""
+
+    def __init__(self, buckets=METRICS_BUCKETS, interval: float = METRICS_FLUSH_INTERVAL, role: str = METRICS_ROLE):
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.interval = interval
+        self.role = role
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[List[int], float]] = {}
+        self._gauges: Dict[str, float] = {}
+        self._pid = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def _ensure_flusher(self):
+        # fork 之后（Celery prefork）子进程没有父进程的线程，按 pid 重新启动，并丢弃继承来的未推送数据
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self._pending, self._gauges = {}, {}
+            self._pid = os.getpid()
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.flush()
+
+    def observe(self, stage: str, seconds: float):
+        self._ensure_flusher()
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts, total = self._pending.get(stage) or ([0] * len(self.buckets), 0.0)
+            counts[index] += 1
+            self._pending[stage] = (counts, total + seconds)
+
+    def add_gauge(self, name: str, delta: float):
+        self._ensure_flusher()
+        with self._lock:
+            self._gauges[name] = self._gauges.get(name, 0) + delta
+
+    def flush(self):
+        """Add this process's increments to the Redis totals and refresh its gauges"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            gauges = dict(self._gauges)
+        if not pending and not gauges:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for stage, (counts, total) in pending.items():
+                for bound, count in zip(self.buckets, counts):
+                    if count:
+                        pipe.hincrby(HISTOGRAM_KEY, f"{self.role}|{stage}|{_le(bound)}", count)
+                pipe.hincrbyfloat(HISTOGRAM_KEY, f"{self.role}|{stage}|sum", total)
+            process = f"{socket.gethostname()}:{os.getpid()}"
+            for name, value in gauges.items():
+                pipe.hset(GAUGE_KEY, f"{name}|{self.role}|{process}", json.dumps([value, time.time()]))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error flushing metrics: {str(e)}")
+            # 推送失败时保留增量，下次一起推送
+            with self._lock:
+                for stage, (counts, total) in pending.items():
+                    current, current_total = self._pending.get(stage) or ([0] * len(self.buckets), 0.0)
+                    self._pending[stage] = ([a + b for a, b in zip(current, counts)], current_total + total)
+
+
+_metrics = StageMetrics()
+atexit.register(_metrics.flush)
+
+
+def set_role(role: str):
+    """Role label for this process ('web' or 'worker')"""
+    _metrics.role = role
+
+
+def get_role() -> str:
+    return _metrics.role
+
+
+def observe(stage: str, seconds: float):
+    """Record a stage duration (also added to the current lookup's timing, see tracing.py)"""
+    _metrics.observe(stage, seconds)
+    record_phase(stage, seconds)
+
+
+def add_gauge(name: str, delta: float):
+    """Change a per-process gauge (summed over live processes when scraped)"""
+    _metrics.add_gauge(name, delta)
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the duration of the block as a stage (also when it raises)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+
+def flush():
+    _metrics.flush()
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _histogram_lines(fields: Dict[str, str]) -> List[str]:
+    series: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for field, value in fields.items():
+        role, stage, bound = field.rsplit('|', 2)
+        series.setdefault((role, stage), {})[bound] = float(value)
+
+    lines = [
+        "# HELP crawler_stage_seconds Time spent in each stage of an address lookup",
+        "# TYPE crawler_stage_seconds histogram",
+    ]
+    for (role, stage), values in sorted(series.items()):
+        total = values.pop('sum', 0.0)
+        cumulative = 0
+        # 只有非零的桶写入 Redis，输出时补齐所有配置的桶
+        for bound in sorted(set(values) | set(map(_le, _metrics.buckets)), key=float):
+            cumulative += int(values.get(bound, 0))
+            lines.append(f"crawler_stage_seconds_bucket{{{_labels(role=role, stage=stage, le=bound)}}} {cumulative}")
+        lines.append(f"crawler_stage_seconds_sum{{{_labels(role=role, stage=stage)}}} {total}")
+        lines.append(f"crawler_stage_seconds_count{{{_labels(role=role, stage=stage)}}} {cumulative}")
+    return lines
+
+
+def _process_gauge_lines(client, fields: Dict[str, str]) -> List[str]:
+    cutoff = time.time() - METRICS_FLUSH_INTERVAL * 3
+    totals: Dict[Tuple[str, str], float] = {}
+    expired = []
+    for field, value in fields.items():
+        name, role, _ = field.split('|', 2)
+        gauge_value, updated = json.loads(value)
+        if updated < cutoff:
+            expired.append(field)
+            continue
+        totals[(name, role)] = totals.get((name, role), 0) + gauge_value
+    if expired:
+        client.hdel(GAUGE_KEY, *expired)
+
+    lines = []
+    for name in sorted({name for name, _ in totals} | set(GAUGE_HELP)):
+        lines.append(f"# HELP crawler_{name} {GAUGE_HELP.get(name, name)}")
+        lines.append(f"# TYPE crawler_{name} gauge")
+        for (gauge, role), value in sorted(totals.items()):
+            if gauge == name:
+                lines.append(f"crawler_{name}{{{_labels(role=role)}}} {value:g}")
+    return lines
+
+
+_broker_clients: Dict[str, redis.Redis] = {}
+
+
+def _broker_url() -> Optional[str]:
+    try:
+        from django.conf import settings
+        if settings.configured and getattr(settings, 'CELERY_BROKER_URL', None):
+            return settings.CELERY_BROKER_URL
+    except ImportError:
+        pass
+    return os.getenv('CELERY_BROKER_URL')
+
+
+def _broker_client() -> Optional[redis.Redis]:
+    """Client for the Celery broker (CELERY_BROKER_URL, which may differ from REDIS_*); None when it is not Redis"""
+    url = _broker_url()
+    if not url:
+        return get_redis()
+    if urlparse(url).scheme not in ('redis', 'rediss', 'unix'):
+        return None
+    client = _broker_clients.get(url)
+    if client is None:
+        client = _broker_clients[url] = redis.Redis.from_url(
+            url, decode_responses=True, socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        )
+    return client
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    from .browser_slots import busy_slots
+
+    flush()
+    client = get_redis()
+    lines = _histogram_lines(client.hgetall(HISTOGRAM_KEY))
+    lines += _process_gauge_lines(client, client.hgetall(GAUGE_KEY))
+
+    lines += [
+        "# HELP crawler_browser_pool_capacity Browsers allowed across all workers",
+        "# TYPE crawler_browser_pool_capacity gauge",
+        f"crawler_browser_pool_capacity {BROWSER_POOL_CAPACITY}",
+        "# HELP crawler_browsers_in_use Browsers busy with a lookup across all workers",
+        "# TYPE crawler_browsers_in_use gauge",
+        f"crawler_browsers_in_use {busy_slots()}",
+        "# HELP crawler_celery_queue_depth Tasks waiting in the Celery broker",
+        "# TYPE crawler_celery_queue_depth gauge",
+    ]
+    # 队列在 broker 中，不一定是 REDIS_* 指向的库；非 Redis broker 不报告队列长度
+    broker = _broker_client()
+    if broker is not None:
+        pipe = broker.pipeline(transaction=False)
+        for queue in METRICS_CELERY_QUEUES:
+            pipe.llen(queue)
+        for queue, depth in zip(METRICS_CELERY_QUEUES, pipe.execute()):
+            lines.append(f"crawler_celery_queue_depth{{{_labels(queue=queue)}}} {depth}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,105 @@
+"""
+地址热度统计
+
+每次交互式查询（单个地址的请求和任务；批量上传和批量任务不计入）在 Redis 有序集合中给
+``{network}:{address}`` 加分，分数按指数衰减（半衰期 ``POPULARITY_HALF_LIFE``）。
+衰减用递增的加分实现：时刻 t 的一次查询加 ``2 ** ((t - 周期起点) / 半衰期)``，不需要定期改写已有分数。
+
+为避免分数无限增大，每 64 个半衰期换一个新的有序集合（键名带周期编号），
+rebase() 把上一周期的分数乘以 ``2 ** -64`` 并入新集合，排名保持不变。
+"""
+
+import time
+import logging
+from typing import List, Tuple, Iterable
+
+from .config import POPULARITY_KEY, POPULARITY_HALF_LIFE, POPULARITY_MAX_MEMBERS
+from .redis_client import get_redis, get_async_redis
+from .address_identity import identity
+
+logger = logging.getLogger(__name__)
+
+PERIOD_HALF_LIVES = 64
+
+
+class PopularityTracker:
+    """Decayed lookup counts per (network, address)"""
+
+    def __init__(self, half_life: int = POPULARITY_HALF_LIFE):
+        self.half_life = half_life
+        self.period_length = half_life * PERIOD_HALF_LIVES
+
+    def _period(self, now: float) -> int:
+        return int(now // self.period_length)
+
+    def _key(self, period: int) -> str:
+        return f"{POPULARITY_KEY}:{period}"
+
+    def _increment(self, now: float) -> float:
+        return 2 ** ((now - self._period(now) * self.period_length) / self.half_life)
+
+    @staticmethod
+    def member(address: str, network: str) -> str:
+        return identity(address, network).key
+
+    def _members(self, addresses: Iterable[str], network: str) -> List[str]:
+        return list(dict.fromkeys(self.member(address, network) for address in addresses))
+
+    def record(self, addresses: Iterable[str], network: str):
+        """Count one lookup for each address"""
+        members = self._members(addresses, network)
+        if not members:
+            return
+        now = time.time()
+        key, increment = self._key(self._period(now)), self._increment(now)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for member in members:
+                pipe.zincrby(key, increment, member)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording lookups: {str(e)}")
+
+    async def arecord(self, addresses: Iterable[str], network: str):
+        """Async record()"""
+        members = self._members(addresses, network)
+        if not members:
+            return
+        now = time.time()
+        key, increment = self._key(self._period(now)), self._increment(now)
+        try:
+            async with get_async_redis().pipeline(transaction=False) as pipe:
+                for member in members:
+                    pipe.zincrby(key, increment, member)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording lookups: {str(e)}")
+
+    def rebase(self):
+        """Carry the previous period's scores into the current set and trim it to POPULARITY_MAX_MEMBERS"""
+        period = self._period(time.time())
+        key, previous = self._key(period), self._key(period - 1)
+        client = get_redis()
+        if client.exists(previous):
+            pipe = client.pipeline()
+            pipe.zunionstore(key, {key: 1, previous: 2 ** -PERIOD_HALF_LIVES}, aggregate='SUM')
+            pipe.delete(previous)
+            pipe.execute()
+            logger.info(f"Carried popularity scores into period {period}")
+        client.zremrangebyrank(key, 0, -(POPULARITY_MAX_MEMBERS + 1))
+
+    def top(self, n: int) -> List[Tuple[str, str, float]]:
+        """Most popular (network, address, score), best first; score is in lookups decayed to now"""
+        now = time.time()
+        rows = get_redis().zrevrange(self._key(self._period(now)), 0, n - 1, withscores=True)
+        scale = self._increment(now)
+        result = []
+        for member, score in rows:
+            network, address = member.split(':', 1)
+            result.append((network.upper(), address, score / scale))
+        return result
+
+    def score(self, address: str, network: str) -> float:
+        now = time.time()
+        score = get_redis().zscore(self._key(self._period(now)), self.member(address, network))
+        return (score or 0.0) / self._increment(now)
@@ -0,0 +1,273 @@
+"""
+按需采样分析器（火焰图格式）
+
+生产环境吞吐下降时，无需重启即可对正在运行的 Django / Celery 进程采样：
+
+- 开关是 Redis 中的采样率 ``crawler_profiler:rate``（0 到 1，被采样的查询比例），各进程的采样线程每
+  ``PROFILER_POLL_INTERVAL`` 秒读取一次，查询本身只读缓存的值，不访问 Redis；键带过期时间即为"N 秒内采样所有查询"。
+  ``POST /api/profiler/``、``python manage.py profile_lookups`` 或直接 ``redis-cli SET`` 均可设置，
+  没有该键时使用 ``PROFILER_SAMPLE_RATE``（默认 0，不采样）
+- 被选中的查询（``get_address_info`` 中的 ``profile_lookup()``）在执行期间，后台线程每 ``PROFILER_INTERVAL``
+  秒用 ``sys._current_frames()`` 读取相关线程的调用栈：事件循环线程（``loop``）和线程池中执行爬虫、
+  解析页面的线程（``scrape``）。没有被采样的查询时后台线程只定期读取采样率
+- 调用栈按 ``{role};{线程类型};{外层帧};...;{内层帧}`` 聚合计数，与指标一样定期 HINCRBY 到 Redis，
+  所有进程汇总在一起；``GET /api/profiler/stacks/`` 返回 collapsed 格式（每行 ``栈 次数``），
+  可直接交给 flamegraph.pl、speedscope 或 inferno
+"""
+
+import os
+import sys
+import time
+import atexit
+import random
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+from .config import (
+    PROFILER_KEY_PREFIX,
+    PROFILER_SAMPLE_RATE,
+    PROFILER_INTERVAL,
+    PROFILER_MAX_DEPTH,
+    PROFILER_POLL_INTERVAL,
+    METRICS_FLUSH_INTERVAL,
+)
+from .redis_client import get_redis
+from .metrics import get_role
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY = f"{PROFILER_KEY_PREFIX}:rate"
+STACKS_KEY = f"{PROFILER_KEY_PREFIX}:stacks"
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_profiled: ContextVar[bool] = ContextVar('crawler_profiled', default=False)
+
+
+@lru_cache(maxsize=4096)
+def _frame_name(filename: str, name: str) -> str:
+    """``path:function`` with the path relative to the project or site-packages"""
+    for marker in ('site-packages' + os.sep, 'dist-packages' + os.sep):
+        if marker in filename:
+            return f"{filename.rsplit(marker, 1)[1]}:{name}"
+    if filename.startswith(PROJECT_ROOT + os.sep):
+        return f"{os.path.relpath(filename, PROJECT_ROOT)}:{name}"
+    # 标准库等：保留最后两级路径，如 asyncio/base_events.py
+    return f"{os.sep.join(filename.split(os.sep)[-2:])}:{name}"
+
+
+def _parse_rate(value) -> float:
+    return min(max(float(value), 0.0), 1.0)
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads working on a profiled lookup, counts collapsed stacks"""
+
+    def __init__(self, interval: float = PROFILER_INTERVAL, flush_interval: float = METRICS_FLUSH_INTERVAL,
+                 max_depth: int = PROFILER_MAX_DEPTH):
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._threads: Dict[int, List] = {}  # thread ident -> [kind, 正在采样的查询数]
+        self._stacks: Counter = Counter()
+        self._wake = threading.Event()
+        self._pid = None
+        self._rate = PROFILER_SAMPLE_RATE
+        self._rate_checked = float('-inf')
+
+    def rate(self) -> float:
+        """Current sample rate as last read by the sampler thread (no Redis access)"""
+        return self._rate
+
+    def poll_rate(self):
+        """Read the Redis flag (else the default) when PROFILER_POLL_INTERVAL has passed; runs in the sampler thread"""
+        now = time.monotonic()
+        if now - self._rate_checked < PROFILER_POLL_INTERVAL:
+            return
+        self._rate_checked = now
+        try:
+            value = get_redis().get(RATE_KEY)
+            self._rate = _parse_rate(value) if value is not None else PROFILER_SAMPLE_RATE
+        except Exception as e:
+            logger.error(f"Error reading profiler sample rate: {str(e)}")
+            self._rate = PROFILER_SAMPLE_RATE
+
+    def refresh(self):
+        """Have the sampler thread read the Redis flag now instead of waiting for the poll interval"""
+        self._ensure_sampler()
+        self._rate_checked = float('-inf')
+        self._wake.set()
+
+    def pick(self) -> bool:
+        self._ensure_sampler()
+        rate = self.rate()
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def _ensure_sampler(self):
+        # 与 metrics 相同：fork 之后子进程没有采样线程，按 pid 重新启动，丢弃继承来的数据
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self._threads, self._stacks = {}, Counter()
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+            threading.Thread(target=self._run, name='profiler-sampler', daemon=True).start()
+
+    @contextmanager
+    def sampling(self, kind: str):
+        """Sample the calling thread while the block runs"""
+        self._ensure_sampler()
+        ident = threading.get_ident()
+        with self._lock:
+            entry = self._threads.setdefault(ident, [kind, 0])
+            entry[1] += 1
+        self._wake.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    self._threads.pop(ident, None)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            # 采样线程退出后不会重新启动（_pid 已设置），任何异常都只记录
+            try:
+                self._wake.clear()
+                self.poll_rate()
+                if not self._threads:
+                    self.flush()
+                    # 空闲时也按 PROFILER_POLL_INTERVAL 醒来读取采样率
+                    self._wake.wait(PROFILER_POLL_INTERVAL)
+                    last_flush = time.monotonic()
+                    continue
+                time.sleep(self.interval)
+                self.sample()
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    self.flush()
+                    last_flush = time.monotonic()
+            except Exception as e:
+                logger.error(f"Error in profiler sampler: {str(e)}")
+                time.sleep(self.interval)
+
+    def sample(self):
+        """Record the current stack of every registered thread"""
+        frames = sys._current_frames()
+        with self._lock:
+            threads = [(ident, entry[0]) for ident, entry in self._threads.items()]
+        role = get_role()
+        samples = []
+        for ident, kind in threads:
+            frame = frames.get(ident)
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                # co_qualname 从 Python 3.11 开始才有
+                names.append(_frame_name(code.co_filename, getattr(code, 'co_qualname', code.co_name)))
+                frame = frame.f_back
+            if names:
+                samples.append(';'.join([role, kind] + names[::-1]))
+        if samples:
+            with self._lock:
+                self._stacks.update(samples)
+
+    def flush(self):
+        """Add this process's stack counts to the Redis totals"""
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+        if not stacks:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for stack, count in stacks.items():
+                pipe.hincrby(STACKS_KEY, stack, count)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error flushing profiler stacks: {str(e)}")
+            with self._lock:
+                self._stacks.update(stacks)
+
+
+_profiler = SamplingProfiler()
+atexit.register(_profiler.flush)
+
+
+@contextmanager
+def profile_lookup():
+    """Sample the calling thread (the event loop) during one lookup when the sample rate picks it; yields whether it did"""
+    if _profiled.get() or not _profiler.pick():
+        yield False
+        return
+    token = _profiled.set(True)
+    try:
+        with _profiler.sampling('loop'):
+            yield True
+    finally:
+        _profiled.reset(token)
+
+
+@contextmanager
+def profile_thread(kind: str):
+    """Sample the calling thread too when it works for a profiled lookup (run it in a copied context)"""
+    if not _profiled.get():
+        yield
+        return
+    with _profiler.sampling(kind):
+        yield
+
+
+def start(rate: float = 1.0, seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Set the sample rate of all processes; it falls back to PROFILER_SAMPLE_RATE after ``seconds``"""
+    rate = _parse_rate(rate)
+    get_redis().set(RATE_KEY, rate, ex=int(seconds) if seconds else None)
+    _profiler.refresh()
+    return status()
+
+
+def stop() -> Dict[str, Any]:
+    """Remove the Redis flag (PROFILER_SAMPLE_RATE applies again)"""
+    get_redis().delete(RATE_KEY)
+    _profiler.refresh()
+    return status()
+
+
+def status() -> Dict[str, Any]:
+    client = get_redis()
+    pipe = client.pipeline(transaction=False)
+    pipe.get(RATE_KEY)
+    pipe.ttl(RATE_KEY)
+    pipe.hlen(STACKS_KEY)
+    value, ttl, stacks = pipe.execute()
+    return {
+        "rate": _parse_rate(value) if value is not None else PROFILER_SAMPLE_RATE,
+        "source": "redis" if value is not None else "default",
+        "expires_in": ttl if value is not None and ttl >= 0 else None,
+        "default_rate": PROFILER_SAMPLE_RATE,
+        "interval": _profiler.interval,
+        "stacks": stacks,
+    }
+
+
+def collapsed_stacks(role: Optional[str] = None) -> str:
+    """Aggregated stacks of all processes, one ``stack count`` line each (optionally one role only)"""
+    _profiler.flush()
+    lines = []
+    for stack, count in get_redis().hgetall(STACKS_KEY).items():
+        if role is None or stack.split(';', 1)[0] == role:
+            lines.append(f"{stack} {int(count)}")
+    return ''.join(f"{line}\n" for line in sorted(lines))
+
+
+def reset_stacks():
+    """Drop the aggregated stacks (processes keep adding new samples)"""
+    get_redis().delete(STACKS_KEY)
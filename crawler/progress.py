@@ -0,0 +1,200 @@
+"""
+任务进度协议
+
+每个任务的事件都追加到该任务的事件日志（见 ``event_log.py``），外层格式保持 ``{"message": {...}}``，
+每条事件带递增的 ``seq``：
+
+- ``event: "result"``   单个地址的结果（增量），每个结果只发送一次，``index`` 为结果序号
+- ``event: "progress"`` 进度心跳，按 ``WS_PROGRESS_INTERVAL`` 合并发送
+- ``event: "summary"``  最终汇总，只包含计数和 ``results_url``，不再携带完整结果
+
+事件带有发送时所在请求 / 任务的 ``trace_id``（见 ``tracing.py``），请求了耗时分解的结果还带有 ``timing``。
+
+客户端断线重连时可以通过 ``?since=<seq>`` 从指定序号续传；结果同时写入 Redis 列表，
+完整结果通过 ``results_url`` 分页获取。
+"""
+
+import json
+import logging
+import time
+from typing import Optional, Dict, Any, List
+
+from .config import (
+    WS_GROUP_PREFIX,
+    WS_PROGRESS_INTERVAL,
+    TASK_KEY_PREFIX,
+    TASK_RESULT_TTL,
+)
+from .event_log import TaskEventLog
+from .redis_client import get_redis, get_async_redis
+from .metrics import timed
+from .tracing import request_trace_id
+
+logger = logging.getLogger(__name__)
+
+
+def task_group_name(task_id: str) -> str:
+    """Channel layer group for a task"""
+    return f"{WS_GROUP_PREFIX}{task_id}"
+
+
+def task_results_url(task_id: str) -> str:
+    """Fetch link for the full results of a task"""
+    return f"/api/crawler/{task_id}/result/"
+
+
+def task_export_url(task_id: str, file_format: str = 'csv') -> str:
+    """Download link for all results of a task"""
+    return f"/api/crawler/{task_id}/export/{file_format}/"
+
+
+class TaskResultStore:
+    """Server-side store for task results and task metadata"""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.results_key = f"{TASK_KEY_PREFIX}:{task_id}:results"
+        self.meta_key = f"{TASK_KEY_PREFIX}:{task_id}:meta"
+
+    def append(self, item: Dict[str, Any]) -> int:
+        """Append a result item and return its index (1-based)"""
+        client = get_redis()
+        pipe = client.pipeline()
+        pipe.rpush(self.results_key, json.dumps(item, ensure_ascii=False))
+        pipe.expire(self.results_key, TASK_RESULT_TTL)
+        index, _ = pipe.execute()
+        return index
+
+    def get_results(self, start: int = 0, stop: int = -1) -> List[Dict[str, Any]]:
+        """Return result items by 0-based inclusive index range"""
+        return [json.loads(item) for item in get_redis().lrange(self.results_key, start, stop)]
+
+    def count(self) -> int:
+        return get_redis().llen(self.results_key)
+
+    def set_meta(self, **fields):
+        client = get_redis()
+        pipe = client.pipeline()
+        pipe.hset(self.meta_key, mapping={k: json.dumps(v) for k, v in fields.items()})
+        pipe.expire(self.meta_key, TASK_RESULT_TTL)
+        pipe.execute()
+
+    def get_meta(self) -> Dict[str, Any]:
+        return {k: json.loads(v) for k, v in get_redis().hgetall(self.meta_key).items()}
+
+    async def aget_meta(self) -> Dict[str, Any]:
+        return {k: json.loads(v) for k, v in (await get_async_redis().hgetall(self.meta_key)).items()}
+
+
+class ProgressReporter:
+    """Publish delta-based, throttled progress for a task"""
+
+    def __init__(self, task_id: str, total: int = 0, interval: float = WS_PROGRESS_INTERVAL,
+                 network: Optional[str] = None):
+        self.task_id = task_id
+        self.total = total
+        self.interval = interval
+        self.store = TaskResultStore(task_id)
+        self.event_log = TaskEventLog(task_id)
+        self.seq = 0
+        self.index = 0
+        self.succeeded = 0
+        self.failed = 0
+        self._last_tick = 0.0
+        self._last_tick_count = -1
+        meta = {'status': 'processing', 'total': total}
+        if network:
+            meta['network'] = network  # network 随元数据保存，导出时作为一列
+        if request_trace_id():
+            meta['trace_id'] = request_trace_id()
+        try:
+            self.store.set_meta(**meta)
+        except Exception as e:
+            logger.error(f"Error storing meta for task {self.task_id}: {str(e)}")
+
+    def extend(self, count: int):
+        """Grow the total as a streamed input is read"""
+        self.total += count
+        try:
+            self.store.set_meta(total=self.total)
+        except Exception as e:
+            logger.error(f"Error storing meta for task {self.task_id}: {str(e)}")
+
+    def _send(self, message: Dict[str, Any]):
+        message['task_id'] = self.task_id
+        if request_trace_id():
+            message['trace_id'] = request_trace_id()
+        try:
+            with timed('event_publish'):
+                self.seq = self.event_log.append(message)
+        except Exception as e:
+            logger.error(f"Error sending progress for task {self.task_id}: {str(e)}")
+
+    def add_result(self, address: str, result: Dict[str, Any]) -> int:
+        """Record a single address result and send it as a delta"""
+        if result.get("success"):
+            self.succeeded += 1
+            item = {
+                "status": "completed",
+                "data": {"address": address, "result": result.get("data")}
+            }
+        else:
+            self.failed += 1
+            item = {
+                "status": "error",
+                "data": {"address": address, "error": result.get("error"), "reason": result.get("reason")}
+            }
+        if result.get("_timing"):
+            item["timing"] = result["_timing"]
+
+        try:
+            self.index = self.store.append(item)
+        except Exception as e:
+            logger.error(f"Error storing result for task {self.task_id}: {str(e)}")
+            self.index += 1
+
+        self._send({"event": "result", "index": self.index, **item})
+        self.tick()
+        return self.index
+
+    def tick(self, force: bool = False):
+        """Send a progress tick, coalesced to at most one per interval"""
+        current = self.succeeded + self.failed
+        now = time.monotonic()
+        if current == self._last_tick_count:
+            return
+        if not force and current < self.total and now - self._last_tick < self.interval:
+            return
+
+        self._last_tick = now
+        self._last_tick_count = current
+        self._send({
+            "event": "progress",
+            "status": "processing",
+            "progress": (current / self.total) * 100 if self.total else 100,
+            "current": current,
+            "total": self.total,
+        })
+
+    def finish(self, status: str = "completed", error: Optional[str] = None) -> Dict[str, Any]:
+        """Send the final summary and return it"""
+        self.tick(force=True)
+        summary = {
+            "event": "summary",
+            "status": status,
+            "progress": 100,
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "results_url": task_results_url(self.task_id),
+        }
+        if error:
+            summary["error"] = error
+
+        self._send(summary)
+        try:
+            self.store.set_meta(**{k: v for k, v in summary.items() if k != "event"})
+        except Exception as e:
+            logger.error(f"Error storing summary for task {self.task_id}: {str(e)}")
+
+        return summary
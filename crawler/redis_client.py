@@ -0,0 +1,123 @@
+"""
+共享的 Redis 连接层
+
+同一进程内所有组件（缓存、任务结果、事件日志、工具脚本）共用连接池：
+
+- ``get_redis()``        同步客户端，每种 decode_responses 设置一个进程级连接池
+- ``get_async_redis()``  ``redis.asyncio`` 客户端，连接池绑定到当前事件循环
+- ``get_stream_redis()`` 只用于阻塞读取（XREAD BLOCK）的异步客户端，单独的连接池：
+  每个打开的任务 WebSocket 阻塞读取时占用一个连接，不能挤占缓存等普通命令的连接
+
+连接参数优先读取 Django settings 中的 ``REDIS_*``，未配置 Django 时（例如工具脚本）
+使用 ``crawler/config.py`` 中的默认值。连接池满时等待空闲连接，而不是直接报错。
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Any
+
+import redis
+import redis.asyncio as aioredis
+
+from .config import (
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_DB,
+    REDIS_PASSWORD,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_STREAM_MAX_CONNECTIONS,
+    REDIS_POOL_TIMEOUT,
+    REDIS_SOCKET_TIMEOUT,
+    REDIS_CONNECT_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[bool, redis.BlockingConnectionPool] = {}
+_pools_lock = threading.Lock()
+_async_pools = weakref.WeakKeyDictionary()
+
+
+def get_redis_settings() -> Dict[str, Any]:
+    """Connection settings: Django settings when configured, crawler.config otherwise"""
+    values = {
+        'host': REDIS_HOST,
+        'port': REDIS_PORT,
+        'db': REDIS_DB,
+        'password': REDIS_PASSWORD,
+        'max_connections': REDIS_MAX_CONNECTIONS,
+    }
+    try:
+        from django.conf import settings
+        if settings.configured:
+            values = {name: getattr(settings, f"REDIS_{name.upper()}", value) for name, value in values.items()}
+    except ImportError:
+        pass
+    return values
+
+
+def _pool_kwargs(decode_responses: bool, **overrides) -> Dict[str, Any]:
+    values = get_redis_settings()
+    values.update({name: value for name, value in overrides.items() if value is not None})
+    return dict(
+        **values,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        health_check_interval=30,
+        decode_responses=decode_responses,
+    )
+
+
+def create_pool(decode_responses: bool = True, **overrides) -> redis.BlockingConnectionPool:
+    """A new sync pool with the configured timeouts; overrides (host, port, db, password) replace settings"""
+    return redis.BlockingConnectionPool(**_pool_kwargs(decode_responses, **overrides))
+
+
+def get_redis(decode_responses: bool = True) -> redis.Redis:
+    """Sync client on the shared process-wide pool"""
+    pool = _pools.get(decode_responses)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(decode_responses)
+            if pool is None:
+                pool = create_pool(decode_responses)
+                _pools[decode_responses] = pool
+    return redis.Redis(connection_pool=pool)
+
+
+def _async_pool(name, decode_responses: bool, **overrides) -> aioredis.BlockingConnectionPool:
+    loop = asyncio.get_running_loop()
+    pools = _async_pools.get(loop)
+    if pools is None:
+        pools = _async_pools[loop] = {}
+    pool = pools.get((name, decode_responses))
+    if pool is None:
+        pool = pools[(name, decode_responses)] = aioredis.BlockingConnectionPool(
+            **_pool_kwargs(decode_responses, **overrides)
+        )
+    return pool
+
+
+def get_async_redis(decode_responses: bool = True) -> aioredis.Redis:
+    """Async client on a pool shared by everything running on the current event loop"""
+    return aioredis.Redis(connection_pool=_async_pool('default', decode_responses))
+
+
+def get_stream_redis(decode_responses: bool = True) -> aioredis.Redis:
+    """Async client for blocking stream reads only, on its own per-loop pool"""
+    return aioredis.Redis(connection_pool=_async_pool(
+        'stream', decode_responses, max_connections=REDIS_STREAM_MAX_CONNECTIONS
+    ))
+
+
+async def release_async_pools():
+    """Disconnect the async pools of the current event loop; call before closing a short-lived loop"""
+    pools = _async_pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        try:
+            await pool.disconnect()
+        except Exception as e:
+            logger.error(f"Error closing Redis pool: {str(e)}")
@@ -2,12 +2,13 @@ import logging
 from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 import time
+from .config import MISTTRACK_LIGHT_URL
 
 logger = logging.getLogger(__name__)
 
 class PlaywrightScraper:
-    def __init__(self):
-        self.base_url = "https://light.misttrack.io"
+    def __init__(self, base_url=MISTTRACK_LIGHT_URL):
+        self.base_url = base_url
         self.playwright = None
         self.browser = None
         self.setup_browser()
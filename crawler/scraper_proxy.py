@@ -4,12 +4,14 @@ import random
 import time
 from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
+from .config import MISTTRACK_LIGHT_URL
+from .tracing import count_retry
 
 logger = logging.getLogger(__name__)
 
 class ProxyScraper:
-    def __init__(self):
-        self.base_url = "https://light.misttrack.io"
+    def __init__(self, base_url=MISTTRACK_LIGHT_URL):
+        self.base_url = base_url
         self.ua = UserAgent()
         self.proxies = []
         self.load_proxies()
@@ -48,6 +50,8 @@ class ProxyScraper:
         logger.info(f"Searching address {address} for coin {coin}")
         
         for attempt in range(max_retries):
+            if attempt:
+                count_retry()
             try:
                 proxy = self.get_random_proxy()
                 headers = self.get_headers()
@@ -7,12 +7,13 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import time
+from .config import MISTTRACK_BASE_URL
 
 logger = logging.getLogger(__name__)
 
 class SeleniumScraper:
-    def __init__(self):
-        self.base_url = "https://misttrack.io/aml_risks"
+    def __init__(self, base_url=MISTTRACK_BASE_URL):
+        self.base_url = base_url
         self.setup_driver()
 
     def setup_driver(self):
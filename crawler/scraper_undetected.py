@@ -6,6 +6,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
+from .browser_slots import acquire_slot, release_slot
+from .config import MISTTRACK_BASE_URL, SNAPSHOT_RECORD_DIR
+from .metrics import timed, observe, add_gauge
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,7 @@ class BrowserPool:
                 browser = uc.Chrome(options=options)
                 browser.set_page_load_timeout(30)  # 页面加载超时时间
                 browser.implicitly_wait(5)  # 减少隐式等待时间
+                add_gauge('browsers_open', 1)
                 self.browsers.append(browser)
             return self.browsers.pop(0)
         except Exception as e:
@@ -49,14 +53,28 @@ class BrowserPool:
         """安全地关闭浏览器"""
         try:
             if browser:
-                browser.quit()
+                try:
+                    browser.quit()
+                finally:
+                    # 关闭失败的浏览器也不再归池管理
+                    add_gauge('browsers_open', -1)
         except Exception as e:
             logger.error(f"Error quitting browser: {str(e)}")
 
+    def close(self):
+        """关闭池中所有空闲的浏览器；每个爬虫实例有自己的池，丢弃前必须关闭，否则浏览器进程和 browsers_open 都不会减少"""
+        browsers, self.browsers = self.browsers, []
+        for browser in browsers:
+            self.quit_browser(browser)
+
+    def __del__(self):
+        if getattr(self, 'browsers', None):
+            self.close()
+
 class UndetectedScraper:
-    def __init__(self):
-        self.base_url = "https://misttrack.io/aml_risks"
-        self.browser_pool = BrowserPool(max_browsers=3)
+    def __init__(self, base_url=MISTTRACK_BASE_URL, max_browsers=3):
+        self.base_url = base_url
+        self.browser_pool = BrowserPool(max_browsers=max_browsers)
         self.driver = None
 
     def setup_driver(self):
@@ -74,105 +92,97 @@ class UndetectedScraper:
     def search_address(self, address):
         """使用Undetected ChromeDriver搜索地址"""
         browser_acquired = False
+        slot = None
+        started = time.perf_counter()
         try:
-            # 从池中获取浏览器
-            self.driver = self.browser_pool.get_browser()
+            # 从池中获取浏览器，并登记占用（后台预取只使用空闲容量）
+            with timed('browser_acquire'):
+                self.driver = self.browser_pool.get_browser()
             browser_acquired = True
+            slot = acquire_slot()
             
             url = f"{self.base_url}/{address}"
             logger.info(f"Searching address: {url}")
             
             # 设置页面加载超时
             self.driver.set_page_load_timeout(30)
-            self.driver.get(url)
+            with timed('navigation'):
+                self.driver.get(url)
             
             # 等待页面主体加载
             try:
-                WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
+                with timed('wait_body'):
+                    WebDriverWait(self.driver, 20).until(
+                        EC.presence_of_element_located((By.TAG_NAME, "body"))
+                    )
             except TimeoutException:
                 logger.warning("Timeout waiting for body to load, continuing anyway")
             
             # 等待loading消失
             try:
-                WebDriverWait(self.driver, 15).until_not(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".el-loading-mask"))
-                )
+                with timed('wait_loading_mask'):
+                    WebDriverWait(self.driver, 15).until_not(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, ".el-loading-mask"))
+                    )
             except TimeoutException:
                 logger.warning("Loading mask didn't disappear, continuing anyway")
             
             # 等待数据加载
             try:
-                WebDriverWait(self.driver, 15).until(
-                    lambda driver: driver.execute_script(
-                        "return !!(window.__NUXT__?.state?.address?.addressInfo || window.__NUXT__?.state?.address)"
+                with timed('wait_nuxt_state'):
+                    WebDriverWait(self.driver, 15).until(
+                        lambda driver: driver.execute_script(
+                            "return !!(window.__NUXT__?.state?.address?.addressInfo || window.__NUXT__?.state?.address)"
+                        )
                     )
-                )
             except TimeoutException:
                 logger.warning("Timeout waiting for data, continuing with available data")
             
             # 滚动页面以触发懒加载，并等待内容更新
-            self.driver.execute_script("""
-                window.scrollTo(0, document.body.scrollHeight);
-                return new Promise((resolve) => {
-                    const observer = new MutationObserver((mutations, obs) => {
-                        obs.disconnect();
-                        resolve();
-                    });
-                    observer.observe(document.body, {
-                        childList: true,
-                        subtree: true,
-                        attributes: true,
-                        characterData: true
+            with timed('wait_lazy_content'):
+                self.driver.execute_script("""
+                    window.scrollTo(0, document.body.scrollHeight);
+                    return new Promise((resolve) => {
+                        const observer = new MutationObserver((mutations, obs) => {
+                            obs.disconnect();
+                            resolve();
+                        });
+                        observer.observe(document.body, {
+                            childList: true,
+                            subtree: true,
+                            attributes: true,
+                            characterData: true
+                        });
+                        setTimeout(resolve, 1000);  // 最多等待1秒
                     });
-                    setTimeout(resolve, 1000);  // 最多等待1秒
-                });
-            """)
+                """)
             
             # 获取页面内容
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'lxml')
+            with timed('page_source'):
+                page_source = self.driver.page_source
             
             # 尝试从JavaScript状态中获取数据
             try:
-                risk_data = self.driver.execute_script("""
-                    return (
-                        window.__NUXT__?.state?.address?.addressInfo ||
-                        window.__NUXT__?.state?.address ||
-                        window.__NUXT__?.state ||
-                        window.__INITIAL_STATE__
-                    );
-                """)
+                with timed('read_state'):
+                    risk_data = self.driver.execute_script("""
+                        return (
+                            window.__NUXT__?.state?.address?.addressInfo ||
+                            window.__NUXT__?.state?.address ||
+                            window.__NUXT__?.state ||
+                            window.__INITIAL_STATE__
+                        );
+                    """)
                 if risk_data:
                     logger.info("Successfully extracted risk data")
             except Exception as e:
                 logger.error(f"Error extracting risk data from JavaScript: {str(e)}")
                 risk_data = None
             
-            # 提取表格数据
-            table_data = self._extract_table_data(soup)
-            
-            # 提取所需信息
-            result = {
-                "address": address,
-                "risk_score": self._extract_risk_score(soup),
-                "risk_level": self._extract_risk_level(soup, risk_data),
-                "risk_type": self._extract_risk_type(soup, risk_data),
-                "address_labels": self._extract_address_labels(soup),
-                "labels": self._extract_labels(soup),
-                "transactions": self._extract_transactions(soup),
-                "related_addresses": self._extract_related_addresses(soup),
-                "table_data": table_data,  # 添加表格数据
-                # "raw_html": page_source
-            }
-            
-            # 如果表格数据存在，使用它来更新风险类型和标签
-            if table_data:
-                first_row = table_data[0]
-                result["risk_type"] = first_row.get("Risk Type", "Unknown")
-                result["address_labels"] = first_row.get("Address/Risk Label", "Unknown")
-                result["volume"] = first_row.get("Volume(USD)/%", "Unknown")
+            with timed('extract'):
+                result = self.extract_result(address, page_source, risk_data)
+            if SNAPSHOT_RECORD_DIR:
+                from .benchmark.snapshots import record_page
+                record_page(SNAPSHOT_RECORD_DIR, address, url, page_source, risk_data, result)
             
             logger.info(f"Extracted data for address {address}")
             return result
@@ -181,6 +191,8 @@ class UndetectedScraper:
             logger.error(f"Error searching address {address}: {str(e)}")
             return {"error": str(e)}
         finally:
+            release_slot(slot)
+            observe('scrape', time.perf_counter() - started)
             # 只有在实际获取了浏览器的情况下才尝试返回
             if browser_acquired and self.driver:
                 try:
@@ -189,6 +201,35 @@ class UndetectedScraper:
                     logger.error(f"Error returning browser to pool: {str(e)}")
                 self.driver = None
 
+    def extract_result(self, address, page_source, risk_data=None, parser='lxml'):
+        """从页面源码和 Nuxt 状态中提取结果（不需要浏览器，快照基准也用它）"""
+        soup = BeautifulSoup(page_source, parser)
+        
+        # 提取表格数据
+        table_data = self._extract_table_data(soup)
+        
+        # 提取所需信息
+        result = {
+            "address": address,
+            "risk_score": self._extract_risk_score(soup),
+            "risk_level": self._extract_risk_level(soup, risk_data),
+            "risk_type": self._extract_risk_type(soup, risk_data),
+            "address_labels": self._extract_address_labels(soup),
+            "labels": self._extract_labels(soup),
+            "transactions": self._extract_transactions(soup),
+            "related_addresses": self._extract_related_addresses(soup),
+            "table_data": table_data,  # 添加表格数据
+            # "raw_html": page_source
+        }
+        
+        # 如果表格数据存在，使用它来更新风险类型和标签
+        if table_data:
+            first_row = table_data[0]
+            result["risk_type"] = first_row.get("Risk Type", "Unknown")
+            result["address_labels"] = first_row.get("Address/Risk Label", "Unknown")
+            result["volume"] = first_row.get("Volume(USD)/%", "Unknown")
+        return result
+
     def _extract_risk_score(self, soup):
         """提取风险分数"""
         try:
@@ -487,10 +528,17 @@ class UndetectedScraper:
             logger.error(f"Error extracting table data: {str(e)}")
             return []
 
-    def __del__(self):
-        """清理资源"""
+    def close(self):
+        """关闭正在使用和池中的浏览器"""
         try:
-            if hasattr(self, 'driver'):
-                self.driver.quit()
+            if getattr(self, 'driver', None):
+                self.browser_pool.quit_browser(self.driver)
+                self.driver = None
+            if getattr(self, 'browser_pool', None):
+                self.browser_pool.close()
         except Exception as e:
             logger.error(f"Error cleaning up driver: {str(e)}")
+
+    def __del__(self):
+        """清理资源"""
+        self.close()
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 import logging
 import re
+from .validators import CryptoAddressValidator
+from .address_identity import SUPPORTED_NETWORKS, canonical_address, normalize_network
 
 logger = logging.getLogger(__name__)
 
@@ -10,24 +12,50 @@ class EthereumAddressField(serializers.Field):
         if not re.match(r'^0x[a-fA-F0-9]{40}$', value):
             logger.error(f"Invalid Ethereum address format: {value}")
             raise serializers.ValidationError("Invalid Ethereum address format")
-        return value
+        return canonical_address(value)
 
     def to_representation(self, value):
         return value
 
+class CryptoAddressField(serializers.CharField):
+    """Address on any network CryptoAddressValidator supports, returned in canonical form"""
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        is_valid, message, _ = CryptoAddressValidator().validate(value)
+        if not is_valid:
+            logger.error(f"Invalid address format: {value}")
+            raise serializers.ValidationError(message)
+        return canonical_address(value)
+
+class NetworkField(serializers.ChoiceField):
+    """Network name, accepting aliases such as 'Solana'; returned in canonical upper-case form"""
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=SUPPORTED_NETWORKS, **kwargs)
+
+    def to_internal_value(self, data):
+        return super().to_internal_value(normalize_network(str(data)))
+
 class CrawlerTaskSerializer(serializers.Serializer):
-    address = EthereumAddressField()
-    network = serializers.ChoiceField(choices=['ETH', 'BSC', 'Solana'])
+    address = CryptoAddressField()
+    network = NetworkField()
     status = serializers.CharField(read_only=True)
     result = serializers.JSONField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
 
     def validate_address(self, value):
         if not value:
-            logger.error("Ethereum address is required")
-            raise serializers.ValidationError("Ethereum address is required")
+            logger.error("Address is required")
+            raise serializers.ValidationError("Address is required")
         return value
 
+    def validate(self, attrs):
+        _, _, possible_coins = CryptoAddressValidator().validate(attrs['address'])
+        if attrs['network'] not in possible_coins:
+            raise serializers.ValidationError({"address": f"Not a valid {attrs['network']} address"})
+        return attrs
+
 class FileUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
     
@@ -39,7 +67,9 @@ class FileUploadSerializer(serializers.Serializer):
         # 检查文件大小（限制为10MB）
         if value.size > 10 * 1024 * 1024:
             logger.error(f"File size {value.size} exceeds limit")
-            raise serializers.ValidationError("File size should not exceed 10MB")
+            raise serializers.ValidationError(
+                "File size should not exceed 10MB, use the chunked upload API (/api/crawler/upload/init/) for larger files"
+            )
             
         # 检查文件类型
         allowed_types = ['text/csv', 'application/vnd.ms-excel', 
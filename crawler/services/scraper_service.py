@@ -1,19 +1,64 @@
+import os
+import time
 import logging
 import asyncio
+import threading
+import contextvars
 import concurrent.futures
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
 from bs4 import BeautifulSoup
 from ..scraper_undetected import UndetectedScraper
 from ..cache_manager import CacheManager
+from ..popularity import PopularityTracker
 from ..validators import CryptoAddressValidator
+from ..address_identity import identity, normalize_network
+from ..dedupe import Deduper
+from ..redis_client import release_async_pools
+from ..metrics import timed, observe, add_gauge
+from ..tracing import lookup, annotate
+from ..profiler import profile_lookup, profile_thread
+from ..config import MISTTRACK_BASE_URL, LOOKUP_TIMING, SCRAPER_EXECUTOR_WORKERS, REFRESH_PUBLISH_WORKERS
 
 logger = logging.getLogger(__name__)
 
+BATCH_SIZE = 5  # 每批并发爬取的地址数
+
+_executors: Dict[str, concurrent.futures.ThreadPoolExecutor] = {}
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor(name: str, max_workers: int) -> concurrent.futures.ThreadPoolExecutor:
+    """进程内按名称共享的有界线程池（fork 之后按 pid 重建）"""
+    global _executor_pid
+    executor = _executors.get(name) if _executor_pid == os.getpid() else None
+    if executor is None:
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executors.clear()
+                _executor_pid = os.getpid()
+            executor = _executors.get(name)
+            if executor is None:
+                executor = _executors[name] = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix=name
+                )
+    return executor
+
+
+def _scrape_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """有界爬虫线程池；线程都忙时的排队计入 executor_queue"""
+    return _shared_executor('scraper', SCRAPER_EXECUTOR_WORKERS)
+
+
+def _refresh_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """发布后台刷新任务的小线程池，阻塞的 broker 发布不占用事件循环和爬虫线程"""
+    return _shared_executor('refresh-publish', REFRESH_PUBLISH_WORKERS)
+
 class MistTrackScraperService:
     def __init__(self, address: str, network: str = 'ETH'):
-        self.address = address
-        self.network = network if network and network.lower() != 'undefined' else 'ETH'
-        self.base_url = f"https://misttrack.io/aml_risks/{self.network}/{self.address}"
+        self.address = (address or '').strip()
+        self.network = normalize_network(network)
+        self.base_url = f"{MISTTRACK_BASE_URL}/{self.network}/{self.address}"
         self.validator = CryptoAddressValidator()
         self.scraper = None  # 延迟初始化
         self.cache_manager = CacheManager()
@@ -25,40 +70,335 @@ class MistTrackScraperService:
         return self.scraper
 
     @classmethod
-    async def process_addresses(cls, addresses: List[str], network: str = 'ETH') -> List[Dict[str, Any]]:
-        """并发处理多个地址"""
-        tasks = []
-        for address in addresses:
-            service = cls(address=address, network=network)
-            tasks.append(service.get_address_info())
-        
-        return await asyncio.gather(*tasks)
+    async def process_addresses(cls, addresses: List[str], network: str = 'ETH', check_cache: bool = True,
+                                bypass_negative: bool = False, validated: bool = False,
+                                timing: bool = LOOKUP_TIMING) -> List[Dict[str, Any]]:
+        """并发处理多个地址
+
+        先批量验证地址格式，再用一次批量查询（MGET）解析所有已缓存的地址，只对未命中的地址爬取，
+        结果按原顺序返回，并以流水线分块写回缓存（失败/无数据的结果写入短期负缓存）。
+        调用方已做过批量验证 / 批量缓存查询时可传 validated=True / check_cache=False。
+        timing=True 时爬取的结果带有 _timing（见 get_address_info）。
+        """
+        network = normalize_network(network)
+        valid = [True] * len(addresses) if validated else cls.validate_batch(addresses)
+        valid_addresses = [address for address, ok in zip(addresses, valid) if ok]
+        cached = {}
+        if check_cache:
+            cached = await cls.alookup_cached(valid_addresses, network, bypass_negative, record_popularity=True)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(addresses)
+        pending: Dict[str, List[int]] = {}
+        for i, address in enumerate(addresses):
+            if not valid[i]:
+                results[i] = cls.invalid_result()
+            elif address in cached:
+                results[i] = cached[address]
+            else:
+                # 同一批次中重复的地址（包括大小写不同的 EVM 地址）只爬取一次
+                pending.setdefault(identity(address, network).address, []).append(i)
+
+        if pending:
+            tasks = [
+                cls(address=address, network=network).get_address_info(use_cache=False, validate=False, timing=timing)
+                for address in pending
+            ]
+            fetched = await asyncio.gather(*tasks)
+
+            for (address, indexes), result in zip(pending.items(), fetched):
+                for i in indexes:
+                    results[i] = result
+            await cls.astore_results(dict(zip(pending, fetched)), network)
+
+        return results
+
+    @classmethod
+    def process_stream(cls, chunks: Iterable[List[str]], network: str, reporter, bypass_negative: bool = False,
+                       batch_size: int = BATCH_SIZE, deduper: Optional[Deduper] = None,
+                       timing: bool = LOOKUP_TIMING, collect: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """同步执行批量流水线，逐块处理（用于文件上传和 Celery 批量任务）
+
+        每块先批量验证、去重、批量查询缓存，再按 batch_size 并发爬取未命中的地址；
+        同一地址在块内只爬取一次，之前（本任务前面的块，共享过滤器时包括其他任务）出现过的地址
+        等本块爬取完成后再查一次缓存，仍未命中才爬取（见 dedupe.py）。
+        每个结果通过 reporter 发送一次（完整结果由 reporter 保存在服务端）。
+        collect=True 时另外按输入顺序返回所有结果，内存随行数增长，只用于小批量；
+        默认返回 None，内存只与块大小有关。
+        块由生成器提供时，第一块读完即开始爬取。
+        """
+        network = normalize_network(network)
+        deduper = deduper or Deduper()
+        results: Optional[List[Dict[str, Any]]] = [] if collect else None
+        loop = asyncio.new_event_loop()
+        try:
+            for addresses in chunks:
+                reporter.extend(len(addresses))
+                if collect:
+                    offset = len(results)
+                    results.extend([None] * len(addresses))
+
+                def report(rows):
+                    for i, result in rows:
+                        if collect:
+                            results[offset + i] = result
+                        reporter.add_result(addresses[i], result)
+
+                valid = cls.validate_batch(addresses)
+                keys = [identity(address, network).key if ok else None for address, ok in zip(addresses, valid)]
+                chunk_keys = list(dict.fromkeys(key for key in keys if key))
+                fresh = {key for key, new in zip(chunk_keys, deduper.add_many(chunk_keys)) if new}
+
+                cached = cls.lookup_cached(
+                    [address for address, ok in zip(addresses, valid) if ok], network, bypass_negative
+                )
+                misses, repeats = [], []
+                for i, address in enumerate(addresses):
+                    if not valid[i]:
+                        report([(i, cls.invalid_result())])
+                    elif address in cached:
+                        report([(i, cached[address])])
+                    else:
+                        (misses if keys[i] in fresh else repeats).append(i)
+
+                report(cls._crawl_rows(loop, addresses, keys, misses, network, batch_size, timing))
+
+                if repeats:
+                    # 之前出现过的地址走缓存路径，Bloom 误判或其他任务尚未写入缓存的才爬取
+                    logger.info(f"Deferred {len(repeats)} repeated addresses to the cache path")
+                    cached = cls.lookup_cached([addresses[i] for i in repeats], network, bypass_negative)
+                    report((i, cached[addresses[i]]) for i in repeats if addresses[i] in cached)
+                    report(cls._crawl_rows(
+                        loop, addresses, keys, [i for i in repeats if addresses[i] not in cached], network, batch_size,
+                        timing
+                    ))
+        finally:
+            loop.run_until_complete(release_async_pools())
+            loop.close()
+        return results
+
+    @classmethod
+    def _crawl_rows(cls, loop, addresses: List[str], keys: List[str], rows: List[int], network: str,
+                    batch_size: int, timing: bool = LOOKUP_TIMING) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """按 batch_size 并发爬取 rows 中的地址，同一标识只爬取一次；逐批产出 (行号, 结果)"""
+        groups: Dict[str, List[int]] = {}
+        for i in rows:
+            groups.setdefault(keys[i], []).append(i)
+        pending = list(groups.values())
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            batch_addresses = [addresses[group[0]] for group in batch]
+            try:
+                batch_results = loop.run_until_complete(
+                    cls.process_addresses(batch_addresses, network, check_cache=False, validated=True, timing=timing)
+                )
+            except Exception as e:
+                logger.error(f"Error processing batch: {str(e)}")
+                batch_results = [{"success": False, "error": str(e)} for _ in batch_addresses]
+
+            for group, result in zip(batch, batch_results):
+                for i in group:
+                    yield i, result
+
+    @staticmethod
+    def validate_batch(addresses: List[str]) -> List[bool]:
+        """批量验证地址格式（向量化），返回与输入顺序一致的是否有效列表"""
+        if not addresses:
+            return []
+        frame, summary = CryptoAddressValidator().validate_many(addresses)
+        if summary['invalid']:
+            logger.info(f"Rejected {summary['invalid']}/{summary['total']} addresses with invalid format")
+        return frame['valid'].tolist()
+
+    @staticmethod
+    def invalid_result(message: str = "Invalid address format") -> Dict[str, Any]:
+        return {"success": False, "error": message, "reason": "invalid_address"}
+
+    @classmethod
+    def lookup_cached(cls, addresses: List[str], network: str = 'ETH', bypass_negative: bool = False,
+                      record_popularity: bool = False) -> Dict[str, Dict[str, Any]]:
+        """批量查询缓存，返回已缓存的查询结果
+
+        软过期的条目照常返回并触发后台刷新；bypass_negative=True 时忽略负缓存条目。
+        record_popularity=True 时计入地址热度（见 popularity.py），只用于交互式查询：
+        批量上传的大名单会挤占热门排名，让预取反复刷新它们
+        """
+        if record_popularity:
+            PopularityTracker().record(addresses, network)
+        with timed('cache_get'):
+            entries = CacheManager().get_cached_entries(addresses, network)
+        results, stale = cls._cached_results(entries, bypass_negative)
+        cls.schedule_refreshes(stale, network)
+        return results
+
+    @classmethod
+    async def alookup_cached(cls, addresses: List[str], network: str = 'ETH', bypass_negative: bool = False,
+                             record_popularity: bool = False) -> Dict[str, Dict[str, Any]]:
+        """lookup_cached 的异步版本，在事件循环中使用，不阻塞循环"""
+        if record_popularity:
+            await PopularityTracker().arecord(addresses, network)
+        with timed('cache_get'):
+            entries = await CacheManager().aget_cached_entries(addresses, network)
+        results, stale = cls._cached_results(entries, bypass_negative)
+        await cls.aschedule_refreshes(stale, network)
+        return results
+
+    @staticmethod
+    def _cached_results(entries, bypass_negative: bool) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """(已缓存的结果, 需要后台刷新的软过期地址)"""
+        results, stale = {}, []
+        for address, entry in entries.items():
+            if entry.is_negative and bypass_negative:
+                continue
+            if entry.is_stale:
+                stale.append(address)
+            results[address] = entry.to_result()
+        return results, stale
 
-    async def get_address_info(self) -> Dict[str, Any]:
-        """获取地址信息"""
+    @staticmethod
+    def negative_reason(result: Dict[str, Any]) -> Optional[str]:
+        """负缓存的原因代码；正常结果返回 None
+
+        地址格式错误不缓存，本地校验比查一次缓存更快
+        """
+        if not result["success"]:
+            if result.get("reason") == "invalid_address":
+                return None
+            error = str(result.get("error", "")).lower()
+            return "timeout" if "timeout" in error or "timed out" in error else "scrape_failed"
+
+        data = result.get("data") or {}
+        empty_values = ('Unknown', 'N/A', '')
+        if (not data.get("table_data")
+                and str(data.get("risk_level") or '') in empty_values
+                and str(data.get("risk_score") or '') in empty_values):
+            return "not_found"
+        return None
+
+    @classmethod
+    def _split_results(cls, results: Dict[str, Dict[str, Any]]):
+        positive = {}
+        negative = {}
+        for address, result in results.items():
+            reason = cls.negative_reason(result)
+            if reason:
+                negative[address] = (reason, {k: v for k, v in result.items() if k != '_timing'})
+            elif result["success"]:
+                positive[address] = result["data"]
+        return positive, negative
+
+    @classmethod
+    def store_results(cls, results: Dict[str, Dict[str, Any]], network: str):
+        """写回查询结果：正常结果按风险等级 TTL 缓存，失败/无数据的结果写入短期负缓存"""
+        positive, negative = cls._split_results(results)
+        cache_manager = CacheManager()
+        with timed('cache_set'):
+            cache_manager.cache_results(positive, network)
+            cache_manager.cache_negative_results(negative, network)
+
+    @classmethod
+    async def astore_results(cls, results: Dict[str, Dict[str, Any]], network: str):
+        """store_results 的异步版本"""
+        positive, negative = cls._split_results(results)
+        cache_manager = CacheManager()
+        with timed('cache_set'):
+            await cache_manager.acache_results(positive, network)
+            await cache_manager.acache_negative_results(negative, network)
+
+    @staticmethod
+    def _publish_refresh(addresses: List[str], network: str) -> bool:
+        """发布刷新任务，一批地址一条消息（调用方已持有刷新锁，发布失败时释放）"""
+        try:
+            from ..tasks import refresh_address, refresh_addresses
+            if len(addresses) == 1:
+                refresh_address.delay(addresses[0], network)
+            else:
+                refresh_addresses.delay(addresses, network)
+            logger.info(f"Scheduled background refresh for {len(addresses)} addresses on {network}")
+            return True
+        except Exception as e:
+            logger.error(f"Error scheduling refresh for {len(addresses)} addresses: {str(e)}")
+            CacheManager().release_refresh_locks(addresses, network)
+            return False
+
+    @classmethod
+    def schedule_refresh(cls, address: str, network: str) -> bool:
+        """在后台刷新软过期的缓存条目，同一条目同时只刷新一次；返回是否新安排了刷新"""
+        return cls.schedule_refreshes([address], network) > 0
+
+    @classmethod
+    def schedule_refreshes(cls, addresses: List[str], network: str) -> int:
+        """批量版本：一个流水线获取所有刷新锁，已在刷新的条目跳过，其余一起发布；返回新安排刷新的地址数"""
+        acquired = CacheManager().acquire_refresh_locks(addresses, network)
+        if not acquired or not cls._publish_refresh(acquired, network):
+            return 0
+        return len(acquired)
+
+    @classmethod
+    async def aschedule_refreshes(cls, addresses: List[str], network: str) -> int:
+        """schedule_refreshes 的异步版本：异步获取刷新锁，阻塞的 broker 发布交给有界线程池，不阻塞事件循环"""
+        acquired = await CacheManager().aacquire_refresh_locks(addresses, network)
+        if not acquired:
+            return 0
+        # 在复制的上下文中发布，任务消息头带上当前的追踪 ID
+        asyncio.get_running_loop().run_in_executor(
+            _refresh_executor(), contextvars.copy_context().run, cls._publish_refresh, acquired, network
+        )
+        return len(acquired)
+
+    async def get_address_info(self, use_cache: bool = True, bypass_negative: bool = False,
+                               validate: bool = True, timing: bool = LOOKUP_TIMING) -> Dict[str, Any]:
+        """获取地址信息
+
+        use_cache=False 时跳过缓存读写（由批量调用方统一处理）；
+        bypass_negative=True 时忽略负缓存条目，重新爬取；
+        validate=False 时跳过格式验证（调用方已批量验证）；
+        timing=True 时结果带有 _timing：追踪 ID、缓存层级、引擎、重试次数、总耗时和各阶段毫秒数（见 tracing.py）。
+        每次查询都有自己的追踪 ID，查询期间的日志都带有它；按采样率被选中的查询会被采样分析（见 profiler.py）
+        """
+        with lookup() as lookup_timing, profile_lookup():
+            result = await self._get_address_info(use_cache, bypass_negative, validate)
+            if timing:
+                result = {**result, "_timing": lookup_timing.as_dict()}
+            return result
+
+    async def _get_address_info(self, use_cache: bool, bypass_negative: bool, validate: bool) -> Dict[str, Any]:
         logger.info(f"Getting info for address {self.address} on network {self.network}")
         
         # 验证地址格式
-        valid, message, _ = self.validator.validate(self.address)
-        if not valid:
-            logger.error(f"Invalid address format: {self.address}")
-            return {"success": False, "error": message}
+        if validate:
+            valid, message, _ = self.validator.validate(self.address)
+            if not valid:
+                logger.error(f"Invalid address format: {self.address}")
+                return self.invalid_result(message)
 
         try:
-            # 检查缓存
-            cached_result = self.cache_manager.get_cached_result(self.address, self.network)
-            if cached_result:
+            # 检查缓存（软过期的条目直接返回，并在后台刷新）
+            if use_cache:
+                await PopularityTracker().arecord([self.address], self.network)
+            cached_entry = None
+            if use_cache:
+                with timed('cache_get'):
+                    cached_entry = await self.cache_manager.aget_cached_entry(self.address, self.network)
+            else:
+                annotate(cache='skipped')
+            if cached_entry and cached_entry.is_negative and bypass_negative:
+                annotate(cache='bypassed')
+            elif cached_entry:
+                annotate(engine='cache')
                 logger.info(f"Cache hit for {self.address} on {self.network}")
-                logger.info(f"Using cached result for {self.address}: {cached_result}")
-                return {"success": True, "data": cached_result}
+                logger.info(f"Using cached result for {self.address}: {cached_entry.to_result()}")
+                if cached_entry.is_stale:
+                    await self.aschedule_refreshes([self.address], self.network)
+                return cached_entry.to_result()
 
             # 如果没有缓存，爬取数据
             logger.info(f"Making request for address {self.address}")
             result = await self._make_request(self.base_url)
             
             # 缓存结果
-            if result["success"]:
-                self.cache_manager.cache_result(self.address, self.network, result["data"])
+            if use_cache:
+                await self.astore_results({self.address: result}, self.network)
             
             return result
             
@@ -70,12 +410,28 @@ class MistTrackScraperService:
         """使用线程池执行同步的爬虫操作"""
         try:
             loop = asyncio.get_event_loop()
-            with concurrent.futures.ThreadPoolExecutor() as pool:
+            scraper = self._get_scraper()  # 使用延迟初始化的爬虫
+            annotate(engine=type(scraper).__name__)
+            submitted = time.perf_counter()
+            waiting = [True]
+            add_gauge('executor_queue_depth', 1)
+
+            def search(address):
+                # 提交到开始执行之间的等待计入 executor_queue
+                waiting[0] = False
+                add_gauge('executor_queue_depth', -1)
+                observe('executor_queue', time.perf_counter() - submitted)
+                with profile_thread('scrape'):
+                    return scraper.search_address(address)
+
+            try:
+                # 在复制的上下文中执行，爬虫线程中的日志和阶段耗时归入当前查询
                 result = await loop.run_in_executor(
-                    pool,
-                    self._get_scraper().search_address,  # 使用延迟初始化的爬虫
-                    f"{self.network}/{self.address}"
+                    _scrape_executor(), contextvars.copy_context().run, search, f"{self.network}/{self.address}"
                 )
+            finally:
+                if waiting[0]:
+                    add_gauge('executor_queue_depth', -1)
             
             if "error" in result:
                 return {"success": False, "error": result["error"]}
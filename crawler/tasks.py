@@ -1,119 +1,239 @@
 from celery import shared_task
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-import json
-from .views import MistTrackScraper
+from celery.signals import worker_init, before_task_publish, task_prerun, task_postrun
+import time
+import asyncio
+import logging
+from .services import MistTrackScraperService
+from .services.scraper_service import BATCH_SIZE
+from .progress import ProgressReporter
+from .cache_manager import CacheManager
+from .redis_client import release_async_pools
+from .popularity import PopularityTracker
+from .browser_slots import free_slots
+from .config import PREFETCH_TOP_N, PREFETCH_LEAD_TIME, LOOKUP_TIMING
+from .chunked_upload import ChunkedUpload, UploadError
+from .ingestion import iter_upload_address_chunks, IngestionError
+from . import metrics
+from . import tracing
 
-channel_layer = get_channel_layer()
+logger = logging.getLogger(__name__)
+
+@worker_init.connect
+def _label_worker_metrics(**kwargs):
+    """Label stage timings recorded in Celery workers with role=worker"""
+    metrics.set_role('worker')
+
+# 追踪 ID 随任务消息头传递：任务在发布它的请求 / 任务的追踪 ID 下执行，日志和进度事件中的 trace_id 一致
+_trace_tokens = {}
+
+@before_task_publish.connect
+def _propagate_trace_id(headers=None, **kwargs):
+    trace_id = tracing.request_trace_id()
+    if trace_id and headers is not None:
+        headers.setdefault('trace_id', trace_id)
+
+@task_prerun.connect
+def _start_task_trace(task_id=None, task=None, **kwargs):
+    request = getattr(task, 'request', None)
+    trace_id = getattr(request, 'trace_id', None) or (getattr(request, 'headers', None) or {}).get('trace_id')
+    _trace_tokens[task_id] = tracing.start_trace(trace_id)[1]
+
+@task_postrun.connect
+def _end_task_trace(task_id=None, **kwargs):
+    token = _trace_tokens.pop(task_id, None)
+    if token is not None:
+        tracing.end_trace(token)
+
+def _run_batch(addresses, network, check_cache=True):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(
+            MistTrackScraperService.process_addresses(addresses, network, check_cache=check_cache)
+        )
+    finally:
+        loop.run_until_complete(release_async_pools())
+        loop.close()
 
 @shared_task(bind=True)
-def crawl_address(self, address, group_name):
+def crawl_address(self, address, task_id, network='ETH'):
     """
     爬取单个地址的任务
     """
+    reporter = ProgressReporter(task_id, total=1, network=network)
     try:
-        # 更新进度
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'task_progress',
-                'message': {
-                    'status': 'processing',
-                    'progress': 0,
-                    'address': address,
-                }
-            }
-        )
+        reporter.tick(force=True)
 
         # 执行爬取
-        scraper = MistTrackScraper()
-        result = scraper.search_address(address)
-
-        # 发送结果
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'task_progress',
-                'message': {
-                    'status': 'completed',
-                    'progress': 100,
-                    'address': address,
-                    'result': result
-                }
-            }
-        )
+        result = _run_batch([address], network)[0]
+        reporter.add_result(address, result)
+        reporter.finish()
 
-        return {'status': 'success', 'result': result}
+        if not result["success"]:
+            return {'status': 'error', 'error': result["error"]}
+        return {'status': 'success', 'result': result["data"]}
 
     except Exception as e:
         # 发送错误信息
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'task_progress',
-                'message': {
-                    'status': 'error',
-                    'progress': 100,
-                    'address': address,
-                    'error': str(e)
-                }
-            }
-        )
+        reporter.finish(status='error', error=str(e))
         return {'status': 'error', 'error': str(e)}
 
 @shared_task(bind=True)
-def crawl_batch(self, addresses, group_name):
+def crawl_batch(self, addresses, task_id, network='ETH', bypass_negative=False, timing=LOOKUP_TIMING):
     """
     批量爬取地址的任务
+
+    每个地址的结果只以增量形式发送一次，完成后发送汇总，完整结果通过 results_url 获取
     """
-    total = len(addresses)
-    results = []
+    reporter = ProgressReporter(task_id, network=network)
 
-    for i, address in enumerate(addresses):
+    try:
+        # 批量验证、批量查询缓存，只爬取有效且未命中的地址
+        MistTrackScraperService.process_stream([addresses], network, reporter, bypass_negative=bypass_negative,
+                                               timing=timing)
+    except Exception as e:
+        # 任何失败都要发送汇总，否则任务状态停在 processing，WebSocket 客户端一直等待
+        logger.error(f"Error processing batch task {task_id}: {str(e)}")
+        reporter.finish(status='error', error=str(e))
+        return {'status': 'error', 'error': str(e)}
+
+    # 发送完成汇总
+    summary = reporter.finish()
+
+    return {
+        'status': 'success',
+        'succeeded': summary['succeeded'],
+        'failed': summary['failed'],
+        'results_url': summary['results_url']
+    }
+
+@shared_task(bind=True)
+def crawl_upload(self, upload_id, task_id, bypass_negative=False, timing=LOOKUP_TIMING):
+    """
+    处理分片上传的文件
+
+    可以在上传完成之前启动：读取端等待后续分片，已到达的地址先开始爬取。
+    无论成功与否都发送汇总并删除上传的数据
+    """
+    upload = ChunkedUpload.load(upload_id)
+    if upload is None:
+        return {'status': 'error', 'error': 'Upload not found'}
+
+    reporter = ProgressReporter(task_id, network=upload.network)
+    try:
+        reader = upload.open_reader()
         try:
-            # 更新进度
-            progress = int((i / total) * 100)
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    'type': 'task_progress',
-                    'message': {
-                        'status': 'processing',
-                        'progress': progress,
-                        'current': i + 1,
-                        'total': total,
-                        'address': address,
-                    }
-                }
-            )
-
-            # 执行爬取
-            scraper = MistTrackScraper()
-            result = scraper.search_address(address)
-            results.append({
-                'address': address,
-                'status': 'success',
-                'result': result
-            })
-
-        except Exception as e:
-            results.append({
-                'address': address,
-                'status': 'error',
-                'error': str(e)
-            })
-
-    # 发送完成信息
-    async_to_sync(channel_layer.group_send)(
-        group_name,
-        {
-            'type': 'task_progress',
-            'message': {
-                'status': 'completed',
-                'progress': 100,
-                'results': results
-            }
-        }
-    )
-
-    return {'status': 'success', 'results': results}
+            chunks = iter_upload_address_chunks(reader)
+            MistTrackScraperService.process_stream(chunks, upload.network, reporter,
+                                                   bypass_negative=bypass_negative, timing=timing)
+        finally:
+            reader.close()
+    except (UploadError, IngestionError) as e:
+        # 先在会话中记下失败原因，客户端仍在上传的分片得到 410 而不是写入已删除的目录
+        upload.fail(str(e))
+        reporter.finish(status='error', error=str(e))
+        return {'status': 'error', 'error': str(e)}
+    except Exception as e:
+        logger.error(f"Error processing upload {upload_id}: {str(e)}")
+        upload.fail(str(e))
+        reporter.finish(status='error', error=str(e))
+        return {'status': 'error', 'error': str(e)}
+    finally:
+        upload.discard_data()
+
+    summary = reporter.finish()
+
+    return {
+        'status': 'success',
+        'succeeded': summary['succeeded'],
+        'failed': summary['failed'],
+        'results_url': summary['results_url']
+    }
+
+@shared_task
+def refresh_address(address, network='ETH'):
+    """
+    后台刷新软过期的缓存条目（stale-while-revalidate）
+    """
+    cache_manager = CacheManager()
+    try:
+        loop = asyncio.new_event_loop()
+        try:
+            service = MistTrackScraperService(address=address, network=network)
+            result = loop.run_until_complete(service.get_address_info(use_cache=False))
+        finally:
+            loop.close()
+
+        # 失败的刷新只写负缓存（NX），不会覆盖仍在使用的旧结果
+        MistTrackScraperService.store_results({address: result}, network)
+        if not result["success"]:
+            return {'status': 'error', 'error': result["error"]}
+        return {'status': 'success'}
+    finally:
+        cache_manager.release_refresh_lock(address, network)
+
+@shared_task
+def refresh_addresses(addresses, network='ETH'):
+    """
+    后台刷新一次缓存查询发现的所有软过期条目，按 BATCH_SIZE 分批并发爬取
+    """
+    failed = 0
+    try:
+        for start in range(0, len(addresses), BATCH_SIZE):
+            results = _run_batch(addresses[start:start + BATCH_SIZE], network, check_cache=False)
+            failed += sum(1 for result in results if not result["success"])
+    finally:
+        CacheManager().release_refresh_locks(addresses, network)
+    return {'status': 'error' if failed else 'success', 'refreshed': len(addresses) - failed, 'failed': failed}
+
+@shared_task
+def sweep_cache():
+    """
+    清理旧代数留下的缓存键（SCAN，不阻塞 Redis）
+    """
+    return {'status': 'success', 'removed': CacheManager().sweep_stale_generations()}
+
+@shared_task
+def sweep_uploads():
+    """
+    删除会话已过期（被放弃或处理任务异常退出）的分片上传数据
+    """
+    return {'status': 'success', 'removed': ChunkedUpload.sweep_orphaned_data()}
+
+@shared_task
+def prefetch_popular(top_n=PREFETCH_TOP_N, lead_time=PREFETCH_LEAD_TIME):
+    """
+    提前刷新最热门的地址（缓存缺失或软过期时间在 lead_time 秒内的条目），
+    数量受浏览器空闲槽位限制，避免热门条目同时过期挤占前台爬取
+    """
+    tracker = PopularityTracker()
+    tracker.rebase()
+
+    slots = free_slots()
+    if slots <= 0:
+        return {'status': 'skipped', 'scheduled': 0}
+
+    top = tracker.top(top_n)
+    by_network = {}
+    for network, address, _ in top:
+        by_network.setdefault(network, []).append(address)
+
+    cache_manager = CacheManager()
+    entries = {}
+    for network, addresses in by_network.items():
+        for address, entry in cache_manager.get_cached_entries(addresses, network).items():
+            entries[(network, address)] = entry
+
+    deadline = time.time() + lead_time
+    due = 0
+    scheduled = 0
+    for network, address, _ in top:
+        entry = entries.get((network, address))
+        # 负缓存条目按自身的短 TTL 过期，不提前刷新
+        if entry is not None and (entry.is_negative or entry.soft_expires_at is None
+                                  or entry.soft_expires_at > deadline):
+            continue
+        due += 1
+        if scheduled < slots and MistTrackScraperService.schedule_refresh(address, network):
+            scheduled += 1
+    return {'status': 'success', 'due': due, 'scheduled': scheduled}
+
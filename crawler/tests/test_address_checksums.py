@@ -0,0 +1,150 @@
+import unittest
+
+from crawler.address_checksums import (
+    base58_decode,
+    base58check_decode,
+    is_valid_btc,
+    is_valid_segwit,
+    is_valid_sol,
+    is_valid_trx,
+)
+from crawler.validators import CryptoAddressValidator
+
+BTC_VALID = (
+    '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa',  # P2PKH（创世区块）
+    '1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2',
+    '3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy',  # P2SH
+)
+# BIP-173 / BIP-350 中的主网测试向量
+SEGWIT_VALID = (
+    'BC1QW508D6QEJXTDG4Y5R3ZARVARY0C5XW7KV8F3T4',  # v0 P2WPKH, bech32
+    'bc1qwqdg6squsna38e46795at95yu9atm8azzmyvckulcc7kytlcckxswvvzej',  # v0 P2WSH
+    'bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0',  # v1 taproot, bech32m
+    'bc1zw508d6qejxtdg4y5r3zarvaryvaxxpcs',  # v2
+    'BC1SW50QGDZ25J',  # v16
+)
+SEGWIT_INVALID = (
+    'bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqh2y7hd',  # v1 带 bech32 校验和
+    'BC1S0XLXVLHEMJA6C4DQV22UAPCTQUPFHLXM9H8Z3K2E72Q4K9HCZ7VQ54WELL',  # v16 带 bech32 校验和
+    'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kemeawh',  # v0 带 bech32m 校验和
+    'bc1zw508d6qejxtdg4y5r3zarvaryvqyzf3du',  # 填充位不为 0
+    'bc1gmk9yu',  # 没有数据
+    'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t5',  # 最后一位输错
+    'bc1qW508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4',  # 混合大小写
+    'tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx',  # 测试网
+)
+TRX_VALID = (
+    'TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7',
+    'TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t',  # USDT 合约
+)
+SOL_VALID = (
+    'So11111111111111111111111111111111111111112',
+    'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA',
+    '11111111111111111111111111111111',  # 系统程序：32 个 0 字节
+)
+
+
+class Base58Tests(unittest.TestCase):
+    """base58 / base58check 解码"""
+
+    def test_leading_ones_are_zero_bytes(self):
+        self.assertEqual(base58_decode('1'), b'\x00')
+        self.assertEqual(base58_decode('11' + '2'), b'\x00\x00\x01')
+        self.assertEqual(base58_decode('z'), bytes([57]))
+
+    def test_invalid_characters(self):
+        for char in '0OIl+':
+            self.assertIsNone(base58_decode(f"1A1z{char}"))
+
+    def test_base58check_payload(self):
+        self.assertEqual(base58check_decode(BTC_VALID[0]).hex(), '0062e907b15cbf27d5425399ebf6f0fb50ebb88f18')
+
+    def test_base58check_rejects_bad_checksum_and_short_input(self):
+        self.assertIsNone(base58check_decode('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb'))
+        self.assertIsNone(base58check_decode('1111'))
+
+
+class BtcTests(unittest.TestCase):
+    """BTC：base58check（版本 0x00 / 0x05）和 bech32 / bech32m"""
+
+    def test_valid(self):
+        for address in BTC_VALID + SEGWIT_VALID:
+            with self.subTest(address=address):
+                self.assertTrue(is_valid_btc(address))
+
+    def test_invalid_segwit(self):
+        for address in SEGWIT_INVALID:
+            with self.subTest(address=address):
+                self.assertFalse(is_valid_segwit(address))
+                self.assertFalse(is_valid_btc(address))
+
+    def test_invalid_base58(self):
+        for address in ('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb',  # 最后一位输错
+                        '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfN',  # 少一位
+                        'LVg2kJoFNg45Nbpy53h7Fe1wKyeXVRhMH9',  # Litecoin：校验和正确，版本 0x30
+                        TRX_VALID[0]):
+            with self.subTest(address=address):
+                self.assertFalse(is_valid_btc(address))
+        self.assertEqual(base58check_decode('LVg2kJoFNg45Nbpy53h7Fe1wKyeXVRhMH9')[0], 0x30)
+
+
+class TrxTests(unittest.TestCase):
+    """TRX：base58check，版本 0x41"""
+
+    def test_valid(self):
+        for address in TRX_VALID:
+            with self.subTest(address=address):
+                self.assertTrue(is_valid_trx(address))
+
+    def test_invalid(self):
+        for address in ('TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6T',  # 大小写输错
+                        'TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6',
+                        BTC_VALID[0]):  # 校验和正确，版本不对
+            with self.subTest(address=address):
+                self.assertFalse(is_valid_trx(address))
+
+
+class SolTests(unittest.TestCase):
+    """SOL：base58 解码后正好 32 字节"""
+
+    def test_valid(self):
+        for address in SOL_VALID:
+            with self.subTest(address=address):
+                self.assertTrue(is_valid_sol(address))
+
+    def test_invalid(self):
+        for address in ('1111111111111111111111111111111',  # 31 字节
+                        'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DAA',  # 超过 32 字节
+                        'So1111111111111111111111111111111111111111O'):  # 非 base58 字符
+            with self.subTest(address=address):
+                self.assertFalse(is_valid_sol(address))
+
+
+class ValidatorChecksumTests(unittest.TestCase):
+    """格式正确但校验和错误的地址在 validate() / validate_many() 中都被拒绝"""
+
+    def test_validate(self):
+        validator = CryptoAddressValidator()
+        self.assertEqual(validator.validate(BTC_VALID[0])[2], ['BTC'])
+        self.assertEqual(validator.validate(TRX_VALID[1])[2], ['TRX'])
+        self.assertEqual(validator.validate(SOL_VALID[1])[2], ['SOL'])
+        self.assertEqual(validator.validate(SEGWIT_VALID[2])[2], ['BTC'])
+        for address in ('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb', 'TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6T',
+                        'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t5'):
+            with self.subTest(address=address):
+                self.assertEqual(validator.validate(address)[:2], (False, "Invalid address checksum"))
+
+    def test_validate_many_matches_validate(self):
+        validator = CryptoAddressValidator()
+        addresses = list(BTC_VALID + SEGWIT_VALID[:3] + TRX_VALID + SOL_VALID[:2]) + [
+            '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb', 'TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6T',
+            'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t5', '1111111111111111111111111111111',
+        ]
+        frame, _ = validator.validate_many(addresses)
+        for address, valid in zip(addresses, frame['valid']):
+            with self.subTest(address=address):
+                self.assertEqual(bool(valid), validator.validate(address)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from crawler.address_identity import identity, canonical_address, normalize_network, AddressIdentity
+from crawler.cache_manager import CacheManager
+
+EVM_CHECKSUMMED = '0x28C6c06298d514Db089934071355E5743bf21d60'
+EVM_LOWER = '0x28c6c06298d514db089934071355e5743bf21d60'
+BTC_BECH32 = 'bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq'
+BTC_LEGACY = '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa'
+TRX = 'TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7'
+SOL = 'So11111111111111111111111111111111111111112'
+
+
+class NormalizeNetworkTests(unittest.TestCase):
+    """网络名规范化：大写、别名和默认值"""
+
+    def test_known_names(self):
+        self.assertEqual(normalize_network('eth'), 'ETH')
+        self.assertEqual(normalize_network(' bsc '), 'BSC')
+        self.assertEqual(normalize_network('SOL'), 'SOL')
+
+    def test_aliases(self):
+        self.assertEqual(normalize_network('Solana'), 'SOL')
+        self.assertEqual(normalize_network('polygon'), 'MATIC')
+        self.assertEqual(normalize_network('BNB'), 'BSC')
+        self.assertEqual(normalize_network('tron'), 'TRX')
+        self.assertEqual(normalize_network('Bitcoin'), 'BTC')
+        self.assertEqual(normalize_network('ethereum'), 'ETH')
+
+    def test_missing_network_defaults_to_eth(self):
+        for value in (None, '', '   ', 'undefined', 'UNDEFINED'):
+            self.assertEqual(normalize_network(value), 'ETH')
+
+    def test_unknown_network_is_kept(self):
+        self.assertEqual(normalize_network('doge'), 'DOGE')
+
+
+class CanonicalAddressTests(unittest.TestCase):
+    """地址规范形式：只在格式不区分大小写时转换大小写"""
+
+    def test_evm_case_is_folded(self):
+        self.assertEqual(canonical_address(EVM_CHECKSUMMED), EVM_LOWER)
+        self.assertEqual(canonical_address(EVM_LOWER.upper().replace('0X', '0x')), EVM_LOWER)
+        self.assertEqual(canonical_address('0X' + EVM_LOWER[2:]), EVM_LOWER)
+
+    def test_bech32_case_is_folded(self):
+        self.assertEqual(canonical_address(BTC_BECH32.upper()), BTC_BECH32)
+
+    def test_base58_case_is_kept(self):
+        for address in (BTC_LEGACY, TRX, SOL):
+            self.assertEqual(canonical_address(address), address)
+        self.assertNotEqual(canonical_address(TRX.lower()), TRX)
+
+    def test_whitespace_is_stripped(self):
+        self.assertEqual(canonical_address(f"  {EVM_CHECKSUMMED}\n"), EVM_LOWER)
+        self.assertEqual(canonical_address(f"\t{SOL} "), SOL)
+
+    def test_empty_values(self):
+        self.assertEqual(canonical_address(None), '')
+        self.assertEqual(canonical_address('  '), '')
+
+    def test_short_hex_is_not_treated_as_evm(self):
+        self.assertEqual(canonical_address('0xABC'), '0xABC')
+
+
+class IdentityTests(unittest.TestCase):
+    """同一个钱包得到同一个标识和缓存键"""
+
+    def test_same_wallet_same_identity(self):
+        expected = AddressIdentity('ETH', EVM_LOWER)
+        self.assertEqual(identity(EVM_CHECKSUMMED, 'eth'), expected)
+        self.assertEqual(identity(f" {EVM_LOWER} ", 'Ethereum'), expected)
+        self.assertEqual(identity(EVM_LOWER), expected)
+
+    def test_networks_stay_apart(self):
+        self.assertNotEqual(identity(EVM_LOWER, 'ETH').key, identity(EVM_LOWER, 'BSC').key)
+
+    def test_key(self):
+        self.assertEqual(identity(EVM_CHECKSUMMED, 'ETH').key, f"eth:{EVM_LOWER}")
+        self.assertEqual(identity(SOL, 'Solana').key, f"sol:{SOL}")
+
+    def test_cache_key_uses_identity(self):
+        self.assertEqual(
+            CacheManager._format_key('g1.0', EVM_CHECKSUMMED, 'ethereum'),
+            CacheManager._format_key('g1.0', EVM_LOWER, 'ETH'),
+        )
+        self.assertEqual(CacheManager._format_key('g1.0', EVM_LOWER, 'ETH'), f"misttrack:g1.0:eth:{EVM_LOWER}")
+
+
+if __name__ == '__main__':
+    unittest.main()
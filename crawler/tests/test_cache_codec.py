@@ -0,0 +1,76 @@
+import json
+import zlib
+import unittest
+from unittest import mock
+
+from crawler import cache_codec
+from crawler.config import CACHE_COMPRESS_THRESHOLD
+
+RESULT = {
+    'risk_level': 'Low',
+    'risk_score': 12,
+    'address_labels': ['Binance', '交易所'],
+    'volume': None,
+}
+# 编码后远超压缩阈值，且重复内容足够多，压缩后一定更短
+LARGE_RESULT = {**RESULT, 'transactions': [{'hash': f"0x{i:064x}", 'value': '1.5 ETH'} for i in range(50)]}
+
+
+class CacheCodecTests(unittest.TestCase):
+    """缓存值编码：格式头、压缩阈值和旧 JSON 条目"""
+
+    def test_known_msgpack_vector(self):
+        self.assertEqual(cache_codec.encode({'a': 1}), b'\x01\x81\xa1a\x01')
+        self.assertEqual(cache_codec.decode(b'\x01\x81\xa1a\x01'), {'a': 1})
+
+    def test_small_value_is_plain_msgpack(self):
+        data = cache_codec.encode(RESULT)
+        self.assertEqual(data[0], cache_codec.FORMAT_MSGPACK)
+        self.assertLess(len(data), CACHE_COMPRESS_THRESHOLD + 1)
+        self.assertEqual(cache_codec.decode(data), RESULT)
+
+    def test_large_value_is_zstd_compressed(self):
+        data = cache_codec.encode(LARGE_RESULT)
+        self.assertEqual(data[0], cache_codec.FORMAT_MSGPACK_ZSTD)
+        self.assertLess(len(data), len(json.dumps(LARGE_RESULT)))
+        self.assertEqual(cache_codec.decode(data), LARGE_RESULT)
+
+    def test_legacy_json_entries(self):
+        legacy = json.dumps(RESULT, ensure_ascii=False)
+        # decode_responses 客户端返回 str，二进制客户端返回 bytes
+        self.assertEqual(cache_codec.decode(legacy), RESULT)
+        self.assertEqual(cache_codec.decode(legacy.encode('utf-8')), RESULT)
+        self.assertEqual(cache_codec.decode(b'{"soft_expires_at": 1.5, "data": {}}'),
+                         {'soft_expires_at': 1.5, 'data': {}})
+
+    def test_json_formats_without_msgpack(self):
+        with mock.patch.object(cache_codec, 'msgpack', None):
+            small = cache_codec.encode(RESULT)
+            large = cache_codec.encode(LARGE_RESULT)
+        self.assertEqual(small[0], cache_codec.FORMAT_JSON)
+        self.assertEqual(large[0], cache_codec.FORMAT_JSON_ZLIB)
+        self.assertEqual(json.loads(zlib.decompress(large[1:])), LARGE_RESULT)
+        # 读取端装了 msgpack 也能读 JSON 格式
+        self.assertEqual(cache_codec.decode(small), RESULT)
+        self.assertEqual(cache_codec.decode(large), LARGE_RESULT)
+
+    def test_zlib_fallback_without_zstandard(self):
+        with mock.patch.object(cache_codec, 'zstandard', None):
+            data = cache_codec.encode(LARGE_RESULT)
+        self.assertEqual(data[0], cache_codec.FORMAT_JSON_ZLIB)
+        self.assertEqual(cache_codec.decode(data), LARGE_RESULT)
+        # 小值不压缩，不受 zstandard 影响
+        with mock.patch.object(cache_codec, 'zstandard', None):
+            self.assertEqual(cache_codec.encode(RESULT)[0], cache_codec.FORMAT_MSGPACK)
+
+    def test_corrupt_values_raise(self):
+        with self.assertRaises(Exception):
+            cache_codec.decode(b'\x02' + b'not zstd data')
+        with self.assertRaises(Exception):
+            cache_codec.decode(b'\x04' + b'not zlib data')
+        with self.assertRaises(ValueError):
+            cache_codec.decode(b'not a cache value')
+
+
+if __name__ == '__main__':
+    unittest.main()
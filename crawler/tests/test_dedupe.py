@@ -0,0 +1,124 @@
+import unittest
+from unittest import mock
+
+import fakeredis
+
+from crawler import dedupe
+from crawler.config import DEDUPE_SEEN_KEY
+from crawler.dedupe import BloomFilter, Deduper, RedisBloomFilter, bloom_parameters
+
+WINDOW = 3600
+
+
+def _keys(prefix: str, count: int):
+    return [f"eth:0x{prefix}{i:039x}" for i in range(count)]
+
+
+class BloomParametersTests(unittest.TestCase):
+    """过滤器大小按容量和误判率计算"""
+
+    def test_known_values(self):
+        self.assertEqual(bloom_parameters(1000, 0.01), (9586, 7))
+        self.assertEqual(bloom_parameters(10000000, 0.001), (143775876, 10))
+
+    def test_at_least_one_hash(self):
+        self.assertGreaterEqual(bloom_parameters(10, 0.9)[1], 1)
+
+
+class BloomFilterTests(unittest.TestCase):
+    """内存 Bloom 过滤器：没有漏判，误判率接近设定值"""
+
+    def test_new_then_seen(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = _keys('a', 500)
+        self.assertEqual(bloom.add_many(keys), [True] * 500)
+        self.assertEqual(bloom.add_many(keys), [False] * 500)
+
+    def test_empty_input(self):
+        self.assertEqual(BloomFilter(capacity=1000, error_rate=0.01).add_many([]), [])
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        bloom.add_many(_keys('a', 1000))
+        fresh = bloom.add_many(_keys('b', 10000))
+        # 期望约 1%，放宽到 3% 避免偶然波动
+        self.assertLess(fresh.count(False) / len(fresh), 0.03)
+
+
+class DeduperTests(unittest.TestCase):
+    """单个任务内的去重：先用精确集合，超过上限后转为 Bloom 过滤器"""
+
+    def test_exact_across_calls(self):
+        deduper = Deduper(exact_limit=100, shared=False)
+        self.assertEqual(deduper.add_many(['eth:a', 'eth:b']), [True, True])
+        self.assertEqual(deduper.add_many(['eth:b', 'eth:c']), [False, True])
+        self.assertIsNone(deduper.bloom)
+
+    def test_switches_to_bloom_and_keeps_history(self):
+        deduper = Deduper(exact_limit=3, shared=False)
+        with mock.patch.object(dedupe, 'BloomFilter', lambda: BloomFilter(capacity=1000, error_rate=0.01)):
+            self.assertEqual(deduper.add_many(['eth:a', 'eth:b', 'eth:c', 'eth:d']), [True] * 4)
+        self.assertIsInstance(deduper.bloom, BloomFilter)
+        self.assertEqual(deduper.members, set())
+        # 切换之前见过的地址仍视为见过
+        self.assertEqual(deduper.add_many(['eth:a', 'eth:d', 'eth:e']), [False, False, True])
+
+
+class RedisBloomFilterTests(unittest.TestCase):
+    """Redis 中共享的 Bloom 过滤器：跨任务、按窗口轮换"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = mock.patch.object(dedupe, 'get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = WINDOW * 1000 + 10.0
+        clock = mock.patch.object(dedupe.time, 'time', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def _filter(self):
+        return RedisBloomFilter(capacity=1000, error_rate=0.01, window=WINDOW)
+
+    def test_new_then_seen_by_another_job(self):
+        keys = _keys('a', 50)
+        self.assertEqual(self._filter().add_many(keys), [True] * 50)
+        self.assertEqual(self._filter().add_many(keys), [False] * 50)
+        self.assertEqual(self._filter().add_many(['eth:new']), [True])
+
+    def test_false_positive_rate(self):
+        # 逐个检查并加入，探测的地址也计入容量：共 1000 个，不超过设定的容量
+        self._filter().add_many(_keys('a', 500))
+        fresh = self._filter().add_many(_keys('b', 500))
+        self.assertLess(fresh.count(False) / len(fresh), 0.03)
+
+    def test_window_rotation(self):
+        keys = _keys('a', 20)
+        self._filter().add_many(keys)
+        key = f"{DEDUPE_SEEN_KEY}:{int(self.now // WINDOW)}"
+        self.assertTrue(0 < self.redis.ttl(key) <= WINDOW * 2)
+
+        # 下一个窗口：上一个窗口的过滤器仍然有效
+        self.now += WINDOW
+        self.assertEqual(self._filter().add_many(keys[:10]), [False] * 10)
+        # 再过两个窗口：都已轮换出去（只有第二个窗口加入过的前 10 个在上一个窗口中）
+        self.now += WINDOW
+        self.assertEqual(self._filter().add_many(keys), [False] * 10 + [True] * 10)
+        self.now += 2 * WINDOW
+        self.assertEqual(self._filter().add_many(keys), [True] * 20)
+
+    def test_shared_deduper_uses_redis(self):
+        with mock.patch.object(dedupe, 'RedisBloomFilter', self._filter):
+            first, second = Deduper(shared=True), Deduper(shared=True)
+        self.assertEqual(first.add_many(['eth:a', 'eth:b']), [True, True])
+        self.assertEqual(second.add_many(['eth:b', 'eth:c']), [False, True])
+
+    def test_redis_failure_treats_keys_as_new(self):
+        with mock.patch.object(dedupe, 'RedisBloomFilter', self._filter):
+            deduper = Deduper(shared=True)
+        with mock.patch.object(dedupe, 'get_redis', side_effect=ConnectionError('redis down')):
+            self.assertEqual(deduper.add_many(['eth:a', 'eth:b']), [True, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+
+from crawler import validators
+from crawler.validators import CryptoAddressValidator, keccak256, to_checksum_address, is_checksum_address
+
+# EIP-55 规范中的测试向量（全大写 / 全小写的两组校验和形式恰好没有混合大小写）
+EIP55_VECTORS = (
+    '0x52908400098527886E0F7030069857D2E4169EE7',
+    '0x8617E340B3D01FA5F11F306F4090FD50E238070D',
+    '0xde709f2102306220921060314715629080e2fb77',
+    '0x27b1fdb04752bbc536007a920d24acb045561c26',
+    '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed',
+    '0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359',
+    '0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB',
+    '0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb',
+)
+
+
+def _flip_case(address: str) -> str:
+    """Flip the case of the first letter of the hex part (a one-character checksum error)"""
+    for i, char in enumerate(address[2:], start=2):
+        if char.isalpha():
+            return address[:i] + char.swapcase() + address[i + 1:]
+    raise ValueError(f"No letter in {address}")
+
+
+class Keccak256Tests(unittest.TestCase):
+    """Keccak-256（不是 NIST SHA3-256）"""
+
+    def test_known_digests(self):
+        self.assertEqual(keccak256(b'').hex(), 'c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470')
+        self.assertEqual(keccak256(b'abc').hex(), '4e03657aea45a94fc7d47ba826c8d667c0d1e6e33a64a036ec44f58fa12d6c45')
+
+    def test_web3_fallback_matches(self):
+        try:
+            import web3  # noqa: F401
+        except ImportError:
+            self.skipTest('web3 is not installed')
+        with mock.patch.object(validators, '_keccak', None):
+            self.assertEqual(keccak256(b'abc').hex(), '4e03657aea45a94fc7d47ba826c8d667c0d1e6e33a64a036ec44f58fa12d6c45')
+
+
+class Eip55Tests(unittest.TestCase):
+    """EIP-55 校验和格式"""
+
+    def test_known_vectors(self):
+        for address in EIP55_VECTORS:
+            with self.subTest(address=address):
+                self.assertEqual(to_checksum_address(address), address)
+                self.assertEqual(to_checksum_address(address.lower()), address)
+                self.assertEqual(to_checksum_address('0x' + address[2:].upper()), address)
+                self.assertTrue(is_checksum_address(address))
+
+    def test_single_case_error_is_rejected(self):
+        for address in EIP55_VECTORS:
+            with self.subTest(address=address):
+                self.assertFalse(is_checksum_address(_flip_case(address)))
+
+    def test_validator_accepts_any_case_of_a_well_formed_address(self):
+        # 格式正确的地址都可以转换为校验和格式，validate() 不因大小写拒绝地址
+        validator = CryptoAddressValidator()
+        for address in (EIP55_VECTORS[4], EIP55_VECTORS[4].lower(), _flip_case(EIP55_VECTORS[4])):
+            valid, _, coins = validator.validate(address)
+            self.assertTrue(valid)
+            self.assertEqual(coins, ['ETH', 'BSC', 'MATIC'])
+
+    def test_validator_rejects_malformed_evm_addresses(self):
+        validator = CryptoAddressValidator()
+        for address in ('0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAe',  # 39 位
+                        '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAedd',  # 41 位
+                        '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeg'):  # 非十六进制
+            with self.subTest(address=address):
+                self.assertFalse(validator.validate(address)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+from crawler.cache_manager import LocalTTLCache
+
+
+class LocalTTLCacheTests(unittest.TestCase):
+    """进程内 TTL/LRU 缓存：过期、淘汰顺序和容量"""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('crawler.cache_manager.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_returns_value_until_ttl(self):
+        cache = LocalTTLCache(maxsize=10, ttl=30)
+        cache.set('a', {'risk_level': 'Low'})
+        self.now += 29.9
+        self.assertEqual(cache.get('a'), {'risk_level': 'Low'})
+
+    def test_entry_expires_at_ttl(self):
+        cache = LocalTTLCache(maxsize=10, ttl=30)
+        cache.set('a', 1)
+        self.now += 30
+        self.assertIsNone(cache.get('a'))
+        # 过期条目在读取时删除
+        self.assertEqual(len(cache), 0)
+
+    def test_set_again_restarts_ttl(self):
+        cache = LocalTTLCache(maxsize=10, ttl=30)
+        cache.set('a', 1)
+        self.now += 20
+        cache.set('a', 2)
+        self.now += 20
+        self.assertEqual(cache.get('a'), 2)
+
+    def test_missing_key(self):
+        self.assertIsNone(LocalTTLCache(maxsize=10, ttl=30).get('missing'))
+
+    def test_evicts_least_recently_set(self):
+        cache = LocalTTLCache(maxsize=2, ttl=30)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_get_marks_entry_recently_used(self):
+        cache = LocalTTLCache(maxsize=2, ttl=30)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    def test_overwrite_marks_entry_recently_used(self):
+        cache = LocalTTLCache(maxsize=2, ttl=30)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('a', 10)
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 10)
+        self.assertIsNone(cache.get('b'))
+
+    def test_zero_maxsize_disables_cache(self):
+        cache = LocalTTLCache(maxsize=0, ttl=30)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_delete_and_clear(self):
+        cache = LocalTTLCache(maxsize=10, ttl=30)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.delete('a')
+        cache.delete('missing')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
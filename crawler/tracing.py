@@ -0,0 +1,147 @@
+"""
+追踪 ID 与单次查询耗时分解
+
+- 请求 / 任务级追踪 ID：``TraceMiddleware`` 为每个 HTTP 请求设置（沿用客户端的 ``X-Trace-Id``，
+  否则新生成，并在响应头中返回），Celery 任务通过消息头继承发布时的追踪 ID（见 tasks.py）
+- 查询级追踪 ID：``MistTrackScraperService.get_address_info`` 中每次查询一个 ``lookup()``，
+  ID 为 ``{请求 ID}.{6 位随机}``，按前缀即可找到同一请求 / 任务的所有查询
+- 日志：``TraceIdFilter`` 给日志记录加上 ``trace_id``（当前查询的 ID，否则请求 / 任务的 ID，都没有时为 ``-``）
+- 耗时：``metrics.timed`` 记录的每个阶段同时累加到当前查询，``timing=True`` 时结果中带有 ``_timing``：
+  缓存层级、爬虫引擎、重试次数、总耗时和各阶段毫秒数
+
+追踪状态保存在 contextvars 中，asyncio 任务自动继承；线程池中执行的函数需要用
+``contextvars.copy_context().run`` 提交（见 scraper_service._make_request）。
+"""
+
+import re
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any
+
+TRACE_HEADER = 'X-Trace-Id'
+_VALID_TRACE_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+_trace_id: ContextVar[Optional[str]] = ContextVar('crawler_trace_id', default=None)
+_lookup: ContextVar[Optional['LookupTiming']] = ContextVar('crawler_lookup', default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def clean_trace_id(value) -> Optional[str]:
+    """A caller-supplied trace ID if it is safe to log and send back, else None"""
+    value = str(value or '').strip()
+    return value if _VALID_TRACE_ID.match(value) else None
+
+
+def current_trace_id() -> Optional[str]:
+    """ID of the current lookup, else of the current request / task"""
+    lookup = _lookup.get()
+    return lookup.trace_id if lookup else _trace_id.get()
+
+
+def request_trace_id() -> Optional[str]:
+    """ID of the current request / task (without the lookup suffix)"""
+    return _trace_id.get()
+
+
+def start_trace(trace_id: Optional[str] = None):
+    """Set the request / task trace ID (a new one when not given); returns (trace_id, token for end_trace)"""
+    trace_id = clean_trace_id(trace_id) or new_trace_id()
+    return trace_id, _trace_id.set(trace_id)
+
+
+def end_trace(token):
+    _trace_id.reset(token)
+
+
+@contextmanager
+def trace(trace_id: Optional[str] = None):
+    """Run the block under a request / task trace ID"""
+    trace_id, token = start_trace(trace_id)
+    try:
+        yield trace_id
+    finally:
+        end_trace(token)
+
+
+class LookupTiming:
+    """Where the time of one lookup went"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.cache: Optional[str] = None     # local / redis / miss / bypassed / skipped
+        self.engine: Optional[str] = None    # cache 或爬虫类名
+        self.retries = 0
+        self.phases: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    def add_phase(self, stage: str, seconds: float):
+        self.phases[stage] = self.phases.get(stage, 0.0) + seconds * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "cache": self.cache,
+            "engine": self.engine,
+            "retries": self.retries,
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 1),
+            "phases": {stage: round(ms, 1) for stage, ms in self.phases.items()},
+        }
+
+
+@contextmanager
+def lookup():
+    """Track one address lookup; yields its LookupTiming"""
+    parent = _trace_id.get()
+    timing = LookupTiming(f"{parent}.{uuid.uuid4().hex[:6]}" if parent else new_trace_id())
+    token = _lookup.set(timing)
+    try:
+        yield timing
+    finally:
+        _lookup.reset(token)
+
+
+def record_phase(stage: str, seconds: float):
+    timing = _lookup.get()
+    if timing is not None:
+        timing.add_phase(stage, seconds)
+
+
+def annotate(**fields):
+    """Set cache / engine on the current lookup (no-op outside a lookup)"""
+    timing = _lookup.get()
+    if timing is not None:
+        for name, value in fields.items():
+            setattr(timing, name, value)
+
+
+def count_retry():
+    timing = _lookup.get()
+    if timing is not None:
+        timing.retries += 1
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds ``trace_id`` to log records (use ``{trace_id}`` in the formatter)"""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or '-'
+        return True
+
+
+class TraceMiddleware:
+    """Trace every request; the ID is taken from / returned in the X-Trace-Id header"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with trace(request.headers.get(TRACE_HEADER)) as trace_id:
+            response = self.get_response(request)
+        response[TRACE_HEADER] = trace_id
+        return response
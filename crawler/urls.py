@@ -8,5 +8,9 @@ router.register(r'crawler', views.CrawlerViewSet, basename='crawler')
 urlpatterns = [
     path('search/', views.search, name='search'),
     path('validate/', views.validate_address, name='validate'),
+    path('cache/stats/', views.cache_stats, name='cache_stats'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('profiler/', views.profiler, name='profiler'),
+    path('profiler/stacks/', views.profiler_stacks, name='profiler_stacks'),
     path('', include(router.urls)),
 ]
@@ -1,9 +1,39 @@
 import re
 import logging
-from web3 import Web3
+from functools import lru_cache
+from .address_checksums import CHECKSUM_VALIDATORS
+
+try:
+    from Crypto.Hash import keccak as _keccak
+except ImportError:  # pragma: no cover - optional dependency
+    _keccak = None
 
 logger = logging.getLogger(__name__)
 
+
+def keccak256(data: bytes) -> bytes:
+    """Keccak-256 (pycryptodome; web3 is only imported when it is missing)"""
+    if _keccak is not None:
+        return _keccak.new(digest_bits=256, data=data).digest()
+    from web3 import Web3
+    return bytes(Web3.keccak(data))
+
+
+@lru_cache(maxsize=65536)
+def _checksum(hex_address: str) -> str:
+    digest = keccak256(hex_address.encode('ascii')).hex()
+    return '0x' + ''.join(c.upper() if int(d, 16) >= 8 else c for c, d in zip(hex_address, digest))
+
+
+def to_checksum_address(address: str) -> str:
+    """EIP-55 checksum form of a 0x address, memoized per address"""
+    return _checksum(address[2:].lower())
+
+
+def is_checksum_address(address: str) -> bool:
+    return address == to_checksum_address(address)
+
+
 class CryptoAddressValidator:
     """加密货币地址验证器"""
     
@@ -15,37 +45,33 @@ class CryptoAddressValidator:
         
         'SOL': r'^[1-9A-HJ-NP-Za-km-z]{32,44}$',
         
-        'BTC': r'^(1|3)[1-9A-HJ-NP-Za-km-z]{25,34}$|^bc1[0-9A-Za-z]{39,59}$',
+        'BTC': r'^(1|3)[1-9A-HJ-NP-Za-km-z]{25,34}$|^(bc1|BC1)[0-9A-Za-z]{39,59}$',
         'TRX': r'^T[123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz]{33}$'
     }
     
+    # 正则只编译一次，验证器可以按请求创建
+    _COMPILED = {coin: re.compile(pattern) for coin, pattern in PATTERNS.items()}
+
     def __init__(self):
-        self.patterns = {coin: re.compile(pattern) for coin, pattern in self.PATTERNS.items()}
-        self.web3 = Web3()
+        self.patterns = self._COMPILED
         
     def _check_eth_checksum(self, address):
         """验证ETH地址校验和"""
         try:
             # 检查地址是否符合校验和格式
-            return self.web3.is_checksum_address(address)
+            return is_checksum_address(address)
         except Exception as e:
             logger.error(f"Error checking ETH checksum: {str(e)}")
             return False
             
     def _validate_eth_like(self, address, coin):
         """验证ETH类地址（包括BSC和MATIC）"""
-        if not self.patterns[coin].match(address):
-            return False
-            
-        # 如果地址是小写或大写，转换为校验和格式
-        try:
-            checksum_address = self.web3.to_checksum_address(address)
-            return True
-        except Exception:
-            return False
+        # 符合格式的地址（小写、大写或混合大小写）都可以转换为校验和格式，不需要再计算哈希
+        return bool(self.patterns[coin].match(address))
             
     def validate(self, address):
-        """验证地址格式并返回可能的币种列表"""
+        """验证地址格式并返回可能的币种列表（忽略首尾空白，与 validate_many 一致）"""
+        address = str(address or '').strip()
         if not address:
             return False, "Address cannot be empty", []
             
@@ -57,22 +83,106 @@ class CryptoAddressValidator:
             if self._validate_eth_like(address, coin):
                 matching_coins.append(coin)
                 
-        # 处理其他币种
-        for coin, pattern in self.patterns.items():
+        # 处理其他币种（SOL 放在最后判断），格式匹配后再验证校验和
+        format_matched = False
+        for coin, pattern in sorted(self.patterns.items(), key=lambda item: item[0] == 'SOL'):
             if coin not in eth_like_coins and pattern.match(address):
                 # SOL地址格式较为宽松，只有在没有其他匹配时才考虑
                 if coin == 'SOL' and len(matching_coins) > 0:
                     continue
-                matching_coins.append(coin)
+                format_matched = True
+                if CHECKSUM_VALIDATORS[coin](address):
+                    matching_coins.append(coin)
         
         if not matching_coins:
+            if format_matched:
+                return False, "Invalid address checksum", []
             return False, "Invalid address format", []
             
         return True, "Valid address format", matching_coins
         
+    # 批量校验：按地址前缀分派，每类地址只跑一个正则，只对格式匹配的行验证校验和
+    EVM_COINS = ('ETH', 'BSC', 'MATIC')
+    _BULK_COINS = EVM_COINS + ('BTC', 'TRX', 'SOL')
+
+    def validate_many(self, addresses):
+        """
+        批量验证地址（pandas 向量化）
+
+        :param addresses: pandas Series / list / ndarray
+        :return: (DataFrame[address, valid, coins, normalized], summary)
+                 结果与 validate() 逐个验证一致，normalized 为规范形式（见 address_identity）
+        """
+        import numpy as np
+        import pandas as pd
+
+        series = pd.Series(addresses, dtype=object)
+        values = series.fillna('').astype(str).str.strip()
+
+        evm = np.zeros(len(values), dtype=bool)
+        btc = np.zeros(len(values), dtype=bool)
+        trx = np.zeros(len(values), dtype=bool)
+        sol = np.zeros(len(values), dtype=bool)
+
+        first = values.str[:1]
+        is_0x = values.str[:2] == '0x'
+        is_btc_prefix = first.isin(('1', '3')) | (values.str[:3].str.lower() == 'bc1')
+        is_trx_prefix = first == 'T'
+
+        raw = values.to_numpy()
+        format_matched = np.zeros(len(values), dtype=bool)
+
+        def check(mask, coin):
+            # mask: 格式匹配的行，原地过滤掉校验和错误的行
+            format_matched[mask] = True
+            rows = np.flatnonzero(mask)
+            mask[rows] = [CHECKSUM_VALIDATORS[coin](value) for value in raw[rows]]
+
+        evm[is_0x.to_numpy()] = values[is_0x].str.match(self.PATTERNS['ETH']).to_numpy()
+        format_matched[evm] = True
+        btc[is_btc_prefix.to_numpy()] = values[is_btc_prefix].str.match(self.PATTERNS['BTC']).to_numpy()
+        check(btc, 'BTC')
+        trx[is_trx_prefix.to_numpy()] = values[is_trx_prefix].str.match(self.PATTERNS['TRX']).to_numpy()
+        check(trx, 'TRX')
+        # SOL地址格式较为宽松，只有在没有其他匹配时才考虑
+        rest = ~(evm | btc | trx) & ~is_0x.to_numpy() & (values != '').to_numpy()
+        sol[rest] = values[rest].str.match(self.PATTERNS['SOL']).to_numpy()
+        check(sol, 'SOL')
+
+        codes = evm * 1 + btc * 2 + trx * 4 + sol * 8
+        coin_lists = {
+            code: [coin for coin, bit in zip(self._BULK_COINS, (1, 1, 1, 2, 4, 8)) if code & bit]
+            for code in range(16)
+        }
+        valid = codes > 0
+        lower = evm | (values.str[:3].str.lower() == 'bc1').to_numpy()
+
+        frame = pd.DataFrame({
+            'address': series,
+            'valid': valid,
+            'coins': [coin_lists[code] for code in codes],
+            'normalized': np.where(lower, values.str.lower(), values),
+        }, index=series.index)
+
+        summary = {
+            'total': int(len(frame)),
+            'valid': int(valid.sum()),
+            'invalid': int(len(frame) - valid.sum()),
+            'bad_checksum': int((format_matched & ~valid).sum()),
+            'by_coin': {
+                'EVM': int(evm.sum()),
+                'BTC': int(btc.sum()),
+                'TRX': int(trx.sum()),
+                'SOL': int(sol.sum()),
+            },
+        }
+        return frame, summary
+
     def normalize_eth_address(self, address):
         """标准化ETH地址（转换为校验和格式）"""
         try:
-            return self.web3.to_checksum_address(address)
+            if not self.patterns['ETH'].match(address):
+                return address
+            return to_checksum_address(address)
         except Exception:
             return address
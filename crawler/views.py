@@ -1,25 +1,72 @@
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
+import hmac
 import time
 import logging
 from .validators import CryptoAddressValidator
+from .address_identity import canonical_address, normalize_network
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-import pandas as pd
 from .serializers import CrawlerTaskSerializer, FileUploadSerializer
-from channels.layers import get_channel_layer
 import uuid
-from asgiref.sync import async_to_sync
 from .services import MistTrackScraperService
+from .progress import ProgressReporter, TaskResultStore, task_results_url, task_export_url
+from .cache_manager import CacheManager
+from .ingestion import iter_upload_address_chunks, IngestionError
+from .chunked_upload import ChunkedUpload, UploadError, UploadConflict, UploadGone
+from .export import parse_columns, stream_csv, FILE_WRITERS, CONTENT_TYPES, ExportError
+from .redis_client import release_async_pools
+from .metrics import render_metrics
+from . import profiler as lookup_profiler
+from .config import LOOKUP_TIMING, PROFILER_ADMIN_TOKEN
 import asyncio
+import itertools
+import tempfile
 
 logger = logging.getLogger(__name__)
 
+def _bypass_negative_cache(request) -> bool:
+    """Whether the caller asked to retry lookups that are in the negative cache"""
+    return str(request.data.get('bypass_negative_cache', '')).lower() in ('1', 'true', 'yes')
+
+def _timing_requested(request) -> bool:
+    """Whether the caller asked for the per-lookup _timing breakdown (timing=true in the body or query)"""
+    value = request.data.get('timing', request.query_params.get('timing', ''))
+    return str(value).lower() in ('1', 'true', 'yes') or LOOKUP_TIMING
+
+def _request_blocks(request, block_size: int = 64 * 1024):
+    """Body of a part upload as blocks: the 'chunk' field of a multipart form or the raw request body"""
+    if request.content_type.startswith('multipart/'):
+        chunk = request.FILES.get('chunk')
+        if chunk is None:
+            raise UploadError("Missing 'chunk' file field")
+        return chunk.chunks(block_size)
+    # 直接读取请求流，分片不经过 DATA_UPLOAD_MAX_MEMORY_SIZE 限制，也不整体读入内存
+    stream = request.stream
+    if stream is None:
+        return iter(())
+    return iter(lambda: stream.read(block_size), b'')
+
+def _start_upload_processing(upload: ChunkedUpload) -> bool:
+    """Queue the crawl of a chunked upload once; returns whether this call queued it"""
+    if not upload.claim_start():
+        return False
+    try:
+        from .tasks import crawl_upload
+        crawl_upload.delay(upload.upload_id, upload.state['task_id'],
+                           bypass_negative=upload.state.get('bypass_negative') == '1',
+                           timing=upload.state.get('timing') == '1')
+        return True
+    except Exception:
+        upload.release_start()
+        raise
+
+def _upload_response(upload: ChunkedUpload, **extra) -> dict:
+    return {**upload.describe(), "results_url": task_results_url(upload.state['task_id']), **extra}
+
 class CrawlerViewSet(viewsets.ViewSet):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -39,54 +86,44 @@ class CrawlerViewSet(viewsets.ViewSet):
         if not is_valid:
             return Response({"error": message}, status=status.HTTP_400_BAD_REQUEST)
 
+        reporter = ProgressReporter(task_id, total=1, network=network)
         try:
             # 使用 scraper_service 获取地址信息
             scraper_service = MistTrackScraperService(address=address, network=network)
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(scraper_service.get_address_info())
+            result = loop.run_until_complete(
+                scraper_service.get_address_info(bypass_negative=_bypass_negative_cache(request),
+                                                 timing=_timing_requested(request))
+            )
+            loop.run_until_complete(release_async_pools())
             loop.close()
 
+            # 结果写入任务事件日志，WebSocket 客户端按 task_id 订阅
+            reporter.add_result(address, result)
+            reporter.finish()
+
             if not result["success"]:
-                self._send_ws_notification(task_id, "error", {"error": result["error"]})
                 return Response({"error": result["error"]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            # 发送成功通知
-            self._send_ws_notification(task_id, "completed", {
-                "address": address,
-                "result": result["data"]
-            })
-
-            return Response({
+            response = {
                 "task_id": task_id,
                 "status": "completed",
                 "address": address,
                 "result": result["data"]
-            })
+            }
+            if "_timing" in result:
+                response["_timing"] = result["_timing"]
+            return Response(response)
 
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
-            self._send_ws_notification(task_id, "error", {"error": str(e)})
+            reporter.finish(status="error", error=str(e))
             return Response(
                 {"error": "Internal server error occurred"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _send_ws_notification(self, task_id: str, status: str, data: dict):
-        """Send WebSocket notification"""
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            "crawler_updates",
-            {
-                "type": "crawler_message",
-                "message": {
-                    "task_id": task_id,
-                    "status": status,
-                    "data": data
-                }
-            }
-        )
-
     @action(detail=False, methods=['post'])
     def upload_file(self, request):
         """Handle file upload request"""
@@ -95,113 +132,220 @@ class CrawlerViewSet(viewsets.ViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         uploaded_file = request.FILES['file']
-        network = request.data.get('network', 'ETH')  # 默认使用ETH网络
-        if not network or network.lower() == 'undefined':
-            network = 'ETH'
-            logger.info(f"Using default network: {network}")
+        network = normalize_network(request.data.get('network'))  # 默认使用ETH网络
         task_id = str(uuid.uuid4())
 
+        reporter = None
         try:
-            # Save file temporarily
-            path = default_storage.save(f'tmp/{uploaded_file.name}', ContentFile(uploaded_file.read()))
-            full_path = default_storage.path(path)
-
-            # Try different encodings to read the file
-            encodings_to_try = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'latin1']
-            df = None
-            
-            for encoding in encodings_to_try:
-                try:
-                    df = pd.read_csv(full_path, encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    logger.error(f"Error reading CSV with encoding {encoding}: {str(e)}")
-                    continue
-            
-            if df is None:
-                return Response(
-                    {"error": "Unable to read the file. Please ensure it's a valid CSV file with UTF-8 or GBK encoding."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Verify the 'address' column exists
-            if 'address' not in df.columns:
-                return Response(
-                    {"error": "The CSV file must contain an 'address' column"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Clean the addresses
-            addresses = df['address'].astype(str).str.strip().dropna().tolist()
-            total_addresses = len(addresses)
+            # Stream the address column straight from the upload; the first chunk is read
+            # up front so format errors are reported before the task starts
+            chunks = iter_upload_address_chunks(uploaded_file)
+            try:
+                first_chunk = next(chunks, None)
+            except IngestionError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            if not addresses:
+            if not first_chunk:
                 return Response(
                     {"error": "No valid addresses found in file"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Process addresses in batches
-            batch_size = 5  # 每批处理5个地址
-            results = []
-            
-            for i in range(0, len(addresses), batch_size):
-                batch_addresses = addresses[i:i + batch_size]
-                
-                # Send progress update
-                self._send_ws_notification(task_id, "processing", {
-                    "progress": (i / total_addresses) * 100,
-                    "current": i,
-                    "total": total_addresses,
-                    "processing": batch_addresses
-                })
-
-                # Process batch concurrently
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                batch_results = loop.run_until_complete(
-                    MistTrackScraperService.process_addresses(batch_addresses, network)
-                )
-                loop.close()
-                
-                # Add results
-                results.extend(batch_results)
-
-            # Clean up temporary file
-            default_storage.delete(path)
-
-            # Send completion notification
-            self._send_ws_notification(task_id, "completed", {
-                "progress": 100,
-                "results": results
-            })
+            # Each chunk is validated and resolved from cache in bulk, misses are crawled in batches
+            reporter = ProgressReporter(task_id, network=network)
+            MistTrackScraperService.process_stream(
+                itertools.chain([first_chunk], chunks), network, reporter,
+                bypass_negative=_bypass_negative_cache(request), timing=_timing_requested(request)
+            )
+
+            # Send completion summary; results stay server-side (results_url / export_url),
+            # so the response size does not grow with the file
+            summary = reporter.finish()
 
             return Response({
                 "task_id": task_id,
-                "results": results
+                "status": summary["status"],
+                "total": summary["total"],
+                "succeeded": summary["succeeded"],
+                "failed": summary["failed"],
+                "results_url": summary["results_url"],
+                "export_url": task_export_url(task_id)
             })
 
         except Exception as e:
             logger.error(f"Error processing file upload: {str(e)}")
-            # Clean up temporary file if it exists
-            try:
-                default_storage.delete(path)
-            except:
-                pass
+            if reporter:
+                reporter.finish(status="error", error=str(e))
             return Response(
                 {"error": f"Error processing file: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'], url_path='upload/init')
+    def upload_init(self, request):
+        """Start a chunked upload for files beyond the single-request size limit
+
+        With start=true the file is processed while it is being uploaded (CSV only,
+        Excel files are read once the upload is complete).
+        """
+        try:
+            size = int(request.data.get('size') or 0)
+            part_size = int(request.data.get('part_size') or 0) or None
+        except (TypeError, ValueError):
+            return Response({"error": "size and part_size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = ChunkedUpload.create(
+                request.data.get('filename'), size, request.data.get('network'), part_size,
+                task_id=str(uuid.uuid4()), bypass_negative=int(_bypass_negative_cache(request)),
+                timing=int(_timing_requested(request))
+            )
+            if str(request.data.get('start', '')).lower() in ('1', 'true', 'yes'):
+                _start_upload_processing(upload)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error starting chunked upload: {str(e)}")
+            return Response({"error": "Error starting upload"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(_upload_response(upload), status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get', 'delete'], url_path=r'upload/(?P<upload_id>[0-9a-f]{32})')
+    def upload_status(self, request, upload_id=None):
+        """Upload progress for resuming (GET) or cancel the upload (DELETE)"""
+        upload = ChunkedUpload.load(upload_id)
+        if upload is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.method == 'DELETE':
+            upload.abort()
+        return Response(_upload_response(upload))
+
+    @action(detail=False, methods=['put', 'post'], url_path=r'upload/(?P<upload_id>[0-9a-f]{32})/part')
+    def upload_part(self, request, upload_id=None):
+        """Append part ?index=N; the SHA-256 of the part goes in X-Checksum-Sha256 or ?checksum="""
+        upload = ChunkedUpload.load(upload_id)
+        if upload is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            index = int(request.query_params.get('index', ''))
+        except ValueError:
+            return Response({"error": "index must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        checksum = request.headers.get('X-Checksum-Sha256') or request.query_params.get('checksum')
+        try:
+            return Response(upload.write_part(index, _request_blocks(request), checksum))
+        except UploadGone as e:
+            # 会话已取消或处理失败，数据已删除，继续上传没有意义
+            return Response(_upload_response(upload, error=str(e)), status=status.HTTP_410_GONE)
+        except UploadConflict as e:
+            # 带上当前进度，客户端据此从 next_part 继续
+            return Response(_upload_response(upload, error=str(e)), status=status.HTTP_409_CONFLICT)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error writing part {index} of upload {upload_id}: {str(e)}")
+            return Response({"error": "Error writing part"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], url_path=r'upload/(?P<upload_id>[0-9a-f]{32})/complete')
+    def upload_complete(self, request, upload_id=None):
+        """Finish the upload and start processing it (unless it was started at init)"""
+        upload = ChunkedUpload.load(upload_id)
+        if upload is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            upload.complete()
+            _start_upload_processing(upload)
+        except UploadGone as e:
+            return Response(_upload_response(upload, error=str(e)), status=status.HTTP_410_GONE)
+        except UploadConflict as e:
+            return Response(_upload_response(upload, error=str(e)), status=status.HTTP_409_CONFLICT)
+        except Exception as e:
+            logger.error(f"Error completing upload {upload_id}: {str(e)}")
+            return Response({"error": "Error completing upload"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(_upload_response(upload))
+
+    @action(detail=True, methods=['get'])
+    def result(self, request, pk=None):
+        """Fetch stored results of a task, paginated by offset/limit"""
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', 1000)), 1), 10000)
+        except ValueError:
+            return Response({"error": "offset and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        store = TaskResultStore(pk)
+        try:
+            meta = store.get_meta()
+            count = store.count()
+            if not meta and not count:
+                return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+            results = store.get_results(offset, offset + limit - 1)
+        except Exception as e:
+            logger.error(f"Error fetching results for task {pk}: {str(e)}")
+            return Response({"error": "Error fetching results"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            "task_id": pk,
+            "status": meta.get("status", "processing"),
+            "total": meta.get("total", count),
+            "count": count,
+            "offset": offset,
+            "results": [
+                {"index": index, **item} for index, item in enumerate(results, start=offset + 1)
+            ]
+        })
+
+    @action(detail=True, methods=['get'], url_path=r'export/(?P<file_format>csv|xlsx|parquet)')
+    def export(self, request, pk=None, file_format=None):
+        """Download task results as CSV, XLSX or Parquet; ?columns=address,risk_level,... selects columns"""
+        store = TaskResultStore(pk)
+        try:
+            columns = parse_columns(request.query_params.get('columns'))
+            if not store.get_meta() and not store.count():
+                return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+
+            filename = f"misttrack_results_{pk}.{file_format}"
+            if file_format == 'csv':
+                response = StreamingHttpResponse(stream_csv(pk, columns), content_type=CONTENT_TYPES['csv'])
+                response['Content-Disposition'] = f'attachment; filename="{filename}"'
+                return response
+
+            # xlsx / parquet 写完才能发送，先写入临时文件（FileResponse 发送完后关闭并删除）
+            file = tempfile.TemporaryFile()
+            try:
+                FILE_WRITERS[file_format](pk, columns, file)
+            except Exception:
+                file.close()
+                raise
+            file.seek(0)
+            return FileResponse(file, as_attachment=True, filename=filename, content_type=CONTENT_TYPES[file_format])
+
+        except ExportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error exporting results for task {pk}: {str(e)}")
+            return Response({"error": "Error exporting results"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def validate_address(request):
     """API endpoint for address validation"""
     try:
         data = json.loads(request.body)
-        address = data.get('address')
+        address = str(data.get('address') or '').strip()
+        addresses = data.get('addresses')
+
+        # 批量验证：{"addresses": [...]}
+        if isinstance(addresses, list):
+            frame, summary = CryptoAddressValidator().validate_many(addresses)
+            return JsonResponse({
+                "results": [
+                    {"address": row.address, "is_valid": bool(row.valid), "possible_coins": row.coins, "canonical_address": row.normalized}
+                    for row in frame.itertuples(index=False)
+                ],
+                "summary": summary
+            })
         
         if not address:
             return JsonResponse({"error": "Address is required"}, status=400)
@@ -213,7 +357,9 @@ def validate_address(request):
             "is_valid": is_valid,
             "message": message,
             "possible_coins": possible_coins,
-            "normalized_address": validator.normalize_eth_address(address) if is_valid and any(coin in ['ETH', 'BSC', 'MATIC'] for coin in possible_coins) else address
+            "normalized_address": validator.normalize_eth_address(address) if is_valid and any(coin in ['ETH', 'BSC', 'MATIC'] for coin in possible_coins) else address,
+            # 缓存和去重使用的规范形式（EVM 小写，base58 保留大小写）
+            "canonical_address": canonical_address(address) if is_valid else address
         })
         
     except json.JSONDecodeError:
@@ -249,3 +395,67 @@ def search(request):
     except Exception as e:
         logger.error(f"Error performing search: {str(e)}")
         return JsonResponse({"error": str(e)}, status=500)
+
+@require_http_methods(["GET"])
+def cache_stats(request):
+    """Cache hit/miss counters per tier for this process"""
+    return JsonResponse(CacheManager().get_stats())
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """Stage latency histograms and capacity gauges of all web and worker processes (Prometheus text format)"""
+    try:
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        logger.error(f"Error rendering metrics: {str(e)}")
+        return HttpResponse(f"# error: {str(e)}\n", status=503, content_type='text/plain; charset=utf-8')
+
+def _profiler_admin(request) -> bool:
+    """Staff users, or callers with the PROFILER_ADMIN_TOKEN in X-Admin-Token"""
+    if getattr(request, 'user', None) is not None and request.user.is_staff:
+        return True
+    token = request.headers.get('X-Admin-Token') or ''
+    return bool(PROFILER_ADMIN_TOKEN) and hmac.compare_digest(token.encode(), PROFILER_ADMIN_TOKEN.encode())
+
+@csrf_exempt
+@require_http_methods(["GET", "POST", "DELETE"])
+def profiler(request):
+    """Sampling profiler switch: GET status, POST {"rate": 0.1} or {"seconds": 60} to start, DELETE to stop"""
+    if not _profiler_admin(request):
+        return JsonResponse({"error": "Admin access required"}, status=403)
+    try:
+        if request.method == 'GET':
+            return JsonResponse(lookup_profiler.status())
+        if request.method == 'DELETE':
+            return JsonResponse(lookup_profiler.stop())
+
+        data = json.loads(request.body or b'{}')
+        rate = float(data.get('rate', 1.0))
+        seconds = data.get('seconds')
+        seconds = int(seconds) if seconds not in (None, '') else None
+        if not 0 < rate <= 1 or (seconds is not None and seconds <= 0):
+            return JsonResponse({"error": "rate must be in (0, 1] and seconds positive"}, status=400)
+        logger.info(f"Profiler started: rate={rate} seconds={seconds}")
+        return JsonResponse(lookup_profiler.start(rate, seconds))
+
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except Exception as e:
+        logger.error(f"Error updating profiler: {str(e)}")
+        return JsonResponse({"error": str(e)}, status=500)
+
+@csrf_exempt
+@require_http_methods(["GET", "DELETE"])
+def profiler_stacks(request):
+    """Sampled stacks of all processes in collapsed format (?role=web|worker); DELETE clears them"""
+    if not _profiler_admin(request):
+        return JsonResponse({"error": "Admin access required"}, status=403)
+    try:
+        if request.method == 'DELETE':
+            lookup_profiler.reset_stacks()
+            return JsonResponse(lookup_profiler.status())
+        return HttpResponse(lookup_profiler.collapsed_stacks(request.GET.get('role') or None),
+                            content_type='text/plain; charset=utf-8')
+    except Exception as e:
+        logger.error(f"Error reading profiler stacks: {str(e)}")
+        return JsonResponse({"error": str(e)}, status=500)
@@ -11,6 +11,10 @@ import './table.css';
 
 const { Header, Content } = Layout;
 
+// 所有接口（查询、上传、结果、导出）使用同一个后端地址
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8002';
+const WS_URL = process.env.NEXT_PUBLIC_WS_URL || 'ws://localhost:8002';
+
 interface TaskProgress {
   status: 'processing' | 'completed' | 'error';
   address?: string;
@@ -55,6 +59,64 @@ interface CrawlerResult {
   error?: string;
 }
 
+// 任务结果条目（TaskResultStore）转换为表格行
+const formatTaskResult = (item: any, defaultNetwork: string): CrawlerResult => {
+  const fullAddress = item.data?.address || '';
+  const [network, cleanAddress] = fullAddress.includes('/')
+    ? fullAddress.split('/')
+    : [defaultNetwork, fullAddress];
+  const result = item.data?.result || {};
+
+  if (item.status !== 'completed') {
+    return {
+      key: cleanAddress,
+      address: cleanAddress,
+      network: network,
+      status: 'error',
+      error: item.data?.error || 'Unknown error'
+    };
+  }
+  return {
+    key: cleanAddress,
+    address: cleanAddress,
+    network: network,
+    status: 'success',
+    result: {
+      address: cleanAddress,
+      risk_score: result.risk_score,
+      risk_level: result.risk_level,
+      risk_type: result.risk_type,
+      address_labels: typeof result.address_labels === 'string'
+        ? [result.address_labels]
+        : result.address_labels || [],
+      volume: result.volume,
+      labels: result.labels || [],
+      transactions: result.transactions || [],
+      related_addresses: result.related_addresses || []
+    }
+  };
+};
+
+// 上传接口只返回汇总，完整结果按 results_url 分页读取
+const fetchTaskResults = async (resultsUrl: string, defaultNetwork: string): Promise<CrawlerResult[]> => {
+  const pageSize = 1000;
+  const rows: CrawlerResult[] = [];
+  for (let offset = 0; ; offset += pageSize) {
+    const response = await fetch(`${API_URL}${resultsUrl}?offset=${offset}&limit=${pageSize}`, {
+      headers: { 'Accept': 'application/json' },
+    });
+    if (!response.ok) {
+      throw new Error(`Failed to fetch results: ${response.status} ${response.statusText}`);
+    }
+    const page = await response.json();
+    const items = page.results || [];
+    rows.push(...items.map((item: any) => formatTaskResult(item, defaultNetwork)));
+    if (items.length < pageSize) {
+      return rows;
+    }
+  }
+};
+
 export default function Home() {
   const [form] = Form.useForm();
   const [loading, setLoading] = useState(false);
@@ -69,159 +131,78 @@ export default function Home() {
     inProgress: 0
   });
   const [processedAddressNetworks, setProcessedAddressNetworks] = useState<Set<string>>(new Set());
-
+  // 最近一次文件上传的任务，导出时由服务端按任务流式生成文件
+  const [lastTaskId, setLastTaskId] = useState<string | null>(null);
+  const [exportFormat, setExportFormat] = useState<'csv' | 'xlsx' | 'parquet'>('csv');
+  // WebSocket 订阅的任务（最近一次查询或上传返回的 task_id）
+  const [activeTaskId, setActiveTaskId] = useState<string | null>(null);
+
+  // 订阅最近一次提交的任务：服务端从头重放该任务的事件（result / progress / summary），
+  // 任务在请求返回前已完成时也能收到完整的事件
   useEffect(() => {
-    const wsUrl = process.env.NEXT_PUBLIC_WS_URL || 'ws://localhost:8000';
-    const ws = new WebSocket(`${wsUrl}/ws/task/${Date.now()}/`);
-    
+    if (!activeTaskId) return;
+    const ws = new WebSocket(`${WS_URL}/ws/task/${activeTaskId}/`);
+    const defaultNetwork = form.getFieldValue('network');
+
     ws.onmessage = (event) => {
       const data = JSON.parse(event.data);
-      const message = data.message as TaskProgress;
-      
-      console.log('Raw WebSocket message:', data);
-      
-      if (message.status === 'completed' && message.data) {
-        // Extract address and result
-        const inputAddress = message.data.address || '';
-        const [network, cleanAddress] = inputAddress.includes('/')
-          ? inputAddress.split('/')
-          : ['BSC', inputAddress];
-          
-        // Get the final address from all possible sources
-        const address = cleanAddress || 
-                       message.data.result?.address ||
-                       message.data.result?.input_address ||
-                       message.address;
-
-        if (!address) {
-          console.error('No address found in message:', message);
-          return;
-        }
-
-        console.log('Processing completed message:', {
-          inputAddress,
-          network,
-          address,
-          result: message.data.result
-        });
+      const taskEvent = data.message;
 
-        const newResult: CrawlerResult = {
-          key: address,
-          address: address,
-          network: network,
-          status: 'success',
-          result: {
-            address: address,
-            ...message.data.result,
-          }
-        };
+      console.log('Raw WebSocket message:', data);
 
-        console.log('Adding new result:', newResult);
-        setBatchResults(prev => {
-          const existingAddressNetworks = new Set(prev.map(item => `${item.address}-${item.network}`));
-          if (existingAddressNetworks.has(`${newResult.address}-${newResult.network}`)) return prev;
-          return [...prev, newResult];
-        });
-        
-        // 更新进度
-        setTaskProgress(prev => {
-          if (!prev) return null;
-          const current = (prev.current || 0) + 1;
-          const total = prev.total || 0;
-          return {
-            ...prev,
-            status: current >= total ? 'completed' : 'processing',
-            current,
-            progress: Math.round((current / total) * 100)
-          };
-        });
-        
-        setStats(prev => ({
-          ...prev,
-          success: prev.success + 1,
-          inProgress: Math.max(0, prev.inProgress - 1)
-        }));
-      } else if (message.status === 'error') {
-        const inputAddress = message.data?.address || '';
-        const [network, address] = inputAddress.includes('/')
-          ? inputAddress.split('/')
-          : ['BSC', inputAddress];
-
-        if (!address) {
-          console.error('No address found in error message:', message);
+      if (taskEvent.event === 'result') {
+        // 单个地址的结果（增量），每个结果只发送一次
+        const newResult = formatTaskResult(taskEvent, defaultNetwork);
+        if (!newResult.address) {
+          console.error('No address found in message:', taskEvent);
           return;
         }
-
-        console.log('Processing error message:', {
-          inputAddress,
-          network,
-          address,
-          error: message.data?.error
-        });
-
-        const newResult: CrawlerResult = {
-          key: address,
-          address: address,
-          network: network,
-          status: 'error',
-          error: message.data?.error || 'Unknown error'
-        };
-
-        console.log('Adding error result:', newResult);
         setBatchResults(prev => {
           const existingAddressNetworks = new Set(prev.map(item => `${item.address}-${item.network}`));
           if (existingAddressNetworks.has(`${newResult.address}-${newResult.network}`)) return prev;
           return [...prev, newResult];
         });
-        
-        // 更新进度
-        setTaskProgress(prev => {
-          if (!prev) return null;
-          const current = (prev.current || 0) + 1;
-          const total = prev.total || 0;
-          return {
-            ...prev,
-            status: current >= total ? 'completed' : 'processing',
-            current,
-            progress: Math.round((current / total) * 100)
-          };
+      } else if (taskEvent.event === 'progress') {
+        // 进度心跳（服务端合并发送）
+        setTaskProgress({
+          status: 'processing',
+          progress: Math.round(taskEvent.progress || 0),
+          current: taskEvent.current,
+          total: taskEvent.total
         });
-        
-        setStats(prev => ({
-          ...prev,
-          error: prev.error + 1,
-          inProgress: Math.max(0, prev.inProgress - 1)
-        }));
-      } else if (message.status === 'processing') {
-        // 更新进度
-        setTaskProgress(prev => {
-          if (!prev) return message;
-          return {
-            ...prev,
-            ...message,
-            progress: message.progress || prev.progress
-          };
+      } else if (taskEvent.event === 'summary') {
+        // 最终汇总：计数计入统计，之后服务端不再发送事件
+        setTaskProgress({
+          status: taskEvent.status === 'error' ? 'error' : 'completed',
+          progress: 100,
+          current: (taskEvent.succeeded || 0) + (taskEvent.failed || 0),
+          total: taskEvent.total,
+          error: taskEvent.error
         });
-        
         setStats(prev => ({
           ...prev,
-          inProgress: prev.inProgress + 1
+          total: prev.total + (taskEvent.total || 0),
+          success: prev.success + (taskEvent.succeeded || 0),
+          error: prev.error + (taskEvent.failed || 0)
         }));
+        if (taskEvent.status === 'error') {
+          message.error(`Task failed: ${taskEvent.error || 'Unknown error'}`);
+        }
+        ws.close();
       }
     };
 
     return () => {
       ws.close();
     };
-  }, []);
+  }, [activeTaskId]);
 
   const onSingleAddressSubmit = async (values: any) => {
     try {
       setLoading(true);
       console.log('Form Data:', values);
 
-      const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8002';
-      const response = await fetch(`${apiUrl}/api/crawler/`, {
+      const response = await fetch(`${API_URL}/api/crawler/`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -246,6 +227,9 @@ export default function Home() {
       
       const result = await response.json();
       console.log('Task submitted successfully:', result);
+      if (result.task_id) {
+        setActiveTaskId(result.task_id);
+      }
       
       if (result.result) {
         const newResult: CrawlerResult = {
@@ -291,8 +275,7 @@ export default function Home() {
       const network = form.getFieldValue('network');
       console.log('Submitting batch task:', { network });
 
-      const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8002';
-      const response = await fetch(`${apiUrl}/api/crawler/batch`, {
+      const response = await fetch(`${API_URL}/api/crawler/batch`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -327,8 +310,8 @@ export default function Home() {
 
   const uploadProps: UploadProps = {
     name: 'file',
-    accept: '.csv',
-    action: `${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/crawler/upload_file/`,
+    accept: '.csv,.xlsx,.xls',
+    action: `${API_URL}/api/crawler/upload_file/`,
     headers: {
       'Accept': 'application/json',
     },
@@ -345,9 +328,9 @@ export default function Home() {
         return false;
       }
       
-      const isCSV = file.type === 'text/csv' || file.name.endsWith('.csv');
-      if (!isCSV) {
-        message.error('You can only upload CSV files!');
+      const isSpreadsheet = file.type === 'text/csv' || /\.(csv|xlsx|xls)$/i.test(file.name);
+      if (!isSpreadsheet) {
+        message.error('You can only upload CSV or Excel files!');
         return false;
       }
       return true;
@@ -360,72 +343,32 @@ export default function Home() {
         console.log('Upload response:', info.file.response);
         message.success(`${info.file.name} uploaded successfully`);
         
-        // 从响应中获取结果数组
-        const results = info.file.response.results || [];
-        console.log('Raw results:', results);
-
-        // 格式化地址数据
-        const formattedAddresses = results.map((result: any) => {
-          // 从data中提取地址信息
-          const fullAddress = result.data?.address || '';
-          const [network, cleanAddress] = fullAddress.includes('/')
-            ? fullAddress.split('/')
-            : [form.getFieldValue('network'), fullAddress];
-            
-          console.log('Processing address:', {
-            fullAddress,
-            network,
-            address: cleanAddress,
-            result
-          });
-
-          return {
-            key: cleanAddress,
-            address: cleanAddress,
-            network: network,
-            status: result.success ? 'success' : 'error',
-            result: {
-              address: cleanAddress,
-              risk_score: result.data?.risk_score,
-              risk_level: result.data?.risk_level,
-              risk_type: result.data?.risk_type,
-              address_labels: typeof result.data?.address_labels === 'string' 
-                ? [result.data.address_labels] 
-                : result.data?.address_labels || [],
-              volume: result.data?.volume,
-              labels: result.data?.labels || [],
-              transactions: result.data?.transactions || [],
-              related_addresses: result.data?.related_addresses || []
-            }
-          };
-        });
-
-        console.log('Formatted addresses:', formattedAddresses);
-        
-        // 更新结果列表，过滤掉重复地址
-        setBatchResults(prev => {
-          const existingAddressNetworks = new Set(prev.map(item => `${item.address}-${item.network}`));
-          const newUniqueAddresses = formattedAddresses.filter(
-            item => !existingAddressNetworks.has(`${item.address}-${item.network}`)
-          );
-          return [...prev, ...newUniqueAddresses];
-        });
+        // 响应只包含汇总（计数、results_url、export_url），结果不随文件大小增长
+        // 进度和统计由任务的 WebSocket 事件更新；事件日志有长度上限，表格按 results_url 补全
+        const summary = info.file.response;
+        setLastTaskId(summary.task_id || null);
+        setActiveTaskId(summary.task_id || null);
 
-        // 更新总任务数和状态
-        setStats(prev => ({
-          ...prev,
-          total: prev.total + formattedAddresses.length,
-          success: prev.success + formattedAddresses.filter(r => r.status === 'success').length,
-          error: prev.error + formattedAddresses.filter(r => r.status === 'error').length
-        }));
-
-        // 更新任务进度
-        setTaskProgress({
-          status: 'processing',
-          progress: 0,
-          current: 0,
-          total: results.length
-        });
+        if (!summary.results_url) {
+          return;
+        }
+        fetchTaskResults(summary.results_url, form.getFieldValue('network'))
+          .then(formattedAddresses => {
+            console.log('Formatted addresses:', formattedAddresses);
+
+            // 更新结果列表，过滤掉重复地址
+            setBatchResults(prev => {
+              const existingAddressNetworks = new Set(prev.map(item => `${item.address}-${item.network}`));
+              const newUniqueAddresses = formattedAddresses.filter(
+                item => !existingAddressNetworks.has(`${item.address}-${item.network}`)
+              );
+              return [...prev, ...newUniqueAddresses];
+            });
+          })
+          .catch(error => {
+            console.error('Fetch results error:', error);
+            message.error('Failed to load task results');
+          });
       } else if (info.file.status === 'error') {
         console.error('File upload error:', info.file);
         message.error(`${info.file.name} upload failed: ${info.file.error?.message || 'Unknown error'}`);
@@ -434,6 +377,16 @@ export default function Home() {
   };
 
   const handleExportTable = () => {
+    // 上传任务的结果由服务端导出，浏览器不再在内存中拼接文件
+    if (lastTaskId) {
+      const link = document.createElement('a');
+      link.setAttribute('href', `${API_URL}/api/crawler/${lastTaskId}/export/${exportFormat}/`);
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      return;
+    }
+
     try {
       // 准备导出数据
       const exportData = batchResults.map((item, index) => ({
@@ -903,6 +856,18 @@ export default function Home() {
                       marginBottom: '2px',
                       paddingBottom: '1px'
                     }}>
+                      {lastTaskId && (
+                        <Select
+                          value={exportFormat}
+                          onChange={setExportFormat}
+                          style={{ width: 110, marginRight: 8 }}
+                          options={[
+                            { value: 'csv', label: 'CSV' },
+                            { value: 'xlsx', label: 'Excel' },
+                            { value: 'parquet', label: 'Parquet' },
+                          ]}
+                        />
+                      )}
                       <Button 
                         type="primary"
                         icon={<DownloadOutlined />}
@@ -1,6 +1,9 @@
+import sys
 import logging
 import requests
-from crawler.views import MistTrackScraper
+from crawler.validators import CryptoAddressValidator
+from crawler.scraper_undetected import UndetectedScraper
+from crawler.benchmark.standin import StandinServer
 
 # 配置日志
 logging.basicConfig(
@@ -14,10 +17,21 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# 默认使用本地替身服务器（crawler/benchmark/standin.py），加 --live 参数时访问 misttrack.io
+LIVE_SITE_URL = "https://misttrack.io"
+_site = {"url": None, "server": None}
+
+def site_url():
+    """被测站点地址，第一次调用时启动本地替身服务器"""
+    if _site["url"] is None:
+        _site["server"] = StandinServer(latency_ms=100)
+        _site["url"] = _site["server"].start()
+    return _site["url"]
+
 def test_website_accessibility():
     """测试网站可访问性"""
     try:
-        response = requests.get("https://misttrack.io")
+        response = requests.get(f"{site_url()}/aml_risks/ETH/0x28c6c06298d514db089934071355e5743bf21d60")
         logger.info(f"Website status code: {response.status_code}")
         logger.info(f"Website headers: {response.headers}")
         return response.status_code == 200
@@ -44,18 +58,17 @@ def test_address_validation():
         'EMPTY': ''
     }
 
-    scraper = MistTrackScraper()
+    validator = CryptoAddressValidator()
     
     for coin, address in test_addresses.items():
         logger.info(f"\nTesting {coin} address: {address}")
-        result = scraper.get_address_info(address)
-        logger.info(f"Validation result: {result}")
+        is_valid, message, possible_coins = validator.validate(address)
+        logger.info(f"Validation result: {is_valid}, {message}")
         
-        if "error" in result:
-            logger.warning(f"Validation failed: {result['error']}")
+        if not is_valid:
+            logger.warning(f"Validation failed: {message}")
         else:
-            logger.info(f"Address is valid. Detected coin: {result['coin']}")
-            logger.info(f"Possible coins: {result['possible_coins']}")
+            logger.info(f"Address is valid. Possible coins: {possible_coins}")
 
 def test_address_checksum():
     """测试地址校验和验证"""
@@ -68,35 +81,41 @@ def test_address_checksum():
         '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAe',
     ]
 
-    scraper = MistTrackScraper()
+    validator = CryptoAddressValidator()
     
     for address in eth_addresses:
         logger.info(f"\nTesting ETH address checksum: {address}")
-        result = scraper.get_address_info(address)
+        result = validator.validate(address)
         logger.info(f"Validation result: {result}")
 
 def test_search_address():
     """测试地址搜索"""
     address = "0x28c6c06298d514db089934071355e5743bf21d60"
     
-    scraper = MistTrackScraper()
-    result = scraper.search_address(address)
+    scraper = UndetectedScraper(base_url=f"{site_url()}/aml_risks")
+    result = scraper.search_address(f"ETH/{address}")
     logger.info(f"Search result for {address}: {result}")
     
     
 def main():
     """主测试函数"""
     logger.info("Starting tests...")
+    if "--live" in sys.argv:
+        _site["url"] = LIVE_SITE_URL
     
-    if not test_website_accessibility():
-        logger.error("Website is not accessible")
-        return
+    try:
+        if not test_website_accessibility():
+            logger.error("Website is not accessible")
+            return
 
-    # test_address_validation()
-    
-    # test_address_checksum()
-    
-    test_search_address()
+        # test_address_validation()
+        
+        # test_address_checksum()
+        
+        test_search_address()
+    finally:
+        if _site["server"]:
+            _site["server"].stop()
 
 if __name__ == "__main__":
     main()
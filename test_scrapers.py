@@ -1,9 +1,11 @@
+import sys
 import logging
 import time
 from crawler.scraper_selenium import SeleniumScraper
 from crawler.scraper_playwright import PlaywrightScraper
 from crawler.scraper_undetected import UndetectedScraper
 from crawler.scraper_proxy import ProxyScraper
+from crawler.benchmark.standin import StandinServer
 
 # 配置日志
 logging.basicConfig(
@@ -12,31 +14,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 默认爬取本地替身服务器，加 --live 参数时爬取 misttrack.io / light.misttrack.io
+_site = {"url": None, "server": None}
+
+def site_url(live_url):
+    """被测站点地址，第一次调用时启动本地替身服务器"""
+    if "--live" in sys.argv:
+        return live_url
+    if _site["url"] is None:
+        _site["server"] = StandinServer(latency_ms=100)
+        _site["url"] = _site["server"].start()
+    return _site["url"]
+
 def test_selenium():
     """测试Selenium爬虫"""
     logger.info("Testing Selenium Scraper...")
-    scraper = SeleniumScraper()
-    result = scraper.search_address("0x28c6c06298d514db089934071355e5743bf21d60")
+    scraper = SeleniumScraper(base_url=f"{site_url('https://misttrack.io')}/aml_risks")
+    result = scraper.search_address("ETH/0x28c6c06298d514db089934071355e5743bf21d60")
     logger.info(f"Selenium result: {result}")
 
 def test_playwright():
     """测试Playwright爬虫"""
     logger.info("Testing Playwright Scraper...")
-    scraper = PlaywrightScraper()
+    scraper = PlaywrightScraper(base_url=site_url('https://light.misttrack.io'))
     result = scraper.search_address("0x28c6c06298d514db089934071355e5743bf21d60")
     logger.info(f"Playwright result: {result}")
 
 def test_undetected():
     """测试Undetected-ChromeDriver爬虫"""
     logger.info("Testing Undetected-ChromeDriver Scraper...")
-    scraper = UndetectedScraper()
-    result = scraper.search_address("0x28c6c06298d514db089934071355e5743bf21d60")
+    scraper = UndetectedScraper(base_url=f"{site_url('https://misttrack.io')}/aml_risks")
+    result = scraper.search_address("ETH/0x28c6c06298d514db089934071355e5743bf21d60")
     logger.info(f"Undetected-ChromeDriver result: {result}")
 
 def test_proxy():
     """测试代理IP池爬虫"""
     logger.info("Testing Proxy Scraper...")
-    scraper = ProxyScraper()
+    scraper = ProxyScraper(base_url=site_url('https://light.misttrack.io'))
     result = scraper.search_address("0x28c6c06298d514db089934071355e5743bf21d60")
     logger.info(f"Proxy result: {result}")
 
@@ -44,17 +58,21 @@ def main():
     """主测试函数"""
     logger.info("Starting scraper tests...")
     
-    # 测试所有爬虫实现
-    test_undetected()
-    time.sleep(2)
-    
-    # test_selenium()
-    # time.sleep(2)  # 等待一段时间再测试下一个
-    
-    # test_playwright()
-    # time.sleep(2)
-    
-    # test_proxy()
+    try:
+        # 测试所有爬虫实现
+        test_undetected()
+        time.sleep(2)
+        
+        # test_selenium()
+        # time.sleep(2)  # 等待一段时间再测试下一个
+        
+        # test_playwright()
+        # time.sleep(2)
+        
+        # test_proxy()
+    finally:
+        if _site["server"]:
+            _site["server"].stop()
 
 if __name__ == "__main__":
     main()
@@ -1,28 +1,43 @@
 """
 清理 Redis 缓存的工具脚本
+
+通过递增缓存代数使现有缓存失效（一次 INCR），不会影响同一个库中的
+Celery broker 和 channel layer 数据；旧代数的键由后台任务 sweep_cache 清理。
+
+用法：
+    python utils/clear_cache.py               # 清空全部地址缓存
+    python utils/clear_cache.py --network ETH # 只清空某个网络
+    python utils/clear_cache.py --sweep       # 同时立即清理旧代数的键
 """
 
-import redis
-
-def clear_cache():
-    # 创建 Redis 连接
-    redis_client = redis.Redis(
-        host='localhost',
-        port=6379,
-        db=0,
-        decode_responses=True
-    )
-    
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.cache_manager import CacheManager
+
+def clear_cache(network=None, sweep=False):
+    cache_manager = CacheManager()
+    if not cache_manager.redis_client:
+        print("Failed to clear Redis cache: Redis is not available")
+        return False
+
     try:
-        # 清空当前数据库
-        redis_client.flushdb()
-        print("Successfully cleared Redis cache")
+        cache_manager.clear_cache(network=network)
+        print(f"Successfully cleared Redis cache{f' for {network}' if network else ''}")
+        if sweep:
+            removed = cache_manager.sweep_stale_generations()
+            print(f"Removed {removed} stale keys")
         return True
     except Exception as e:
         print(f"Failed to clear Redis cache: {str(e)}")
         return False
-    finally:
-        redis_client.close()
 
 if __name__ == "__main__":
-    clear_cache()
+    parser = argparse.ArgumentParser(description="Invalidate the MistTrack result cache")
+    parser.add_argument('--network', help="only clear this network")
+    parser.add_argument('--sweep', action='store_true', help="remove stale keys now instead of waiting for sweep_cache")
+    args = parser.parse_args()
+    clear_cache(network=args.network, sweep=args.sweep)
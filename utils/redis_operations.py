@@ -3,26 +3,32 @@ Redis 操作指南
 这个模块提供了常用的 Redis 操作示例和工具函数
 """
 
+import os
+import sys
 import redis
 from typing import Union, List, Dict, Any
 import json
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.redis_client import get_redis, create_pool
+
 class RedisManager:
-    def __init__(self, host='localhost', port=6379, db=0, password=None):
+    def __init__(self, host=None, port=None, db=None, password=None):
         """
         初始化 Redis 连接
+        不传参数时使用配置中的 Redis 和进程共享的连接池，传入的参数会覆盖配置
         :param host: Redis 服务器地址
         :param port: Redis 端口
         :param db: 数据库编号
         :param password: Redis 密码
         """
-        self.redis_client = redis.Redis(
-            host=host,
-            port=port,
-            db=db,
-            password=password,
-            decode_responses=True  # 自动将字节解码为字符串
-        )
+        if host is None and port is None and db is None and password is None:
+            self.redis_client = get_redis()  # 自动将字节解码为字符串
+        else:
+            self.redis_client = redis.Redis(
+                connection_pool=create_pool(host=host, port=port, db=db, password=password)
+            )
 
     def set_value(self, key: str, value: Union[str, dict, list], expire: int = None) -> bool:
         """
@@ -35,9 +41,27 @@ class RedisManager:
         try:
             if isinstance(value, (dict, list)):
                 value = json.dumps(value, ensure_ascii=False)
-            self.redis_client.set(key, value)
-            if expire:
-                self.redis_client.expire(key, expire)
+            # 值和过期时间在同一条 SET 命令中设置
+            self.redis_client.set(key, value, ex=expire or None)
+            return True
+        except Exception as e:
+            print(f"设置值失败: {str(e)}")
+            return False
+
+    def set_values(self, mapping: Dict[str, Union[str, dict, list]], expire: int = None) -> bool:
+        """
+        原子地设置多个键值对（MULTI/EXEC，一次往返）
+        :param mapping: 键值字典
+        :param expire: 过期时间（秒）
+        :return: 是否成功
+        """
+        try:
+            with self.redis_client.pipeline(transaction=True) as pipe:
+                for key, value in mapping.items():
+                    if isinstance(value, (dict, list)):
+                        value = json.dumps(value, ensure_ascii=False)
+                    pipe.set(key, value, ex=expire or None)
+                pipe.execute()
             return True
         except Exception as e:
             print(f"设置值失败: {str(e)}")
@@ -177,7 +201,7 @@ class RedisManager:
 # 使用示例
 if __name__ == "__main__":
     # 创建 Redis 管理器实例
-    redis_manager = RedisManager(host='localhost', port=6379, db=0)
+    redis_manager = RedisManager()
     
     # 字符串操作示例
     redis_manager.set_value("name", "张三", expire=3600)  # 设置字符串，1小时后过期